@@ -0,0 +1,541 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from msx_catalog import CATALOG_DB, FontCatalog
+from msx_compress import CODECS, parameter_sweep
+from msx_diff import MERGE_RESOLUTIONS, diff_fonts, glyph_hex, merge_fonts, pairwise_diffs, pixel_changes
+from msx_export import EXPORTERS, export_font
+from msx_font import MSXFont
+from msx_formats import CHAR_SIZE, FNT_FIRST_CHAR, FORMATS, glyph_width, read_font_file, scan_fonts, write_atomic
+from msx_perf import compare_snapshots
+from msx_screen import PRINT_VARIANTS, SCREEN_EXTENSIONS, Screen2, TextCompositor, read_screen
+from msx_similarity import FontIndex, GlyphIndex, group_pairs
+from msx_tiles import extract_screen
+
+# --- Constantes ---
+CHUNK_SIZE = 16  # Arquivos enviados de uma vez a cada processo do pool
+# Caracteres invertidos, em rodadas, pelo comando 'roundtrip': o 'A' sozinho (gravação
+# incremental) e depois um caractere de controle, que o .FNT não guarda, junto com o 'B'
+ROUNDTRIP_EDITS = ((65,), (5, 66))
+
+
+# --- Tarefas (executadas nos processos do pool) ---
+
+def validate_file(path):
+    """Identifica o formato de um arquivo e valida seu conteúdo pelo registro de formatos."""
+    data, fmt, info, problems = read_font_file(path)
+    levels = {level for level, _ in problems}
+    record = {'path': path,
+              'format': fmt.name if fmt else None,
+              'status': 'error' if 'error' in levels else 'warning' if levels else 'ok',
+              'problems': [message for _, message in problems]}
+    return record, data, info
+
+
+def check_file(path):
+    """Tarefa do comando 'validate'."""
+    return validate_file(path)[0]
+
+
+def normalize_file(job):
+    """Tarefa do comando 'normalize': regrava o alfabeto no formato de destino, com cabeçalho padrão."""
+    path, output, target = job
+    record, data, info = validate_file(path)
+    if record['status'] == 'error':
+        return record
+
+    fmt = FORMATS[target]
+    warnings = [message for _, message in fmt.write_problems(data, info)]
+    if warnings:
+        record.update(status='warning', problems=record['problems'] + warnings)
+    try:
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        write_atomic(output, fmt.write(data, info))
+    except OSError as e:
+        record.update(status='error', problems=record['problems'] + [str(e)])
+        return record
+
+    record.update(output=output, output_format=target)
+    return record
+
+
+def roundtrip_file(path):
+    """Tarefa do comando 'roundtrip': edita e salva uma cópia do alfabeto, conferindo o que volta do disco.
+
+    Depois de cada rodada de ROUNDTRIP_EDITS, o arquivo salvo (de forma incremental,
+    quando o formato permite) precisa ser igual ao gravado de uma só vez, a releitura
+    igual aos dados editados, a menos que a gravação tenha avisado da perda, e, no
+    .FNT, a largura dos caracteres redesenhados precisa ter sido recalculada.
+    """
+    record, data, info = validate_file(path)
+    if record['status'] == 'error':
+        return record
+
+    fmt = FORMATS[record['format']]
+    edited = bytearray(data)
+    failures = []
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            copy = os.path.join(workdir, os.path.basename(path))
+            shutil.copyfile(path, copy)
+            font = MSXFont(copy)
+            font.save()  # Registra o estado do disco: as próximas gravações podem ser incrementais
+            for codes in ROUNDTRIP_EDITS:
+                for code in codes:
+                    glyph = bytes(byte ^ 0xFF for byte in edited[code * CHAR_SIZE:(code + 1) * CHAR_SIZE])
+                    edited[code * CHAR_SIZE:(code + 1) * CHAR_SIZE] = glyph
+                    font.update_char_pattern(code, glyph)
+                problems = font.save()
+                failures += [message for level, message in problems if level == 'error']
+                with open(copy, 'rb') as f:
+                    content = f.read()
+                if content != fmt.write(edited, info):
+                    failures.append(f"códigos {list(codes)}: o arquivo salvo difere da gravação completa")
+                reread, _, reread_info, _ = read_font_file(copy)
+                if reread is None or bytes(reread) != bytes(edited) and not problems:
+                    failures.append(f"códigos {list(codes)}: dados perdidos na releitura, sem aviso")
+                widths = reread_info.get('fnt_header') if reread is not None else None
+                if widths and any(widths[code] != glyph_width(edited[code * CHAR_SIZE:(code + 1) * CHAR_SIZE])
+                                  for code in codes if code >= FNT_FIRST_CHAR):
+                    failures.append(f"códigos {list(codes)}: largura no .FNT não recalculada")
+    except OSError as e:
+        failures.append(str(e))
+
+    if failures:
+        record.update(status='error', problems=record['problems'] + failures)
+    return record
+
+
+def tiles_file(job):
+    """Tarefa do comando 'tiles': extrai os ladrilhos de uma tela em alfabetos e mapa de nomes."""
+    path, output_base, invert, max_distance, first_code = job
+    report, problems = extract_screen(path, output_base, invert, max_distance, first_code)
+    levels = {level for level, _ in problems}
+    record = {'path': path,
+              'status': 'error' if report is None or 'error' in levels else 'warning' if levels else 'ok',
+              'problems': [message for _, message in problems]}
+    if report is not None:
+        record.update(report)
+    return record
+
+
+def export_file(job):
+    """Tarefa do comando 'export': grava o alfabeto em cada um dos formatos de exportação pedidos."""
+    path, output_base, names = job
+    record, data, _ = validate_file(path)
+    if record['status'] == 'error':
+        return record
+
+    outputs = []
+    try:
+        os.makedirs(os.path.dirname(output_base) or '.', exist_ok=True)
+    except OSError as e:
+        record.update(status='error', problems=record['problems'] + [str(e)])
+        return record
+    for name in names:
+        output = output_base + EXPORTERS[name].extension
+        problems = export_font(data, output, EXPORTERS[name])
+        if problems:
+            record.update(status='error', problems=record['problems'] + [message for _, message in problems])
+        else:
+            outputs.append(output)
+    record['outputs'] = outputs
+    return record
+
+
+# --- Execução em Lote ---
+
+def isolated(task, job):
+    """Executa uma tarefa; uma exceção inesperada vira o registro de erro daquele arquivo."""
+    try:
+        return task(job)
+    except Exception as e:  # Um arquivo malformado não pode interromper a pasta inteira
+        path = job if isinstance(job, str) else job[0]
+        return {'path': path, 'status': 'error', 'problems': [f"{type(e).__name__}: {e}"]}
+
+
+def run_batch(task, jobs, workers, out):
+    """Executa a tarefa sobre os trabalhos e grava um relatório JSON por linha, à medida que termina.
+
+    Cada trabalho roda isolado: uma exceção em um arquivo vira um registro de erro.
+    Retorna a contagem de registros por status.
+    """
+    task = partial(isolated, task)
+    counts = {'ok': 0, 'warning': 0, 'error': 0}
+
+    def emit(record):
+        counts[record['status']] += 1
+        out.write(json.dumps(record, ensure_ascii=False) + '\n')
+        out.flush()
+
+    if workers == 1:
+        for job in jobs:
+            emit(task(job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for record in executor.map(task, jobs, chunksize=CHUNK_SIZE):
+                emit(record)
+    return counts
+
+
+def build_parser():
+    """Monta os argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(
+        prog='msx_batch.py',
+        description="Validação e conversão em lote de alfabetos MSX (Graphos III), sem interface gráfica.")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="número de processos (padrão: todos os núcleos)")
+    parser.add_argument('--strict', action='store_true', help="avisos também resultam em código de saída 1")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    validate = commands.add_parser('validate', help="valida todos os alfabetos das pastas")
+    validate.add_argument('paths', nargs='+', help="arquivos ou pastas a verificar")
+
+    normalize = commands.add_parser('normalize', help="regrava os alfabetos com o cabeçalho padrão")
+    normalize.add_argument('paths', nargs='+', help="arquivos ou pastas de origem")
+    normalize.add_argument('-o', '--output', required=True, help="pasta de destino (a estrutura é preservada)")
+    normalize.add_argument('-f', '--format', choices=sorted(FORMATS), default='comum',
+                           help="formato de destino (padrão: comum)")
+
+    roundtrip = commands.add_parser('roundtrip', help="edita, salva e relê uma cópia de cada alfabeto, conferindo "
+                                                      "a gravação incremental e o que se perde no formato")
+    roundtrip.add_argument('paths', nargs='+', help="arquivos ou pastas a verificar")
+
+    catalog = commands.add_parser('catalog', help="catálogo SQLite de alfabetos e índice de glifos")
+    catalog.add_argument('--db', default=CATALOG_DB, help=f"banco de dados (padrão: {CATALOG_DB})")
+    actions = catalog.add_subparsers(dest='action', required=True)
+    scan = actions.add_parser('scan', help="(re)indexa as pastas raiz, relendo só os arquivos alterados")
+    scan.add_argument('paths', nargs='*', help="pastas raiz (padrão: as já registradas)")
+    actions.add_parser('dupes', help="lista grupos de fontes idênticas")
+    glyph = actions.add_parser('glyph', help="fontes que contêm um desenho de glifo")
+    source = glyph.add_mutually_exclusive_group(required=True)
+    source.add_argument('--hex', help="os 8 bytes do glifo em hexadecimal (ex.: 00609090f0909000)")
+    source.add_argument('--font', help="fonte de onde tirar o glifo (com --code)")
+    glyph.add_argument('--code', type=int, help="código do caractere (0-255)")
+    glyph.add_argument('--any-code', action='store_true', help="procura o desenho em qualquer código")
+    near_glyph = actions.add_parser('near-glyph', help="os k desenhos de glifo mais parecidos com um glifo")
+    source = near_glyph.add_mutually_exclusive_group(required=True)
+    source.add_argument('--hex', help="os 8 bytes do glifo em hexadecimal")
+    source.add_argument('--font', help="fonte de onde tirar o glifo (com --code)")
+    near_glyph.add_argument('--code', type=int, help="código do caractere (0-255)")
+    near_glyph.add_argument('-k', type=int, default=10, help="quantidade de resultados (padrão: 10)")
+    near_font = actions.add_parser('near-font', help="as k fontes mais parecidas com uma fonte")
+    near_font.add_argument('font', help="arquivo de alfabeto (não precisa estar catalogado)")
+    near_font.add_argument('-k', type=int, default=10, help="quantidade de resultados (padrão: 10)")
+    near_dupes = actions.add_parser('near-dupes', help="grupos de fontes quase idênticas")
+    near_dupes.add_argument('-d', '--max-distance', type=int, default=16,
+                            help="máximo de pixels diferentes (padrão: 16; a partir de 256, compara todos os "
+                                 "pares de fontes, o que é lento em catálogos grandes)")
+
+    screen = commands.add_parser('screen', help="compõe texto na SCREEN 2 e exporta .SCR, .GRP ou .PNG")
+    screen.add_argument('font', help="alfabeto usado no texto")
+    screen.add_argument('output', help="arquivo de saída (.SCR, .GRP ou .PNG)")
+    screen.add_argument('-t', '--text', action='append', default=[], help="linha de texto (pode repetir)")
+    screen.add_argument('--text-file', help="arquivo com o texto (UTF-8)")
+    screen.add_argument('--variant', choices=sorted(PRINT_VARIANTS), default='normal',
+                        help="variação de impressão (padrão: normal)")
+    screen.add_argument('--ink', type=int, default=15, help="cor de frente, 0-15 (padrão: 15)")
+    screen.add_argument('--paper', type=int, default=4, help="cor de fundo, 0-15 (padrão: 4)")
+    screen.add_argument('--at', nargs=2, type=int, default=(0, 0), metavar=('COLUNA', 'LINHA'),
+                        help="célula inicial (padrão: 0 0)")
+    screen.add_argument('--background', help="tela .SCR/.GRP sobre a qual o texto é escrito")
+
+    tiles = commands.add_parser('tiles', help="extrai alfabetos e mapa de nomes de telas .SCR/.GRP/.CPT")
+    tiles.add_argument('paths', nargs='+', help="telas ou pastas de origem")
+    tiles.add_argument('-o', '--output', required=True, help="pasta de destino (a estrutura é preservada)")
+    tiles.add_argument('--invert', action='store_true',
+                       help="ladrilhos invertidos contam como o mesmo (com frente e fundo trocados)")
+    tiles.add_argument('-d', '--max-distance', type=int, default=0,
+                       help="funde ladrilhos com até N pixels diferentes (padrão: 0, só idênticos)")
+    tiles.add_argument('--first-code', type=int, default=0, help="primeiro código usado nos alfabetos (padrão: 0)")
+
+    export = commands.add_parser('export', help="exporta os alfabetos para BDF, PSF2, C, assembler Z80 ou PNG")
+    export.add_argument('paths', nargs='+', help="arquivos ou pastas de origem")
+    export.add_argument('-o', '--output', required=True, help="pasta de destino (a estrutura é preservada)")
+    export.add_argument('-f', '--format', action='append', choices=sorted(EXPORTERS), required=True,
+                        help="formato de exportação (pode repetir)")
+
+    bench = commands.add_parser('compress-bench',
+                                help="mede a taxa e a vazão do RLE e do LZ (com cada parâmetro) sobre os alfabetos")
+    bench.add_argument('paths', nargs='*', default=['fonts', 'III'], help="arquivos ou pastas (padrão: fonts III)")
+    bench.add_argument('--repeat', type=int, default=3, help="execuções por medida; vale a melhor (padrão: 3)")
+
+    unpacker = commands.add_parser('unpacker', help="imprime o descompressor Z80 de um formato comprimido")
+    unpacker.add_argument('codec', choices=sorted(CODECS), help="formato comprimido")
+
+    perf = commands.add_parser('perf-compare', help="compara duas medições de desempenho (JSON do editor ou do "
+                                                    "msx_bench.py)")
+    perf.add_argument('old', help="medição de referência")
+    perf.add_argument('new', help="medição nova")
+    perf.add_argument('--metric', choices=('mean_ms', 'min_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'),
+                      default='p95_ms', help="medida comparada (padrão: p95_ms; min_ms para o msx_bench.py)")
+    perf.add_argument('--threshold', type=float, default=1.25,
+                      help="razão nova/antiga acima da qual há regressão (padrão: 1.25)")
+
+    diff = commands.add_parser('diff', help="caracteres e pixels diferentes entre dois alfabetos")
+    diff.add_argument('a', help="primeiro alfabeto")
+    diff.add_argument('b', help="segundo alfabeto")
+    diff.add_argument('--pixels', action='store_true', help="lista também cada pixel alterado (linha, coluna, valor)")
+
+    merge = commands.add_parser('merge', help="mesclagem de três vias de duas cópias editadas de um alfabeto")
+    merge.add_argument('base', help="alfabeto de origem comum")
+    merge.add_argument('ours', help="nossa cópia (define o formato de saída)")
+    merge.add_argument('theirs', help="a outra cópia")
+    merge.add_argument('-o', '--output', required=True, help="arquivo mesclado")
+    merge.add_argument('--resolve', choices=MERGE_RESOLUTIONS, default='ours',
+                       help="como resolver os conflitos (padrão: ours)")
+
+    diff_all = commands.add_parser('diff-all', help="compara todos os pares de alfabetos das pastas")
+    diff_all.add_argument('paths', nargs='+', help="arquivos ou pastas a comparar")
+    diff_all.add_argument('--max-glyphs', type=int,
+                          help="só lista os pares com até N caracteres diferentes (padrão: todos)")
+    return parser
+
+
+def run_screen(args):
+    """Executa o comando 'screen'; retorna o código de saída."""
+    font = MSXFont(args.font)
+    errors = [message for level, message in font.problems if level == 'error']
+    if errors:
+        print(errors[0], file=sys.stderr)
+        return 1
+
+    if args.background:
+        screen, problems = read_screen(args.background)
+        if screen is None:
+            print(problems[0][1], file=sys.stderr)
+            return 1
+    else:
+        screen = Screen2(ink=args.ink, paper=args.paper)
+
+    text = '\n'.join(args.text)
+    if args.text_file:
+        with open(args.text_file, encoding='utf-8') as f:
+            text = (text + '\n' if text else '') + f.read()
+    col, row = args.at
+    TextCompositor(screen, font).write(text, col, row, args.variant, args.ink, args.paper)
+
+    problems = screen.save(args.output)
+    if problems:
+        print(problems[0][1], file=sys.stderr)
+        return 1
+    return 0
+
+
+def run_compress(args, out):
+    """Executa os comandos 'compress-bench' e 'unpacker'; retorna o código de saída."""
+    if args.command == 'unpacker':
+        out.write(CODECS[args.codec][2])
+        return 0
+
+    datas = [data for data in (read_font_file(path)[0] for _, path in scan_fonts(args.paths)) if data is not None]
+    if not datas:
+        print("Nenhum alfabeto encontrado.", file=sys.stderr)
+        return 1
+    best = None
+    for record in parameter_sweep(datas, max(1, args.repeat)):
+        out.write(json.dumps(record) + '\n')
+        out.flush()
+        if best is None or record['compressed'] < best['compressed']:
+            best = record
+    print(f"{len(datas)} alfabeto(s); menor resultado: {best['codec']} {best['params']} "
+          f"(taxa {best['ratio']})", file=sys.stderr)
+    return 0
+
+
+def run_perf_compare(args, out):
+    """Executa o comando 'perf-compare'; o código de saída é 1 se alguma medida piorou."""
+    snapshots = []
+    for path in (args.old, args.new):
+        try:
+            with open(path, encoding='utf-8') as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Não foi possível ler '{path}': {e}", file=sys.stderr)
+            return 2
+    corpora = [snapshot.get('corpus') for snapshot in snapshots]
+    if None not in corpora and corpora[0] != corpora[1]:
+        print("Aviso: as medições foram feitas sobre corpora diferentes.", file=sys.stderr)
+    regressions = 0
+    for name, before, after, ratio, worse in compare_snapshots(*snapshots, args.threshold, args.metric):
+        out.write(json.dumps({'name': name, 'old': before, 'new': after,
+                              'ratio': None if ratio is None else round(ratio, 3), 'regression': worse}) + '\n')
+        regressions += worse
+    print(f"{regressions} regressão(ões) em {args.metric}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+def read_or_report(path):
+    """Lê um alfabeto; em caso de erro, mostra o problema e retorna (None, None, None)."""
+    data, fmt, info, problems = read_font_file(path)
+    if data is None:
+        print(problems[0][1], file=sys.stderr)
+    return data, fmt, info
+
+
+def run_diff(args, out):
+    """Executa os comandos 'diff', 'merge' e 'diff-all', emitindo JSON por linha; retorna o código de saída.
+
+    Como no diff e no git merge, o código é 1 quando há diferenças ou conflitos.
+    """
+    if args.command == 'diff-all':
+        fonts = [(path, read_font_file(path)[0]) for _, path in scan_fonts(args.paths)]
+        fonts = [(path, data) for path, data in fonts if data is not None]
+        pairs = 0
+        for i, j, glyphs, pixels in pairwise_diffs(data for _, data in fonts):
+            if args.max_glyphs is None or glyphs <= args.max_glyphs:
+                out.write(json.dumps({'a': fonts[i][0], 'b': fonts[j][0], 'glyphs': glyphs, 'pixels': pixels},
+                                     ensure_ascii=False) + '\n')
+                pairs += 1
+        print(f"{len(fonts)} alfabeto(s), {pairs} par(es) listado(s)", file=sys.stderr)
+        return 0
+
+    if args.command == 'diff':
+        data_a, _, _ = read_or_report(args.a)
+        data_b, _, _ = read_or_report(args.b) if data_a is not None else (None, None, None)
+        if data_b is None:
+            return 2
+        changes = diff_fonts(data_a, data_b)
+        for code, before, after in changes:
+            record = {'code': code, 'a': glyph_hex(before), 'b': glyph_hex(after),
+                      'pixels': (before ^ after).bit_count()}
+            if args.pixels:
+                record['changes'] = pixel_changes(before, after)
+            out.write(json.dumps(record) + '\n')
+        return 1 if changes else 0
+
+    read = [read_or_report(path) for path in (args.base, args.ours, args.theirs)]
+    if any(data is None for data, _, _ in read):
+        return 2
+    _, fmt, info = read[1]  # A saída fica no formato da nossa cópia
+    merged, conflicts = merge_fonts(*(data for data, _, _ in read), resolve=args.resolve)
+    for code, base, ours, theirs in conflicts:
+        out.write(json.dumps({'conflict': code, 'base': glyph_hex(base), 'ours': glyph_hex(ours),
+                              'theirs': glyph_hex(theirs)}) + '\n')
+    merged = bytearray(merged)
+    try:
+        write_atomic(args.output, fmt.write(merged, info))
+    except OSError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    for _, message in fmt.write_problems(merged, info):
+        print(message, file=sys.stderr)
+    print(f"{len(conflicts)} conflito(s), resolvido(s) com '{args.resolve}'", file=sys.stderr)
+    return 1 if conflicts else 0
+
+
+def catalog_pattern(catalog, args):
+    """Glifo pedido por --hex ou --font/--code; retorna (padrão, código de saída em caso de erro)."""
+    if args.font is not None:
+        if args.code is None:
+            print("--font exige --code.", file=sys.stderr)
+            return None, 2
+        pattern = catalog.glyph_of(args.font, args.code)
+        if pattern is None:
+            print(f"Glifo {args.code} de '{args.font}' não está no catálogo.", file=sys.stderr)
+            return None, 1
+        return pattern, 0
+    try:
+        pattern = bytes.fromhex(args.hex)
+    except ValueError:
+        print(f"'{args.hex}' não é um glifo em hexadecimal válido.", file=sys.stderr)
+        return None, 2
+    if len(pattern) != 8:
+        print("O glifo deve ter exatamente 8 bytes.", file=sys.stderr)
+        return None, 2
+    return pattern, 0
+
+
+def run_catalog(args, out):
+    """Executa os comandos do catálogo, emitindo JSON por linha; retorna o código de saída."""
+    catalog = FontCatalog(args.db)
+    try:
+        if args.action == 'scan':
+            stats = catalog.scan(args.paths)
+            out.write(json.dumps(stats) + '\n')
+        elif args.action == 'dupes':
+            for group in catalog.duplicate_fonts():
+                out.write(json.dumps({'duplicates': group}, ensure_ascii=False) + '\n')
+        elif args.action == 'near-font':
+            data, _, _, problems = read_font_file(args.font)
+            if data is None:
+                print(problems[0][1], file=sys.stderr)
+                return 1
+            for distance, path in FontIndex(catalog.font_data()).rank(data, args.k):
+                out.write(json.dumps({'path': path, 'distance': distance}, ensure_ascii=False) + '\n')
+        elif args.action == 'near-dupes':
+            pairs = FontIndex(catalog.font_data()).near_duplicates(args.max_distance)
+            for group in group_pairs(pairs):
+                out.write(json.dumps({'near_duplicates': group}, ensure_ascii=False) + '\n')
+        else:
+            pattern, status = catalog_pattern(catalog, args)
+            if pattern is None:
+                return status
+            if args.action == 'near-glyph':
+                for distance, found, where in GlyphIndex(catalog.font_data()).nearest(pattern, args.k):
+                    out.write(json.dumps({'glyph': found.hex(), 'distance': distance,
+                                          'occurrences': [[path, code] for path, code in where]},
+                                         ensure_ascii=False) + '\n')
+            else:
+                code = None if args.any_code else args.code
+                for path, found in catalog.fonts_with_glyph(pattern, code):
+                    out.write(json.dumps({'path': path, 'code': found}, ensure_ascii=False) + '\n')
+    finally:
+        catalog.close()
+    return 0
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando; retorna o código de saída do processo."""
+    args = build_parser().parse_args(argv)
+    workers = max(1, args.jobs)
+
+    if args.command == 'catalog':
+        return run_catalog(args, sys.stdout)
+    if args.command == 'screen':
+        return run_screen(args)
+    if args.command in ('diff', 'merge', 'diff-all'):
+        return run_diff(args, sys.stdout)
+    if args.command in ('compress-bench', 'unpacker'):
+        return run_compress(args, sys.stdout)
+    if args.command == 'perf-compare':
+        return run_perf_compare(args, sys.stdout)
+
+    if args.command == 'validate':
+        jobs = (path for _, path in scan_fonts(args.paths))
+        counts = run_batch(check_file, jobs, workers, sys.stdout)
+    elif args.command == 'roundtrip':
+        jobs = (path for _, path in scan_fonts(args.paths))
+        counts = run_batch(roundtrip_file, jobs, workers, sys.stdout)
+    elif args.command == 'tiles':
+        jobs = ((path, os.path.join(args.output, os.path.splitext(os.path.relpath(path, root))[0]),
+                 args.invert, args.max_distance, args.first_code)
+                for root, path in scan_fonts(args.paths, SCREEN_EXTENSIONS))
+        counts = run_batch(tiles_file, jobs, workers, sys.stdout)
+    elif args.command == 'export':
+        names = list(dict.fromkeys(args.format))
+        # O nome de origem fica inteiro (ALFABET1.ALF.bdf): .ALF e .FNT de mesmo nome não colidem
+        jobs = ((path, os.path.join(args.output, os.path.relpath(path, root)), names)
+                for root, path in scan_fonts(args.paths))
+        counts = run_batch(export_file, jobs, workers, sys.stdout)
+    else:
+        jobs = ((path, os.path.join(args.output, os.path.relpath(path, root)), args.format)
+                for root, path in scan_fonts(args.paths))
+        counts = run_batch(normalize_file, jobs, workers, sys.stdout)
+
+    print(f"{sum(counts.values())} arquivo(s): {counts['ok']} ok, {counts['warning']} aviso(s), "
+          f"{counts['error']} erro(s)", file=sys.stderr)
+
+    if counts['error'] or (args.strict and counts['warning']):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
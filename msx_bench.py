@@ -0,0 +1,425 @@
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from msx_catalog import FontCatalog
+from msx_config import DEFAULT_FONT_PATH_KEY, ConfigStore
+from msx_font import MSXFont
+from msx_formats import CHAR_SIZE, numpy_module, read_font_file, scan_fonts, write_atomic
+from msx_perf import IMPORT_BUDGET_MS, STARTUP_BUDGET_MS, Histogram
+from msx_render import AtlasRaster
+from msx_similarity import FontIndex, GlyphIndex
+
+# --- Constantes ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_ROOTS = ('fonts', 'III')  # Corpus fixo: os alfabetos que acompanham o projeto
+DEFAULT_REPEAT = 7
+BENCH_TRANSFORMS = ('invert', 'mirror', 'flip', 'rotate', 'shift', 'bold', 'underline', 'slant')
+PARTIAL_CODE = 65  # Caractere alterado nas medições de gravação e desenho parciais
+XVFB_DISPLAY = ':97'
+XVFB_START_S = 2.0
+
+# Metas (ms, sobre o melhor tempo): a execução termina com código 1 se alguma for ultrapassada
+BUDGETS = {'startup.import': IMPORT_BUDGET_MS, 'gui.startup': STARTUP_BUDGET_MS}
+
+# Partida a frio do editor em um processo novo: abre a janela e encerra no primeiro momento ocioso
+STARTUP_SCRIPT = '''
+import sys
+import msx_font_editor
+msx_font_editor.CONFIG_DB = sys.argv[1]
+app = msx_font_editor.FontEditorApp(msx_font_editor.setup_config())
+app.after_idle(app.on_close)
+app.mainloop()
+'''
+
+
+class BenchSkipped(Exception):
+    """A medição não pode rodar neste ambiente (ex.: sem tela para a interface)."""
+
+
+# --- Registro de Medições ---
+# Cada medição recebe o contexto (corpus e pasta temporária), faz a preparação fora
+# do tempo medido e retorna (rodada, operações por rodada): a função `rodada` é
+# chamada uma vez para aquecer e `repeat` vezes medindo.
+
+BENCHMARKS = {}
+
+
+def register_benchmark(name, gui=False):
+    """Registra uma medição (decorador); as da interface só rodam com --gui."""
+    def decorate(func):
+        func.gui = gui
+        BENCHMARKS[name] = func
+        return func
+    return decorate
+
+
+class BenchContext:
+    """Corpus carregado, pasta temporária e, para as medições da interface, o editor (criado uma vez)."""
+
+    def __init__(self, corpus, workdir):
+        self.corpus = corpus  # Lista de (caminho relativo, caminho, 2048 bytes)
+        self.workdir = workdir
+        self.cleanups = []  # Chamadas ao final (ex.: fechar bancos abertos na preparação)
+        self._app = None
+
+    @property
+    def datas(self):
+        return [data for _, _, data in self.corpus]
+
+    def copy_corpus(self, name):
+        """Copia os arquivos do corpus para uma subpasta; retorna os novos caminhos."""
+        paths = []
+        for relpath, path, _ in self.corpus:
+            target = os.path.join(self.workdir, name, relpath)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(path, target)
+            paths.append(target)
+        return paths
+
+    def require_display(self):
+        if sys.platform.startswith('linux') and not os.environ.get('DISPLAY'):
+            raise BenchSkipped("sem DISPLAY e sem Xvfb (instale o Xvfb ou rode com xvfb-run)")
+
+    def config_db(self, name):
+        """Um banco de configuração novo, com a primeira fonte do corpus como fonte padrão."""
+        path = os.path.join(self.workdir, name)
+        config = ConfigStore(path)
+        config.set(DEFAULT_FONT_PATH_KEY, self.corpus[0][1])
+        config.close()
+        return path
+
+    def app(self):
+        """O editor aberto com a primeira fonte do corpus, com configuração em um banco temporário."""
+        if self._app is None:
+            self.require_display()
+            try:
+                import msx_font_editor
+            except ImportError as e:
+                raise BenchSkipped(f"interface indisponível: {e}") from None
+            msx_font_editor.CONFIG_DB = self.config_db('config.db')
+            try:
+                self._app = msx_font_editor.FontEditorApp(msx_font_editor.setup_config())
+            except Exception as e:  # TclError sem servidor X, entre outros
+                raise BenchSkipped(f"não foi possível abrir o editor: {e}") from None
+            self._app.update()
+        return self._app
+
+    def close(self):
+        for cleanup in self.cleanups:
+            cleanup()
+        if self._app is not None:
+            self._app.on_close()
+            self._app = None
+
+
+# --- Medições sem Interface ---
+
+@register_benchmark('load')
+def bench_load(ctx):
+    paths = [path for _, path, _ in ctx.corpus]
+    return lambda: [MSXFont(path) for path in paths], len(paths)
+
+
+@register_benchmark('save.full')
+def bench_save_full(ctx):
+    paths = ctx.copy_corpus('save_full')
+    datas = ctx.datas
+
+    def run():
+        # Fontes novas não conhecem o estado do disco: o arquivo inteiro é regravado
+        for path, data in zip(paths, datas):
+            MSXFont(path, data).save()
+    return run, len(paths)
+
+
+@register_benchmark('save.partial')
+def bench_save_partial(ctx):
+    fonts = [MSXFont(path) for path in ctx.copy_corpus('save_partial')]
+
+    def run():
+        for font in fonts:
+            pattern = font.get_char_pattern(PARTIAL_CODE)
+            font.update_char_pattern(PARTIAL_CODE, bytes(byte ^ 0xFF for byte in pattern))
+            font.save()
+    return run, len(fonts)
+
+
+@register_benchmark('render.full')
+def bench_render_full(ctx):
+    raster, datas = AtlasRaster(), ctx.datas
+    return lambda: [raster.render(data, force=True) for data in datas], len(datas)
+
+
+@register_benchmark('render.partial')
+def bench_render_partial(ctx):
+    rasters = [(AtlasRaster(), bytearray(data)) for data in ctx.datas]
+    for raster, data in rasters:
+        raster.render(data)
+
+    def run():
+        for raster, data in rasters:
+            data[PARTIAL_CODE * CHAR_SIZE] ^= 0xFF
+            raster.render(data)
+    return run, len(rasters)
+
+
+@register_benchmark('transform')
+def bench_transform(ctx):
+    corpus = ctx.corpus
+
+    def run():
+        for _, path, data in corpus:
+            font = MSXFont(path, data)
+            for operation in BENCH_TRANSFORMS:
+                font.transform(operation)
+    return run, len(corpus) * len(BENCH_TRANSFORMS)
+
+
+@register_benchmark('similarity.fonts')
+def bench_similarity_fonts(ctx):
+    index = FontIndex([(relpath, data) for relpath, _, data in ctx.corpus])
+    datas = ctx.datas
+    return lambda: [index.rank(data) for data in datas], len(datas)
+
+
+@register_benchmark('similarity.glyphs')
+def bench_similarity_glyphs(ctx):
+    index = GlyphIndex([(relpath, data) for relpath, _, data in ctx.corpus])
+    first = ctx.corpus[0][2]
+    patterns = [first[code * CHAR_SIZE:(code + 1) * CHAR_SIZE] for code in range(len(first) // CHAR_SIZE)]
+    return lambda: [index.nearest(pattern) for pattern in patterns], len(patterns)
+
+
+@register_benchmark('catalog.scan')
+def bench_catalog_scan(ctx):
+    paths = ctx.copy_corpus('catalog')
+    db_path = os.path.join(ctx.workdir, 'catalog_scan.db')
+
+    def run():
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        catalog = FontCatalog(db_path)
+        catalog.scan(paths)
+        catalog.close()
+    return run, len(paths)
+
+
+@register_benchmark('catalog.rescan')
+def bench_catalog_rescan(ctx):
+    paths = ctx.copy_corpus('catalog')
+    catalog = FontCatalog(os.path.join(ctx.workdir, 'catalog_rescan.db'))
+    catalog.scan(paths)
+    ctx.cleanups.append(catalog.close)
+    # Nada mudou: cada nova varredura só compara mtime e tamanho
+    return lambda: catalog.scan(), len(paths)
+
+
+@register_benchmark('startup.import')
+def bench_startup_import(ctx):
+    command = [sys.executable, '-c', 'import msx_font_editor']
+    if subprocess.run(command, cwd=BASE_DIR, capture_output=True).returncode:
+        raise BenchSkipped("não foi possível importar o editor (CustomTkinter instalado?)")
+    return lambda: subprocess.run(command, cwd=BASE_DIR, check=True), 1
+
+
+# --- Medições da Interface (Xvfb) ---
+
+@register_benchmark('gui.startup', gui=True)
+def bench_gui_startup(ctx):
+    ctx.require_display()
+    config_db = ctx.config_db('startup.db')
+    command = [sys.executable, '-c', STARTUP_SCRIPT, config_db]
+    result = subprocess.run(command, cwd=BASE_DIR, capture_output=True, text=True)
+    if result.returncode:
+        raise BenchSkipped(f"o editor não abriu: {(result.stderr.strip().splitlines() or [''])[-1]}")
+    return lambda: subprocess.run(command, cwd=BASE_DIR, check=True), 1
+
+
+@register_benchmark('gui.draw_font.full', gui=True)
+def bench_gui_draw_full(ctx):
+    app = ctx.app()
+
+    def run():
+        app.draw_font(force=True)
+        app.update_idletasks()
+    return run, 1
+
+
+@register_benchmark('gui.draw_font.partial', gui=True)
+def bench_gui_draw_partial(ctx):
+    app = ctx.app()
+
+    def run():
+        pattern = app.font.get_char_pattern(PARTIAL_CODE)
+        app.font.update_char_pattern(PARTIAL_CODE, bytes(byte ^ 0xFF for byte in pattern))
+        app.draw_font()
+        app.update_idletasks()
+    return run, 1
+
+
+@register_benchmark('gui.move_cursor', gui=True)
+def bench_gui_move_cursor(ctx):
+    app = ctx.app()
+
+    def run():
+        for _ in range(16):
+            app.move_cursor(1, 0)
+        app.update_idletasks()
+    return run, 16
+
+
+# --- Execução ---
+
+def load_corpus(roots=CORPUS_ROOTS, base_dir=BASE_DIR):
+    """Os alfabetos válidos das pastas do corpus, em ordem estável: lista de (relativo, caminho, dados)."""
+    corpus = []
+    for _, path in scan_fonts([os.path.join(base_dir, root) for root in roots]):
+        data, _, _, problems = read_font_file(path)
+        if data is not None and not any(level == 'error' for level, _ in problems):
+            corpus.append((os.path.relpath(path, base_dir).replace(os.sep, '/'), path, bytes(data)))
+    return corpus
+
+
+def corpus_fingerprint(corpus):
+    """Resumo do corpus: execuções só são comparáveis se o sha1 for o mesmo."""
+    digest = hashlib.sha1()
+    for relpath, _, data in corpus:
+        digest.update(relpath.encode('utf-8') + b'\0' + data)
+    return {'files': len(corpus), 'sha1': digest.hexdigest()}
+
+
+def git_revision(base_dir=BASE_DIR):
+    """(commit, há alterações não gravadas) do repositório, ou (None, None) fora do git."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=base_dir, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=base_dir,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+
+def start_xvfb():
+    """Inicia um Xvfb para as medições da interface, se não houver tela; retorna o processo ou None."""
+    if os.environ.get('DISPLAY') or not shutil.which('Xvfb'):
+        return None
+    process = subprocess.Popen(['Xvfb', XVFB_DISPLAY, '-screen', '0', '1280x1024x24', '-nolisten', 'tcp'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + XVFB_START_S
+    socket = f"/tmp/.X11-unix/X{XVFB_DISPLAY[1:]}"
+    while time.monotonic() < deadline and process.poll() is None and not os.path.exists(socket):
+        time.sleep(0.05)
+    if process.poll() is not None:
+        return None
+    os.environ['DISPLAY'] = XVFB_DISPLAY
+    return process
+
+
+def run_benchmarks(names, corpus, repeat=DEFAULT_REPEAT, log=None):
+    """Executa as medições `names` sobre o corpus.
+
+    Retorna (histogramas por nome, motivos das medições puladas). Cada rodada é uma
+    amostra do histograma; `ops` é o número de operações (fontes, glifos...) por rodada.
+    """
+    results, skipped = {}, {}
+    with tempfile.TemporaryDirectory(prefix='msx_bench_') as workdir:
+        ctx = BenchContext(corpus, workdir)
+        try:
+            for name in names:
+                try:
+                    run, ops = BENCHMARKS[name](ctx)
+                except BenchSkipped as e:
+                    skipped[name] = str(e)
+                    if log:
+                        print(f"{name}: pulada ({e})", file=log)
+                    continue
+                run()  # Aquecimento (caches do sistema de arquivos, importações tardias)
+                histogram = Histogram()
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    run()
+                    histogram.add(time.perf_counter() - start)
+                results[name] = dict(histogram.as_dict(), ops=ops)
+                if log:
+                    print(f"{name}: {results[name]['min_ms']:.3f} ms (mín.), {results[name]['mean_ms']:.3f} ms "
+                          f"(média) para {ops} operação(ões)", file=log)
+        finally:
+            ctx.close()
+    return results, skipped
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Medições de desempenho reproduzíveis do editor de alfabetos MSX")
+    parser.add_argument('-o', '--output',
+                        help="grava o resultado em JSON (comparável com 'msx_batch.py perf-compare')")
+    parser.add_argument('-k', '--select', action='append', default=[],
+                        help="só as medições cujo nome contém o texto (pode repetir)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f"rodadas medidas de cada medição (padrão: {DEFAULT_REPEAT})")
+    parser.add_argument('--gui', action='store_true',
+                        help="inclui as medições da interface (inicia o Xvfb se não houver DISPLAY)")
+    parser.add_argument('--list', action='store_true', help="lista as medições e sai")
+    return parser
+
+
+def main(argv=None):
+    """Ponto de entrada da linha de comando; retorna o código de saída do processo."""
+    args = build_parser().parse_args(argv)
+    names = [name for name, func in BENCHMARKS.items()
+             if (args.gui or not func.gui) and (not args.select or any(text in name for text in args.select))]
+    if args.list:
+        for name in names:
+            print(name)
+        return 0
+
+    corpus = load_corpus()
+    if not corpus:
+        print("Nenhum alfabeto encontrado no corpus.", file=sys.stderr)
+        return 2
+    xvfb = start_xvfb() if args.gui else None
+    try:
+        results, skipped = run_benchmarks(names, corpus, max(1, args.repeat), sys.stderr)
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+            xvfb.wait()
+
+    commit, dirty = git_revision()
+    report = {'suite': 'msx_bench',
+              'captured': time.time(),
+              'commit': commit,
+              'dirty': dirty,
+              'python': platform.python_version(),
+              'platform': platform.platform(),
+              'numpy': None if numpy_module() is None else numpy_module().__version__,
+              'corpus': corpus_fingerprint(corpus),
+              'repeat': args.repeat,
+              'histograms': results,
+              'skipped': skipped,
+              'budgets': {name: {'budget_ms': budget, 'min_ms': results[name]['min_ms'],
+                                 'ok': results[name]['min_ms'] <= budget}
+                          for name, budget in BUDGETS.items() if name in results}}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        write_atomic(args.output, text.encode('utf-8'))
+    else:
+        print(text)
+
+    over = [name for name, budget in report['budgets'].items() if not budget['ok']]
+    for name in over:
+        print(f"{name}: {report['budgets'][name]['min_ms']:.1f} ms, acima da meta de "
+              f"{report['budgets'][name]['budget_ms']} ms", file=sys.stderr)
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import sqlite3
+import struct
+
+from msx_formats import NUM_CHARS, DATA_SIZE, read_font_file, scan_fonts
+
+# --- Constantes ---
+CATALOG_DB = 'msx_font_editor.db'  # O mesmo banco da configuração do editor
+
+# Cada glifo 8x8 cabe exatamente em 64 bits: o "hash" do glifo é o próprio padrão,
+# como inteiro com sinal (o tipo INTEGER do SQLite), sem colisões
+GLYPHS_STRUCT = struct.Struct(f'>{NUM_CHARS}q')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS catalogo_raizes
+(
+    caminho TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS catalogo_fontes
+(
+    id         INTEGER PRIMARY KEY,
+    caminho    TEXT    NOT NULL UNIQUE,
+    mtime_ns   INTEGER NOT NULL,
+    tamanho    INTEGER NOT NULL,
+    formato    TEXT,
+    hash_fonte INTEGER,
+    problemas  TEXT,
+    dados      BLOB
+);
+CREATE TABLE IF NOT EXISTS catalogo_glifos
+(
+    fonte_id INTEGER NOT NULL REFERENCES catalogo_fontes (id) ON DELETE CASCADE,
+    codigo   INTEGER NOT NULL,
+    hash     INTEGER NOT NULL,
+    PRIMARY KEY (fonte_id, codigo)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_catalogo_glifos_hash ON catalogo_glifos (hash, codigo);
+CREATE INDEX IF NOT EXISTS idx_catalogo_fontes_hash ON catalogo_fontes (hash_fonte);
+'''
+
+
+# --- Hashes ---
+
+def glyph_hash(pattern):
+    """Valor de 64 bits (com sinal) de um glifo de 8 bytes, como gravado no catálogo."""
+    return struct.unpack('>q', bytes(pattern))[0]
+
+
+def font_hash(data):
+    """Hash de 64 bits (com sinal) dos 2048 bytes de uma fonte."""
+    return int.from_bytes(hashlib.blake2b(bytes(data), digest_size=8).digest(), 'big', signed=True)
+
+
+# --- Catálogo ---
+
+class FontCatalog:
+    """Catálogo SQLite dos alfabetos encontrados em pastas raiz, com índice por glifo."""
+
+    def __init__(self, db_path=CATALOG_DB):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.executescript(SCHEMA)
+        # Catálogos criados antes da coluna com os 2048 bytes de cada fonte
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(catalogo_fontes)')}
+        if 'dados' not in columns:
+            with self.conn:
+                self.conn.execute('ALTER TABLE catalogo_fontes ADD COLUMN dados BLOB')
+                self.conn.execute('UPDATE catalogo_fontes SET mtime_ns = -1')  # Força a releitura
+
+    def close(self):
+        self.conn.close()
+
+    def roots(self):
+        """Pastas raiz registradas."""
+        return [row[0] for row in self.conn.execute('SELECT caminho FROM catalogo_raizes ORDER BY caminho')]
+
+    def scan(self, roots=None):
+        """Sincroniza o catálogo com as pastas raiz (as registradas, se nenhuma for informada).
+
+        Só os arquivos cujo mtime ou tamanho mudou são lidos novamente; os que sumiram
+        são removidos. Tudo é feito em uma única transação. Retorna as contagens.
+        """
+        roots = [os.path.abspath(root) for root in roots] if roots else self.roots()
+        stats = {'scanned': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+
+        with self.conn:
+            self.conn.executemany('INSERT OR IGNORE INTO catalogo_raizes (caminho) VALUES (?)',
+                                  [(root,) for root in roots])
+            known = {}
+            for root in roots:
+                prefix = os.path.join(root, '')
+                for font_id, path, mtime_ns, size in self.conn.execute(
+                        'SELECT id, caminho, mtime_ns, tamanho FROM catalogo_fontes '
+                        'WHERE caminho = ? OR substr(caminho, 1, ?) = ?', (root, len(prefix), prefix)):
+                    known[path] = (font_id, mtime_ns, size)
+
+            seen = set()
+            for _, path in scan_fonts(roots):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                seen.add(path)
+                stats['scanned'] += 1
+
+                entry = known.get(path)
+                if entry is not None and entry[1:] == (st.st_mtime_ns, st.st_size):
+                    stats['unchanged'] += 1
+                    continue
+                self._index_file(path, st, entry[0] if entry else None)
+                stats['updated'] += 1
+
+            gone = [(entry[0],) for path, entry in known.items() if path not in seen]
+            self.conn.executemany('DELETE FROM catalogo_fontes WHERE id = ?', gone)
+            stats['removed'] = len(gone)
+        return stats
+
+    def _index_file(self, path, st, font_id):
+        """Lê um arquivo e grava (ou substitui) sua linha e os 256 hashes de glifo."""
+        data, fmt, _, problems = read_font_file(path)
+        row = (path, st.st_mtime_ns, st.st_size, fmt.name if fmt else None,
+               font_hash(data) if data is not None else None,
+               '\n'.join(message for _, message in problems) or None,
+               bytes(data) if data is not None else None)
+
+        if font_id is None:
+            font_id = self.conn.execute(
+                'INSERT INTO catalogo_fontes (caminho, mtime_ns, tamanho, formato, hash_fonte, problemas, dados) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', row).lastrowid
+        else:
+            self.conn.execute('UPDATE catalogo_fontes SET caminho = ?, mtime_ns = ?, tamanho = ?, formato = ?, '
+                              'hash_fonte = ?, problemas = ?, dados = ? WHERE id = ?', row + (font_id,))
+            self.conn.execute('DELETE FROM catalogo_glifos WHERE fonte_id = ?', (font_id,))
+
+        if data is not None and len(data) == DATA_SIZE:
+            self.conn.executemany('INSERT INTO catalogo_glifos (fonte_id, codigo, hash) VALUES (?, ?, ?)',
+                                  [(font_id, code, value) for code, value in enumerate(GLYPHS_STRUCT.unpack(data))])
+
+    # --- Consultas (respondidas pelos índices, sem reler os arquivos) ---
+
+    def fonts_with_glyph(self, pattern, code=None):
+        """Fontes que contêm o desenho de glifo indicado (em qualquer código, ou só em `code`).
+
+        Retorna uma lista de (caminho, código).
+        """
+        value = glyph_hash(pattern)
+        if code is None:
+            rows = self.conn.execute(
+                'SELECT f.caminho, g.codigo FROM catalogo_glifos g JOIN catalogo_fontes f ON f.id = g.fonte_id '
+                'WHERE g.hash = ? ORDER BY f.caminho, g.codigo', (value,))
+        else:
+            rows = self.conn.execute(
+                'SELECT f.caminho, g.codigo FROM catalogo_glifos g JOIN catalogo_fontes f ON f.id = g.fonte_id '
+                'WHERE g.hash = ? AND g.codigo = ? ORDER BY f.caminho', (value, code))
+        return rows.fetchall()
+
+    def glyph_of(self, path, code):
+        """Padrão de 8 bytes do caractere `code` de uma fonte catalogada, ou None."""
+        row = self.conn.execute(
+            'SELECT g.hash FROM catalogo_glifos g JOIN catalogo_fontes f ON f.id = g.fonte_id '
+            'WHERE f.caminho = ? AND g.codigo = ?', (os.path.abspath(path), code)).fetchone()
+        return None if row is None else struct.pack('>q', row[0])
+
+    def fonts_sharing_glyph(self, path, code, same_code=True):
+        """Outras fontes que têm o mesmo desenho do caractere `code` da fonte indicada."""
+        pattern = self.glyph_of(path, code)
+        if pattern is None:
+            return []
+        path = os.path.abspath(path)
+        return [row for row in self.fonts_with_glyph(pattern, code if same_code else None) if row[0] != path]
+
+    def font_data(self):
+        """Lista (caminho, 2048 bytes) de todas as fontes catalogadas que puderam ser lidas."""
+        return self.conn.execute('SELECT caminho, dados FROM catalogo_fontes WHERE dados IS NOT NULL '
+                                 'ORDER BY caminho').fetchall()
+
+    def duplicate_fonts(self):
+        """Grupos de arquivos com exatamente os mesmos 2048 bytes de padrões."""
+        groups = {}
+        for value, path in self.conn.execute(
+                'SELECT hash_fonte, caminho FROM catalogo_fontes WHERE hash_fonte IN '
+                '(SELECT hash_fonte FROM catalogo_fontes WHERE hash_fonte IS NOT NULL '
+                'GROUP BY hash_fonte HAVING count(*) > 1) ORDER BY hash_fonte, caminho'):
+            groups.setdefault(value, []).append(path)
+        return list(groups.values())
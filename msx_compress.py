@@ -0,0 +1,308 @@
+import time
+
+# --- Formatos Comprimidos ---
+# Os dois formatos são sequências de blocos com um byte de controle, pensados para um
+# descompressor Z80 de poucas dezenas de bytes (LDIR para literais e cópias):
+#
+#   RLE: 0 = fim; 1-127 = n bytes literais a seguir; 128-255 = o próximo byte repetido
+#        (n - 126) vezes (2 a 129).
+#   LZ:  0 = fim; 1-127 = n bytes literais a seguir; 128-255 = cópia de (n - 125) bytes
+#        (3 a 130) a partir de d + 1 bytes atrás (1 a 256), com d no byte seguinte.
+#
+# A janela de 256 bytes cobre 32 caracteres: maiúsculas e minúsculas parecidas, dígitos
+# e sinais vizinhos se repetem dentro dela.
+
+END = 0x00
+MAX_LITERALS = 0x7F
+RLE_MIN_RUN = 3        # Repetições menores ficam mais baratas como literais
+RLE_MAX_RUN = 0xFF - 126
+LZ_MIN_MATCH = 3
+LZ_MAX_MATCH = 0xFF - 125
+LZ_WINDOW = 256
+
+LZ_MAX_CHAIN = 64      # Candidatos examinados por posição na cadeia de hash (padrão)
+BENCH_CHAINS = (1, 4, 16, 64, 256)
+
+
+class CompressionError(ValueError):
+    """Fluxo comprimido inválido (truncado, cópia antes do início ou tamanho errado)."""
+
+
+def _literals(out, data, start, end):
+    """Acrescenta data[start:end] como blocos de até 127 literais."""
+    while start < end:
+        count = min(MAX_LITERALS, end - start)
+        out.append(count)
+        out += data[start:start + count]
+        start += count
+
+
+# --- RLE ---
+
+def rle_encode(data):
+    """Comprime com RLE; sequências de 3 ou mais bytes iguais viram um bloco de 2 bytes."""
+    data = bytes(data)
+    out = bytearray()
+    size = len(data)
+    literal_start = i = 0
+    while i < size:
+        value = data[i]
+        run = 1
+        while i + run < size and run < RLE_MAX_RUN and data[i + run] == value:
+            run += 1
+        if run >= RLE_MIN_RUN:
+            _literals(out, data, literal_start, i)
+            out += bytes((run + 126, value))
+            i += run
+            literal_start = i
+        else:
+            i += run
+    _literals(out, data, literal_start, size)
+    out.append(END)
+    return bytes(out)
+
+
+def rle_decode(stream):
+    """Descomprime um fluxo RLE; retorna (dados, bytes consumidos do fluxo)."""
+    out = bytearray()
+    pos = 0
+    try:
+        while True:
+            control = stream[pos]
+            pos += 1
+            if control == END:
+                return bytes(out), pos
+            if control <= MAX_LITERALS:
+                if pos + control > len(stream):
+                    raise CompressionError("Bloco de literais truncado.")
+                out += stream[pos:pos + control]
+                pos += control
+            else:
+                out += bytes((stream[pos],)) * (control - 126)
+                pos += 1
+    except IndexError:
+        raise CompressionError("Fluxo RLE sem marca de fim.") from None
+
+
+# --- LZ (cadeia de hash) ---
+
+class HashChain:
+    """Localizador de repetições por cadeia de hash dos 3 bytes seguintes.
+
+    `head` guarda a última posição de cada trinca e `prev` encadeia as anteriores com
+    a mesma trinca, então cada busca só visita posições que começam igual, da mais
+    próxima para a mais distante, até `max_chain` candidatos ou o fim da janela.
+    """
+
+    def __init__(self, data, max_chain=LZ_MAX_CHAIN):
+        self.data = data
+        self.max_chain = max_chain
+        self.head = {}
+        self.prev = [-1] * len(data)
+        self.inserted = 0  # Posições já indexadas (todas as anteriores a esta)
+
+    def _key(self, i):
+        data = self.data
+        return (data[i] << 16) | (data[i + 1] << 8) | data[i + 2]
+
+    def insert_until(self, end):
+        """Indexa as posições até `end` (exclusive)."""
+        last = min(end, len(self.data) - LZ_MIN_MATCH + 1)
+        for i in range(self.inserted, last):
+            key = self._key(i)
+            self.prev[i] = self.head.get(key, -1)
+            self.head[key] = i
+        self.inserted = max(self.inserted, last)
+
+    def longest(self, i):
+        """A repetição mais longa que começa em `i`: (comprimento, distância), ou (0, 0)."""
+        data = self.data
+        limit = min(LZ_MAX_MATCH, len(data) - i)
+        if limit < LZ_MIN_MATCH:
+            return 0, 0
+        self.insert_until(i)
+        best_length = best_distance = 0
+        candidate = self.head.get(self._key(i), -1)
+        chain = self.max_chain
+        while candidate >= 0 and i - candidate <= LZ_WINDOW and chain:
+            if data[candidate + best_length] == data[i + best_length]:
+                length = 0
+                while length < limit and data[candidate + length] == data[i + length]:
+                    length += 1
+                if length > best_length:
+                    best_length, best_distance = length, i - candidate
+                    if length == limit:
+                        break
+            candidate = self.prev[candidate]
+            chain -= 1
+        if best_length < LZ_MIN_MATCH:
+            return 0, 0
+        return best_length, best_distance
+
+
+def lz_encode(data, max_chain=LZ_MAX_CHAIN, lazy=True):
+    """Comprime com LZ (janela de 256 bytes).
+
+    `max_chain` limita os candidatos examinados por posição; com `lazy`, uma
+    repetição é adiada um byte quando a da posição seguinte é mais longa.
+    """
+    data = bytes(data)
+    chain = HashChain(data, max_chain)
+    out = bytearray()
+    size = len(data)
+    literal_start = i = 0
+    pending = None  # Repetição já procurada para a posição i
+    while i < size:
+        length, distance = pending or chain.longest(i)
+        pending = None
+        if length and lazy and i + 1 < size:
+            following = chain.longest(i + 1)
+            if following[0] > length:
+                pending = following
+                i += 1
+                continue
+        if length:
+            _literals(out, data, literal_start, i)
+            out += bytes((length + 125, distance - 1))
+            i += length
+            literal_start = i
+        else:
+            i += 1
+    _literals(out, data, literal_start, size)
+    out.append(END)
+    return bytes(out)
+
+
+def lz_decode(stream):
+    """Descomprime um fluxo LZ; retorna (dados, bytes consumidos do fluxo)."""
+    out = bytearray()
+    pos = 0
+    try:
+        while True:
+            control = stream[pos]
+            pos += 1
+            if control == END:
+                return bytes(out), pos
+            if control <= MAX_LITERALS:
+                if pos + control > len(stream):
+                    raise CompressionError("Bloco de literais truncado.")
+                out += stream[pos:pos + control]
+                pos += control
+                continue
+            length, distance = control - 125, stream[pos] + 1
+            pos += 1
+            start = len(out) - distance
+            if start < 0:
+                raise CompressionError("Cópia antes do início dos dados.")
+            if distance >= length:
+                out += out[start:start + length]
+            else:
+                # Cópia sobreposta (como o LDIR do Z80): repete o trecho já escrito
+                for k in range(length):
+                    out.append(out[start + k])
+    except IndexError:
+        raise CompressionError("Fluxo LZ sem marca de fim.") from None
+
+
+# --- Descompressores Z80 ---
+# Entrada: HL = dados comprimidos, DE = destino (ex.: &H9200). Altera AF, BC, DE, HL.
+
+RLE_Z80_SOURCE = """\
+; Descompressor RLE (msx_compress.py) - HL = origem, DE = destino
+rle_unpack:
+        LD      A,(HL)
+        INC     HL
+        OR      A
+        RET     Z               ; 0 = fim
+        JP      M,rle_run       ; 128-255 = repeticao
+        LD      C,A             ; 1-127 = literais
+        LD      B,0
+        LDIR
+        JR      rle_unpack
+rle_run:
+        SUB     126             ; A = quantidade (2 a 129)
+        LD      B,A
+        LD      A,(HL)
+        INC     HL
+rle_fill:
+        LD      (DE),A
+        INC     DE
+        DJNZ    rle_fill
+        JR      rle_unpack
+"""
+
+LZ_Z80_SOURCE = """\
+; Descompressor LZ (msx_compress.py) - HL = origem, DE = destino
+lz_unpack:
+        LD      A,(HL)
+        INC     HL
+        OR      A
+        RET     Z               ; 0 = fim
+        JP      M,lz_match      ; 128-255 = copia
+        LD      C,A             ; 1-127 = literais
+        LD      B,0
+        LDIR
+        JR      lz_unpack
+lz_match:
+        SUB     125             ; BC = comprimento (3 a 130)
+        LD      C,A
+        LD      B,0
+        LD      A,(HL)          ; d: a copia comeca d + 1 bytes atras
+        INC     HL
+        PUSH    HL
+        CPL                     ; A = -(d + 1) no byte baixo
+        ADD     A,E
+        LD      L,A
+        LD      A,D
+        ADC     A,0FFH          ; byte alto de -(d + 1)
+        LD      H,A
+        LDIR                    ; Sobreposta, repete o trecho recem-escrito
+        POP     HL
+        JR      lz_unpack
+"""
+
+
+# --- Codecs e Medição ---
+
+CODECS = {
+    'rle': (rle_encode, rle_decode, RLE_Z80_SOURCE),
+    'lz': (lz_encode, lz_decode, LZ_Z80_SOURCE),
+}
+
+
+def benchmark(datas, name, repeat=3, **params):
+    """Mede um codec sobre uma lista de fontes (2048 bytes cada).
+
+    Retorna um dicionário com a taxa de compressão (comprimido / original) e as vazões
+    de compressão e descompressão em KB/s (a melhor de `repeat` execuções).
+    """
+    encode, decode, _ = CODECS[name]
+    datas = [bytes(data) for data in datas]
+    original = sum(len(data) for data in datas)
+
+    encode_time = decode_time = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        packed = [encode(data, **params) for data in datas]
+        encode_time = min(encode_time, time.perf_counter() - start)
+        start = time.perf_counter()
+        for stream in packed:
+            decode(stream)
+        decode_time = min(decode_time, time.perf_counter() - start)
+
+    for data, stream in zip(datas, packed):
+        if decode(stream)[0] != data:
+            raise CompressionError(f"O codec '{name}' não reproduziu os dados originais.")
+    compressed = sum(len(stream) for stream in packed)
+    return {'codec': name, 'params': params, 'files': len(datas), 'original': original,
+            'compressed': compressed, 'ratio': round(compressed / original, 4) if original else None,
+            'encode_kbps': round(original / 1024 / encode_time, 1) if encode_time else None,
+            'decode_kbps': round(original / 1024 / decode_time, 1) if decode_time else None}
+
+
+def parameter_sweep(datas, repeat=3):
+    """Mede o RLE e o LZ com cada combinação de profundidade da cadeia e busca adiada."""
+    yield benchmark(datas, 'rle', repeat)
+    for max_chain in BENCH_CHAINS:
+        for lazy in (False, True):
+            yield benchmark(datas, 'lz', repeat, max_chain=max_chain, lazy=lazy)
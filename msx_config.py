@@ -0,0 +1,46 @@
+import sqlite3
+
+# --- Constantes ---
+CONFIG_DB = 'msx_font_editor.db'
+DEFAULT_FONT_PATH_KEY = 'fonte_padrao_caminho'
+AUTOSAVE_KEY = 'salvar_automaticamente'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS configuracao
+(
+    opcao TEXT PRIMARY KEY,
+    valor TEXT
+);
+'''
+
+
+# --- Configuração Persistente ---
+
+class ConfigStore:
+    """A tabela configuracao em uma única conexão, aberta durante toda a sessão.
+
+    O banco fica em modo WAL: o diário de edições e o catálogo gravam nele por outras
+    conexões (e threads) sem bloquear as leituras. Os valores são lidos uma vez para
+    um dicionário; get() não consulta o disco, e set() só grava quando o valor muda.
+    """
+
+    def __init__(self, db_path=CONFIG_DB):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.execute('PRAGMA synchronous = NORMAL')  # Em WAL, seguro contra falhas do programa
+        self.conn.executescript(SCHEMA)
+        self.values = dict(self.conn.execute('SELECT opcao, valor FROM configuracao'))
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        """Salva ou atualiza um valor (sem acesso ao disco se não mudou)."""
+        if self.values.get(key) == value:
+            return
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO configuracao (opcao, valor) VALUES (?, ?)', (key, value))
+        self.values[key] = value
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,131 @@
+import struct
+
+from msx_formats import CHAR_SIZE, NUM_CHARS, numpy_module
+import msx_similarity
+
+# --- Comparação de Fontes ---
+# Como nos outros módulos, cada glifo é um inteiro de 64 bits (linha 0 no byte mais
+# significativo, coluna 0 no bit 7 de cada byte): o XOR entre duas fontes mostra, de
+# uma vez, quais caracteres e quais pixels mudaram.
+
+GLYPHS_STRUCT = struct.Struct(f'>{NUM_CHARS}Q')
+MERGE_RESOLUTIONS = ('ours', 'theirs', 'pixels')
+
+
+def _glyphs(font):
+    """Os 256 glifos de uma fonte (MSXFont ou 2048 bytes), como array uint64 ou tupla de ints."""
+    data = bytes(getattr(font, 'data', font))
+    np = numpy_module()
+    if np is not None:
+        return np.frombuffer(data, dtype='>u8').astype(np.uint64)
+    return GLYPHS_STRUCT.unpack(data)
+
+
+def diff_fonts(a, b):
+    """Caracteres diferentes entre duas fontes (MSXFont ou 2048 bytes).
+
+    Retorna uma lista de (código, glifo em a, glifo em b), com os glifos como ints de 64 bits.
+    """
+    glyphs_a, glyphs_b = _glyphs(a), _glyphs(b)
+    np = numpy_module()
+    if np is not None:
+        codes = np.flatnonzero(glyphs_a != glyphs_b)
+        return list(zip(codes.tolist(), glyphs_a[codes].tolist(), glyphs_b[codes].tolist()))
+    return [(code, ga, gb) for code, (ga, gb) in enumerate(zip(glyphs_a, glyphs_b)) if ga != gb]
+
+
+def pixel_changes(before, after):
+    """Pixels que mudaram entre dois glifos (ints de 64 bits): lista de (linha, coluna, novo valor)."""
+    changes = []
+    mask = before ^ after
+    while mask:
+        bit = mask.bit_length() - 1
+        position = 63 - bit
+        changes.append((position // 8, position % 8, (after >> bit) & 1))
+        mask ^= 1 << bit
+    changes.sort()
+    return changes
+
+
+# --- Mesclagem de Três Vias ---
+
+def merge_fonts(base, ours, theirs, resolve='ours'):
+    """Mescla duas cópias editadas (ours, theirs) de uma mesma fonte de origem (base).
+
+    Um caractere alterado de um lado só fica com essa alteração; alterado dos dois
+    lados com resultados diferentes é um conflito, resolvido por `resolve`: 'ours',
+    'theirs' ou 'pixels' (aplica as mudanças de pixels dos dois lados; onde os dois
+    mudaram o mesmo pixel, o resultado é o mesmo). Retorna (2048 bytes mesclados,
+    lista de (código, glifo base, nosso, deles) dos conflitos).
+    """
+    if resolve not in MERGE_RESOLUTIONS:
+        raise ValueError(f"Resolução desconhecida: {resolve}")
+    glyphs_base, glyphs_ours, glyphs_theirs = _glyphs(base), _glyphs(ours), _glyphs(theirs)
+    np = numpy_module()
+
+    if np is not None:
+        ours_delta = glyphs_ours ^ glyphs_base
+        theirs_delta = glyphs_theirs ^ glyphs_base
+        # Sem conflito, aplicar os dois deltas dá o lado que mudou (ou o resultado comum)
+        merged = glyphs_base ^ ours_delta ^ theirs_delta
+        same = glyphs_ours == glyphs_theirs
+        merged[same] = glyphs_ours[same]
+        conflict = (ours_delta != 0) & (theirs_delta != 0) & ~same
+        if resolve == 'pixels':
+            # Com 1 bit por pixel, quem mudou um pixel o levou ao mesmo valor: basta a união dos deltas
+            merged[conflict] = (glyphs_base ^ (ours_delta | theirs_delta))[conflict]
+        else:
+            source = glyphs_ours if resolve == 'ours' else glyphs_theirs
+            merged[conflict] = source[conflict]
+        codes = np.flatnonzero(conflict)
+        conflicts = list(zip(codes.tolist(), glyphs_base[codes].tolist(), glyphs_ours[codes].tolist(),
+                             glyphs_theirs[codes].tolist()))
+        return merged.astype('>u8').tobytes(), conflicts
+
+    merged, conflicts = [], []
+    for code, (b, o, t) in enumerate(zip(glyphs_base, glyphs_ours, glyphs_theirs)):
+        if o == t or t == b:
+            merged.append(o)
+        elif o == b:
+            merged.append(t)
+        else:
+            conflicts.append((code, b, o, t))
+            if resolve == 'pixels':
+                merged.append(b ^ ((o ^ b) | (t ^ b)))
+            else:
+                merged.append(o if resolve == 'ours' else t)
+    return GLYPHS_STRUCT.pack(*merged), conflicts
+
+
+# --- Comparação de Todos os Pares ---
+
+def pairwise_diffs(fonts):
+    """Compara todos os pares de uma lista de fontes (2048 bytes cada).
+
+    Gera (i, j, caracteres diferentes, pixels diferentes) para i < j. Com NumPy, cada
+    fonte é comparada com todas as seguintes em uma única operação sobre a matriz
+    (N, 256) de glifos; sem ele, cada fonte vira um inteiro de 16384 bits.
+    """
+    datas = [bytes(data) for data in fonts]
+    np = numpy_module()
+    if np is not None:
+        matrix = np.frombuffer(b''.join(datas), dtype='>u8').astype(np.uint64).reshape(len(datas), NUM_CHARS)
+        for i in range(len(datas) - 1):
+            xor = matrix[i + 1:] ^ matrix[i]
+            glyphs = np.count_nonzero(xor, axis=1).tolist()
+            pixels = msx_similarity.popcount64(xor).sum(axis=1, dtype=np.int64).tolist()
+            for k, (g, p) in enumerate(zip(glyphs, pixels)):
+                yield i, i + 1 + k, g, p
+        return
+
+    glyph_tuples = [GLYPHS_STRUCT.unpack(data) for data in datas]
+    ints = [int.from_bytes(data, 'big') for data in datas]
+    for i in range(len(datas) - 1):
+        for j in range(i + 1, len(datas)):
+            glyphs = sum(a != b for a, b in zip(glyph_tuples[i], glyph_tuples[j]))
+            yield i, j, glyphs, (ints[i] ^ ints[j]).bit_count()
+
+
+def glyph_hex(value):
+    """Os 8 bytes de um glifo (int de 64 bits) em hexadecimal."""
+    return value.to_bytes(CHAR_SIZE, 'big').hex()
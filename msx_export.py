@@ -0,0 +1,195 @@
+import os
+import re
+import struct
+
+from msx_formats import CHAR_SIZE, NUM_CHARS, write_atomic
+from msx_render import iter_indexed_png
+
+# --- Constantes ---
+PSF2_MAGIC = b'\x72\xb5\x4a\x86'
+PSF2_HEADER_SIZE = 32
+PSF2_HAS_UNICODE_TABLE = 0x01
+PSF2_SEPARATOR = b'\xff'
+ASCII_PRINTABLE = range(32, 127)  # Códigos em que os alfabetos seguem o ASCII (e o Unicode)
+
+SHEET_COLORS = ((0, 0, 0), (255, 255, 255))  # Fundo e frente das folhas PNG
+CHUNK_CHARS = 16  # Caracteres por bloco gerado nos formatos de texto
+
+# Texto de cada valor de byte, montado uma vez (evita formatar byte a byte)
+C_BYTES = tuple(f'0x{byte:02X}' for byte in range(256))
+ASM_BYTES = tuple(f'0{byte:02X}H' for byte in range(256))
+
+
+# --- Registro de Exportadores ---
+# Ao contrário de msx_formats, são formatos só de gravação, para usar a fonte fora
+# do MSX. Cada exportador gera o arquivo em blocos (um cabeçalho, um bloco por
+# caractere ou por faixa de linhas), gravados à medida que ficam prontos.
+
+EXPORTERS = {}
+
+
+def register_exporter(cls):
+    """Registra um exportador (decorador de classe); a instância fica em EXPORTERS pelo nome."""
+    EXPORTERS[cls.name] = cls()
+    return cls
+
+
+class FontExporter:
+    """Gravador de um formato de exportação.
+
+    chunks() gera o conteúdo do arquivo em blocos de bytes a partir dos 2048 bytes
+    da fonte; `name` é um identificador (letras, dígitos e _) usado dentro do arquivo.
+    """
+
+    name = ''
+    description = ''
+    extension = ''
+
+    def chunks(self, data, name):
+        raise NotImplementedError
+
+
+def font_identifier(path):
+    """Identificador C/assembler a partir do nome do arquivo (ex.: 'Letr-01.alf' -> 'letr_01')."""
+    name = re.sub(r'\W', '_', os.path.splitext(os.path.basename(path))[0]).lower() or 'font'
+    return '_' + name if name[0].isdigit() else name
+
+
+def _glyph(data, code):
+    return data[code * CHAR_SIZE:(code + 1) * CHAR_SIZE]
+
+
+def _char_comment(code):
+    """Comentário de uma linha das tabelas: o código e, se imprimível, o caractere."""
+    return f"{code:3d} {chr(code)}" if 32 < code < 127 else f"{code:3d}"
+
+
+@register_exporter
+class BdfExporter(FontExporter):
+    """Glyph Bitmap Distribution Format (X11), texto com um bloco por caractere."""
+
+    name = 'bdf'
+    description = "BDF 2.1 (X11, conversível para PCF/OTB)"
+    extension = '.bdf'
+
+    def chunks(self, data, name):
+        family = name.replace('-', '_')
+        yield (f"STARTFONT 2.1\n"
+               f"FONT -misc-{family}-medium-r-normal--8-80-75-75-c-80-msx-0\n"
+               f"SIZE 8 75 75\n"
+               f"FONTBOUNDINGBOX 8 8 0 -1\n"
+               f"STARTPROPERTIES 6\n"
+               f"FONT_ASCENT 7\n"
+               f"FONT_DESCENT 1\n"
+               f"DEFAULT_CHAR 32\n"
+               f"SPACING \"C\"\n"
+               f"CHARSET_REGISTRY \"MSX\"\n"
+               f"CHARSET_ENCODING \"0\"\n"
+               f"ENDPROPERTIES\n"
+               f"CHARS {NUM_CHARS}\n").encode('ascii')
+        for first in range(0, NUM_CHARS, CHUNK_CHARS):
+            yield ''.join(f"STARTCHAR char{code}\nENCODING {code}\nSWIDTH 1000 0\nDWIDTH 8 0\nBBX 8 8 0 -1\nBITMAP\n"
+                          f"{_glyph(data, code).hex(chr(10)).upper()}\nENDCHAR\n"
+                          for code in range(first, first + CHUNK_CHARS)).encode('ascii')
+        yield b"ENDFONT\n"
+
+
+@register_exporter
+class Psf2Exporter(FontExporter):
+    """PC Screen Font versão 2 (console do Linux), com tabela Unicode para o ASCII."""
+
+    name = 'psf'
+    description = "PSF2 (console do Linux: setfont)"
+    extension = '.psf'
+
+    def chunks(self, data, name):
+        yield struct.pack('<4s7I', PSF2_MAGIC, 0, PSF2_HEADER_SIZE, PSF2_HAS_UNICODE_TABLE,
+                          NUM_CHARS, CHAR_SIZE, 8, 8)
+        # Glifos 8x8 de 1 byte por linha: os 2048 bytes já estão no formato do PSF2
+        yield bytes(data)
+        yield b''.join(chr(code).encode('ascii') + PSF2_SEPARATOR if code in ASCII_PRINTABLE else PSF2_SEPARATOR
+                       for code in range(NUM_CHARS))
+
+
+@register_exporter
+class CArrayExporter(FontExporter):
+    """Cabeçalho C com um array de 2048 bytes, uma linha por caractere."""
+
+    name = 'c'
+    description = "Array C (.h)"
+    extension = '.h'
+
+    def chunks(self, data, name):
+        guard = f"{name.upper()}_H"
+        yield (f"/* {name}: alfabeto MSX, 256 caracteres 8x8 (1 byte por linha, bit 7 à esquerda) */\n"
+               f"#ifndef {guard}\n#define {guard}\n\n"
+               f"static const unsigned char {name}[{NUM_CHARS * CHAR_SIZE}] = {{\n").encode('utf-8')
+        for first in range(0, NUM_CHARS, CHUNK_CHARS):
+            yield ''.join(f"    {', '.join(map(C_BYTES.__getitem__, _glyph(data, code)))}, "
+                          f"/* {_char_comment(code)} */\n"
+                          for code in range(first, first + CHUNK_CHARS)).encode('ascii')
+        yield f"}};\n\n#endif /* {guard} */\n".encode('ascii')
+
+
+@register_exporter
+class AsmExporter(FontExporter):
+    """Tabela DB para assemblers Z80 (M80, Pasmo, sjasm...), com números no formato 0FFH."""
+
+    name = 'asm'
+    description = "Tabela DB para assembler Z80 (.asm)"
+    extension = '.asm'
+
+    def chunks(self, data, name):
+        yield (f"; {name}: alfabeto MSX, 256 caracteres 8x8 (1 byte por linha, bit 7 à esquerda)\n"
+               f"{name}:\n").encode('utf-8')
+        for first in range(0, NUM_CHARS, CHUNK_CHARS):
+            yield ''.join(f"        DB {','.join(map(ASM_BYTES.__getitem__, _glyph(data, code)))} "
+                          f"; {_char_comment(code)}\n"
+                          for code in range(first, first + CHUNK_CHARS)).encode('ascii')
+
+
+@register_exporter
+class PngSheetExporter(FontExporter):
+    """Folha PNG de 1 bit com os 256 caracteres em 16x16 células (128x128 pixels)."""
+
+    name = 'png'
+    description = "Folha de glifos PNG de 1 bit"
+    extension = '.png'
+
+    def chunks(self, data, name):
+        def bands():
+            # Uma faixa por linha de 16 caracteres: a linha do PNG é o mesmo byte de 16 glifos vizinhos
+            stride = 16 * CHAR_SIZE
+            for row in range(16):
+                band = bytearray()
+                base = row * stride
+                for line in range(CHAR_SIZE):
+                    band.append(0)  # Filtro "None" da linha
+                    band += data[base + line:base + stride:CHAR_SIZE]
+                yield band
+
+        yield from iter_indexed_png(128, 128, 1, SHEET_COLORS, bands(), transparent=False)
+
+
+# --- Exportação ---
+
+def exporter_for_path(path):
+    """Exportador pela extensão do arquivo, ou None."""
+    ext = os.path.splitext(path)[1].lower()
+    return next((exporter for exporter in EXPORTERS.values() if exporter.extension == ext), None)
+
+
+def export_font(data, path, exporter=None):
+    """Grava os 2048 bytes da fonte no formato do exportador (ou o da extensão de `path`).
+
+    O arquivo é gerado em blocos e gravado atomicamente. Retorna a lista de problemas
+    (nível, mensagem), vazia em caso de sucesso.
+    """
+    exporter = exporter or exporter_for_path(path)
+    if exporter is None:
+        return [('error', f"Formato de exportação desconhecido: '{os.path.splitext(path)[1]}'.")]
+    try:
+        write_atomic(path, exporter.chunks(bytes(data), font_identifier(path)))
+    except OSError as e:
+        return [('error', f"Não foi possível exportar o arquivo: {e}")]
+    return []
@@ -0,0 +1,451 @@
+import os
+import queue
+import threading
+
+from msx_formats import (FORMATS, DEFAULT_HEADER, BSAVE_HEADER_SIZE, CHAR_SIZE, NUM_CHARS, DATA_SIZE,
+                         read_font_file, format_for_path, numpy_module, patch_file, patch_fits_sector,
+                         write_atomic)
+from msx_history import EditHistory
+from msx_perf import timed
+
+
+# --- Transformações de Glifos (8x8 = 64 bits) ---
+# Cada glifo é tratado como um inteiro de 64 bits big-endian (linha 0 no byte mais
+# significativo, coluna 0 no bit 7 de cada byte). As funções usam apenas deslocamentos
+# e máscaras, então operam igualmente sobre um int do Python ou sobre um array NumPy
+# uint64 com todos os glifos selecionados de uma só vez.
+
+MASK64 = 0xFFFFFFFFFFFFFFFF
+EVERY_ROW = 0x0101010101010101
+
+
+def _shift_pixels_right(g, n):
+    """Desloca os pixels de cada linha n posições para a direita, sem vazar entre linhas."""
+    return (g >> n) & ((0xFF >> n) * EVERY_ROW)
+
+
+def _shift_pixels_left(g, n):
+    """Desloca os pixels de cada linha n posições para a esquerda, sem vazar entre linhas."""
+    return (g << n) & (((0xFF << n) & 0xFF) * EVERY_ROW)
+
+
+def glyph_invert(g):
+    """Inverte todos os pixels (vídeo inverso)."""
+    return g ^ MASK64
+
+
+def glyph_mirror(g):
+    """Espelha na horizontal (inverte a ordem dos bits de cada linha)."""
+    g = ((g >> 1) & 0x5555555555555555) | ((g & 0x5555555555555555) << 1)
+    g = ((g >> 2) & 0x3333333333333333) | ((g & 0x3333333333333333) << 2)
+    return ((g >> 4) & 0x0F0F0F0F0F0F0F0F) | ((g & 0x0F0F0F0F0F0F0F0F) << 4)
+
+
+def glyph_flip(g):
+    """Espelha na vertical (inverte a ordem das linhas)."""
+    g = ((g >> 8) & 0x00FF00FF00FF00FF) | ((g & 0x00FF00FF00FF00FF) << 8)
+    g = ((g >> 16) & 0x0000FFFF0000FFFF) | ((g & 0x0000FFFF0000FFFF) << 16)
+    return ((g >> 32) & 0x00000000FFFFFFFF) | ((g & 0x00000000FFFFFFFF) << 32)
+
+
+def glyph_transpose(g):
+    """Transpõe a matriz 8x8 (troca linhas por colunas)."""
+    t = (g ^ (g >> 7)) & 0x00AA00AA00AA00AA
+    g = g ^ t ^ (t << 7)
+    t = (g ^ (g >> 14)) & 0x0000CCCC0000CCCC
+    g = g ^ t ^ (t << 14)
+    t = (g ^ (g >> 28)) & 0x00000000F0F0F0F0
+    return (g ^ t ^ (t << 28)) & MASK64
+
+
+def glyph_rotate(g, clockwise=True):
+    """Gira o glifo 90 graus."""
+    g = glyph_transpose(g)
+    return glyph_mirror(g) if clockwise else glyph_flip(g)
+
+
+def glyph_shift(g, dx=0, dy=0, wrap=False):
+    """Desloca o glifo dx pixels para a direita e dy para baixo (negativos: esquerda/cima).
+
+    Com wrap=True os pixels que saem por uma borda entram pela borda oposta.
+    """
+    if wrap:
+        dx, dy = dx % 8, dy % 8
+    elif abs(dx) >= 8 or abs(dy) >= 8:
+        return g & 0
+    if dx > 0:
+        g = _shift_pixels_right(g, dx) | (_shift_pixels_left(g, 8 - dx) if wrap else 0)
+    elif dx < 0:
+        g = _shift_pixels_left(g, -dx) | (_shift_pixels_right(g, 8 + dx) if wrap else 0)
+    if dy > 0:
+        g = (g >> (8 * dy)) | (((g << (8 * (8 - dy))) & MASK64) if wrap else 0)
+    elif dy < 0:
+        g = ((g << (-8 * dy)) & MASK64) | ((g >> (8 * (8 + dy))) if wrap else 0)
+    return g
+
+
+def glyph_bold(g):
+    """Negrito do Graphos III: sobrepõe uma cópia deslocada um pixel para a direita."""
+    return g | _shift_pixels_right(g, 1)
+
+
+def glyph_underline(g, row=7):
+    """Sublinha o glifo acendendo toda a linha indicada (por padrão, a última)."""
+    return g | (0xFF << (8 * (7 - row)))
+
+
+def glyph_slant(g):
+    """Itálico: desloca a metade superior do glifo um pixel para a direita."""
+    top = 0xFFFFFFFF00000000
+    return _shift_pixels_right(g & top, 1) | (g & (MASK64 ^ top))
+
+
+GLYPH_TRANSFORMS = {
+    'invert': glyph_invert,
+    'mirror': glyph_mirror,
+    'flip': glyph_flip,
+    'rotate': glyph_rotate,
+    'shift': glyph_shift,
+    'bold': glyph_bold,
+    'underline': glyph_underline,
+    'slant': glyph_slant,
+}
+
+
+def grid_selection(code_a, code_b):
+    """Códigos contidos no retângulo da grade 16x16 delimitado por dois caracteres."""
+    row_a, col_a = divmod(code_a, 16)
+    row_b, col_b = divmod(code_b, 16)
+    return [row * 16 + col
+            for row in range(min(row_a, row_b), max(row_a, row_b) + 1)
+            for col in range(min(col_a, col_b), max(col_a, col_b) + 1)]
+
+
+# --- Classe de Manipulação de Arquivo .ALF (Graphos III) ---
+
+class MSXFont:
+    """Representa o alfabeto MSX e manipula a leitura/escrita do formato .ALF."""
+
+    HEADER_SIZE = BSAVE_HEADER_SIZE
+    CHAR_SIZE = CHAR_SIZE
+    NUM_CHARS = NUM_CHARS
+    DATA_SIZE = DATA_SIZE
+    FILE_SIZE = HEADER_SIZE + DATA_SIZE
+
+    # Cabeçalho padrão do Graphos III
+    DEFAULT_HEADER = DEFAULT_HEADER
+
+    def __init__(self, filepath, data=None):
+        self.filepath = filepath
+        # Formato detectado na leitura (usado também na gravação) e o que ele precisa preservar
+        self.format = FORMATS['comum']
+        self.format_info = {}
+        # Problemas da leitura, como (nível, mensagem); a interface decide como exibi-los
+        self.problems = []
+        # Buffer contíguo de 2048 bytes; cada glifo é uma fatia (memoryview) dele
+        self.data = self._load_font() if data is None else bytearray(data)
+        self.view = memoryview(self.data)
+        self.modified_chars = set()
+        # Desfazer/refazer: cada edição guarda só o XOR dos glifos alterados
+        self.history = EditHistory()
+        # (caminho, formato, mtime_ns, tamanho) do arquivo após a última gravação
+        self._disk_state = None
+
+    @timed()
+    def _load_font(self):
+        """Carrega a fonte pelo registro de formatos; erros ficam em self.problems."""
+        if not os.path.exists(self.filepath):
+            self.problems.append(('warning', f"Arquivo de fonte '{self.filepath}' não encontrado. "
+                                             f"Criando fonte vazia."))
+            return bytearray(self.DATA_SIZE)
+
+        data, fmt, info, problems = read_font_file(self.filepath)
+        self.problems.extend(problems)
+        if data is None:
+            return bytearray(self.DATA_SIZE)
+
+        self.format, self.format_info = fmt, info
+        return bytearray(data)
+
+    @property
+    def chars(self):
+        """Lista dos 256 glifos como fatias (sem cópia) do buffer contíguo."""
+        return [self.view[i:i + self.CHAR_SIZE] for i in range(0, self.DATA_SIZE, self.CHAR_SIZE)]
+
+    def get_char_pattern(self, ascii_code):
+        """Retorna os 8 bytes de um caractere (memoryview sobre o buffer da fonte)."""
+        if 0 <= ascii_code < self.NUM_CHARS:
+            offset = ascii_code * self.CHAR_SIZE
+            return self.view[offset:offset + self.CHAR_SIZE]
+        return None
+
+    def update_char_pattern(self, ascii_code, new_pattern):
+        """Atualiza o padrão de 8 bytes de um caractere e marca como modificado."""
+        if 0 <= ascii_code < self.NUM_CHARS and len(new_pattern) == self.CHAR_SIZE:
+            offset = ascii_code * self.CHAR_SIZE
+            delta = (int.from_bytes(self.data[offset:offset + self.CHAR_SIZE], 'big')
+                     ^ int.from_bytes(bytes(new_pattern), 'big'))
+            self.data[offset:offset + self.CHAR_SIZE] = new_pattern
+            self.modified_chars.add(ascii_code)
+            if delta:
+                self.history.record(bytes([ascii_code]), delta.to_bytes(self.CHAR_SIZE, 'big'))
+
+    def transform(self, operation, codes=None, **params):
+        """Aplica uma transformação de GLYPH_TRANSFORMS aos códigos indicados (todos, por padrão).
+
+        A operação é feita em lote sobre os glifos como inteiros de 64 bits (vetorizada
+        quando o NumPy está disponível) e vira um único passo do histórico. Retorna a
+        lista dos códigos que mudaram, que também são marcados em modified_chars.
+        """
+        function = GLYPH_TRANSFORMS[operation]
+        codes = sorted(set(range(self.NUM_CHARS) if codes is None else codes))
+        if not codes:
+            return []
+
+        np = numpy_module()  # Opcional: habilita a operação vetorizada
+        if np is not None:
+            index = np.array(codes, dtype=np.intp)
+            glyphs = self.glyphs64
+            before = glyphs[index].astype(np.uint64)
+            after = np.asarray(function(before, **params), dtype=np.uint64)
+            glyphs[index] = after
+            mask = after != before
+            changed = index[mask].tolist()
+            deltas = (before ^ after)[mask].astype('>u8').tobytes()
+        else:
+            changed, deltas = [], bytearray()
+            for code in codes:
+                offset = code * self.CHAR_SIZE
+                before = int.from_bytes(self.data[offset:offset + self.CHAR_SIZE], 'big')
+                after = function(before, **params) & MASK64
+                if after != before:
+                    self.data[offset:offset + self.CHAR_SIZE] = after.to_bytes(self.CHAR_SIZE, 'big')
+                    changed.append(code)
+                    deltas += (before ^ after).to_bytes(self.CHAR_SIZE, 'big')
+
+        self.modified_chars.update(changed)
+        self.history.record(bytes(changed), deltas)
+        return changed
+
+    def copy_glyphs(self, source, codes, target=None):
+        """Copia os glifos `codes` de outra fonte (MSXFont ou 2048 bytes) em um único lote.
+
+        Com target, o bloco é colado a partir desse código, mantendo as posições
+        relativas; os códigos que passariam de 255 são ignorados. A cópia vira um único
+        passo do histórico. Retorna a lista dos códigos que mudaram.
+        """
+        source = bytes(source.data if isinstance(source, MSXFont) else source)
+        codes = sorted(set(codes))
+        if not codes:
+            return []
+        shift = 0 if target is None else target - codes[0]
+
+        changed, deltas = [], bytearray()
+        for code in codes:
+            dest = code + shift
+            if not 0 <= dest < self.NUM_CHARS:
+                continue
+            before = int.from_bytes(self.data[dest * self.CHAR_SIZE:(dest + 1) * self.CHAR_SIZE], 'big')
+            after = int.from_bytes(source[code * self.CHAR_SIZE:(code + 1) * self.CHAR_SIZE], 'big')
+            if after != before:
+                self.data[dest * self.CHAR_SIZE:(dest + 1) * self.CHAR_SIZE] = after.to_bytes(self.CHAR_SIZE, 'big')
+                changed.append(dest)
+                deltas += (before ^ after).to_bytes(self.CHAR_SIZE, 'big')
+
+        self.modified_chars.update(changed)
+        self.history.record(bytes(changed), deltas)
+        return changed
+
+    def undo(self):
+        """Desfaz a última edição (ou lote de edições); retorna os códigos alterados."""
+        changed = self.history.undo(self.data)
+        self.modified_chars.update(changed)
+        return changed
+
+    def redo(self):
+        """Refaz a última edição desfeita; retorna os códigos alterados."""
+        changed = self.history.redo(self.data)
+        self.modified_chars.update(changed)
+        return changed
+
+    # --- Visões NumPy (opcionais) sobre o mesmo buffer ---
+
+    @property
+    def array(self):
+        """Visão (256, 8) uint8 que compartilha a memória da fonte (requer NumPy)."""
+        np = numpy_module()
+        if np is None:
+            raise RuntimeError("NumPy não está instalado.")
+        return np.frombuffer(self.data, dtype=np.uint8).reshape(self.NUM_CHARS, self.CHAR_SIZE)
+
+    @property
+    def glyphs64(self):
+        """Visão (256,) uint64 big-endian: cada glifo 8x8 como um inteiro de 64 bits (requer NumPy)."""
+        np = numpy_module()
+        if np is None:
+            raise RuntimeError("NumPy não está instalado.")
+        return np.frombuffer(self.data, dtype='>u8')
+
+    def bits(self):
+        """Retorna os pixels como um array (256, 8, 8) de 0/1 (requer NumPy).
+
+        Bits não são endereçáveis, então o array desempacotado é uma cópia; use
+        set_bits() para gravá-lo de volta no buffer compartilhado.
+        """
+        np = numpy_module()
+        if np is None:
+            raise RuntimeError("NumPy não está instalado.")
+        return np.unpackbits(self.array, axis=1).reshape(self.NUM_CHARS, 8, 8)
+
+    def set_bits(self, bits, codes=None):
+        """Empacota um array (N, 8, 8) de 0/1 de volta nos glifos indicados (todos, por padrão)."""
+        np = numpy_module()
+        if np is None:
+            raise RuntimeError("NumPy não está instalado.")
+        packed = np.packbits(np.asarray(bits, dtype=np.uint8), axis=-1).reshape(-1, self.CHAR_SIZE)
+        if codes is None:
+            codes = range(self.NUM_CHARS)
+        codes = list(codes)
+        target = self.array
+        deltas = target[codes] ^ packed
+        changed = np.any(deltas != 0, axis=1)
+        target[codes] = packed
+        changed_codes = [code for code, flag in zip(codes, changed) if flag]
+        self.modified_chars.update(changed_codes)
+        self.history.record(bytes(changed_codes), deltas[changed].tobytes())
+
+    def save_request(self, filepath=None, fmt=None):
+        """Prepara uma gravação para write_font(), com uma cópia dos dados atuais.
+
+        Se o destino é o arquivo da última gravação, no mesmo formato, a gravação
+        leva também a lista dos códigos alterados desde então, para atualizar só eles.
+        """
+        if filepath is None:
+            filepath = self.filepath
+        if fmt is None:
+            fmt = format_for_path(filepath, self.format)
+
+        codes = disk_state = None
+        if self._disk_state is not None and self._disk_state[:2] == (os.path.abspath(filepath), fmt.name):
+            codes, disk_state = sorted(self.modified_chars), self._disk_state[2:]
+        return filepath, fmt, dict(self.format_info), bytes(self.data), codes, disk_state
+
+    def finish_save(self, request, result):
+        """Aplica à fonte o resultado de write_font(request); retorna a lista de problemas."""
+        problems, state = result
+        if any(level == 'error' for level, _ in problems):
+            return problems
+
+        filepath, fmt, info, data, _, _ = request
+        self.filepath = filepath
+        self.format = fmt
+        self.format_info = fmt.saved_info(data, info)
+        # Só continuam alterados os caracteres editados depois da cópia que foi gravada
+        self.modified_chars = {code for code in self.modified_chars
+                               if self.view[code * CHAR_SIZE:(code + 1) * CHAR_SIZE]
+                               != data[code * CHAR_SIZE:(code + 1) * CHAR_SIZE]}
+        self._disk_state = None if state is None else (os.path.abspath(filepath), fmt.name) + state
+        return problems
+
+    @timed()
+    def save(self, filepath=None, fmt=None):
+        """Salva a fonte no formato lido (ou no indicado/da extensão), sem risco de corrompê-la.
+
+        Retorna a lista de problemas, vazia em caso de sucesso.
+        """
+        request = self.save_request(filepath, fmt)
+        return self.finish_save(request, write_font(request))
+
+
+# --- Gravação (atômica, incremental e em segundo plano) ---
+
+def _file_state(path):
+    """(mtime_ns, tamanho) de um arquivo, ou None se não existir."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+@timed()
+def write_font(request):
+    """Executa uma gravação preparada por MSXFont.save_request(); pode rodar em outra thread.
+
+    O arquivo é sempre substituído atomicamente (write_atomic): depois de uma falha
+    ele é o antigo ou o novo. A exceção é quando o arquivo continua como ficou na
+    última gravação e tudo o que mudou (os glifos alterados e o que o formato guarda
+    junto deles, como as larguras do .FNT) forma um só trecho dentro de um setor de
+    disco: esse trecho é regravado no lugar (patch_file), com a mesma garantia, já
+    que o disco grava um setor por inteiro ou não o grava. Retorna
+    (problemas, (mtime_ns, tamanho) do arquivo gravado); avisos do formato sobre
+    dados que não cabem nele não impedem a gravação.
+    """
+    filepath, fmt, info, data, codes, disk_state = request
+    problems = fmt.write_problems(data, info)
+    try:
+        chunks = None
+        patches = fmt.patches(data, info, codes) if codes is not None and _file_state(filepath) == disk_state else None
+        if patches is not None:
+            chunks = []
+            for offset, chunk in sorted(patches):
+                if chunks and chunks[-1][0] + len(chunks[-1][1]) == offset:
+                    chunks[-1][1].extend(chunk)
+                else:
+                    chunks.append((offset, bytearray(chunk)))
+        if chunks is not None and patch_fits_sector(chunks):
+            patch_file(filepath, chunks)
+        elif chunks != []:  # Nada mudou desde a última gravação: o arquivo fica como está
+            write_atomic(filepath, fmt.write(data, info))
+    except OSError as e:
+        return problems + [('error', f"Não foi possível salvar o arquivo: {e}")], None
+    return problems, _file_state(filepath)
+
+
+class BackgroundSaver:
+    """Fila de gravações de fontes executadas por uma thread, sem bloquear a interface.
+
+    submit() copia os dados na hora e retorna; a thread grava na ordem de chegada, e
+    poll(), chamado pelo laço da interface, conclui cada gravação na fonte e chama o
+    callback com a lista de problemas.
+    """
+
+    def __init__(self):
+        self.pending = 0
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='gravacao-de-fontes', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            font, request, callback = job
+            self._results.put((font, request, write_font(request), callback))
+
+    def submit(self, font, filepath=None, fmt=None, callback=None):
+        """Enfileira a gravação do estado atual da fonte."""
+        self.pending += 1
+        self._jobs.put((font, font.save_request(filepath, fmt), callback))
+
+    def poll(self):
+        """Conclui as gravações já terminadas (na thread da interface); retorna quantas."""
+        done = 0
+        while True:
+            try:
+                font, request, result, callback = self._results.get_nowait()
+            except queue.Empty:
+                return done
+            self.pending -= 1
+            done += 1
+            problems = font.finish_save(request, result)
+            if callback is not None:
+                callback(problems)
+
+    def close(self):
+        """Espera as gravações pendentes e encerra a thread."""
+        self._jobs.put(None)
+        self._thread.join()
+        self.poll()
@@ -1,163 +1,120 @@
+import time
+
+IMPORT_STARTED = time.perf_counter()  # Primeira instrução do módulo: a partida a frio inclui todas as importações
+
 import sqlite3
 import os
-import struct
 import sys
-from tkinter import filedialog, messagebox, Canvas
+import base64
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# O CustomTkinter (que já carrega os diálogos do tkinter) fica na importação do módulo:
+# as janelas do editor são subclasses de CTk e CTkToplevel
+from tkinter import filedialog, messagebox, Canvas, PhotoImage
 from customtkinter import *
 
+from msx_config import AUTOSAVE_KEY, DEFAULT_FONT_PATH_KEY, ConfigStore
+from msx_font import BackgroundSaver, MSXFont, grid_selection
+from msx_formats import read_font_file
+from msx_history import EditJournal
+from msx_perf import PERF, PERF_DUMP_ENV, STARTUP_BUDGET_MS, timed
+from msx_render import AtlasRaster, CellStates, GridLayout, encode_shape_png
+from msx_screen import (DEFAULT_INK, DEFAULT_PAPER, PRINT_VARIANT_NAMES, SCREEN_HEIGHT, SCREEN_WIDTH,
+                        Screen2, TextCompositor)
+from msx_shapes import ShapeBank, shape_name
+from msx_thumbs import THUMB_COLOR, ThumbnailLoader, cached_thumbnail, render_thumbnail, store_thumbnail
+
 # --- Constantes e Configuração ---
 CONFIG_DB = 'msx_font_editor.db'
-DEFAULT_FONT_PATH_KEY = 'fonte_padrao_caminho'
+AUTOSAVE_DELAY_MS = 2000  # Espera sem novas edições antes do salvamento automático
+SAVE_POLL_MS = 50  # Intervalo de verificação das gravações em segundo plano
+HUD_INTERVAL_MS = 250  # Atualização do painel de desempenho (e medida do atraso do laço de eventos)
+PERF_FILETYPES = [("Medições de Desempenho (JSON)", "*.json")]
+FONT_FILETYPES = [("Arquivos de Alfabeto MSX", "*.ALF *.alf *.FNT *.fnt *.ALZ *.alz *.ALR *.alr"),
+                  ("Todos os arquivos", "*.*")]
+SHAPE_FILETYPES = [("Bancos de Shapes Graphos III", "*.SHP *.shp"), ("Todos os arquivos", "*.*")]
+SCREEN_FILETYPES = [("Tela Graphos III (DISPLAY)", "*.SCR"), ("Cópia da VRAM (BSAVE)", "*.GRP"),
+                    ("Imagem PNG", "*.png")]
 
 
 # --- Funções de Configuração SQLite ---
 
+_config = None
+
+
+def config_store():
+    """A configuração do editor (ConfigStore), aberta no primeiro uso e mantida até o encerramento."""
+    global _config
+    if _config is None:
+        _config = ConfigStore(CONFIG_DB)
+    return _config
+
+
+def close_config():
+    global _config
+    if _config is not None:
+        _config.close()
+        _config = None
+
+
+@timed()
 def setup_config():
-    """Configura o banco de dados SQLite e garante a configuração inicial (caminho da fonte)."""
+    """Abre o banco de configuração e retorna o caminho da fonte padrão.
 
+    Só na primeira execução (sem o caminho configurado) é criada uma janela para as
+    caixas de diálogo; nas demais, a abertura não toca no Tk.
+    """
+    try:
+        path = config_store().get(DEFAULT_FONT_PATH_KEY)
+    except sqlite3.Error as e:
+        root = CTk()
+        root.withdraw()
+        messagebox.showerror("Erro de Inicialização", f"Ocorreu um erro no setup: {e}")
+        root.destroy()
+        sys.exit()
+    if path is None:
+        path = ask_default_font_path()
+        set_config(DEFAULT_FONT_PATH_KEY, path)
+    return path
+
+
+def ask_default_font_path():
+    """Pede ao usuário o arquivo da fonte padrão (primeira execução)."""
     # Inicializa o CustomTkinter para usar as caixas de diálogo
     root = CTk()
     root.withdraw()  # Esconde a janela principal do CustomTkinter
 
-    try:
-        conn = sqlite3.connect(CONFIG_DB)
-        cursor = conn.cursor()
-
-        # Cria a tabela de configuração
-        cursor.execute('''
-                       CREATE TABLE IF NOT EXISTS configuracao
-                       (
-                           opcao
-                           TEXT
-                           PRIMARY
-                           KEY,
-                           valor
-                           TEXT
-                       )
-                       ''')
-        conn.commit()
-
-        # Tenta obter o caminho da fonte padrão
-        cursor.execute('SELECT valor FROM configuracao WHERE opcao=?', (DEFAULT_FONT_PATH_KEY,))
-        result = cursor.fetchone()
-
-        if result is None:
-            # Solicita o caminho da fonte ao usuário se não estiver configurado
-            messagebox.showinfo("Configuração Inicial",
-                                "O arquivo de configuração não foi encontrado ou está incompleto. Por favor, selecione o arquivo de fonte (.ALF) padrão do MSX (formato Graphos III).")
-
-            while True:
-                default_path = filedialog.askopenfilename(
-                    title="Selecione a Fonte Padrão (.ALF)",
-                    filetypes=[("Arquivos de Alfabeto MSX", "*.ALF"), ("Todos os arquivos", "*.*")]
-                )
-                if default_path:
-                    # Salva o caminho
-                    cursor.execute('INSERT OR REPLACE INTO configuracao (opcao, valor) VALUES (?, ?)',
-                                   (DEFAULT_FONT_PATH_KEY, default_path))
-                    conn.commit()
-                    conn.close()
-                    root.destroy()
-                    return default_path
-                else:
-                    if not messagebox.askretrycancel("Erro de Configuração",
-                                                     "O caminho da fonte padrão é obrigatório para iniciar o editor. Tentar novamente?"):
-                        root.destroy()
-                        sys.exit("Configuração inicial cancelada pelo usuário.")
-        else:
-            conn.close()
-            path = result[0]
-            root.destroy()
-            return path
+    # Solicita o caminho da fonte ao usuário se não estiver configurado
+    messagebox.showinfo("Configuração Inicial",
+                        "O arquivo de configuração não foi encontrado ou está incompleto. Por favor, selecione o arquivo de fonte (.ALF) padrão do MSX (formato Graphos III).")
 
-    except Exception as e:
-        root.destroy()
-        messagebox.showerror("Erro de Inicialização", f"Ocorreu um erro no setup: {e}")
-        sys.exit()
+    while True:
+        default_path = filedialog.askopenfilename(
+            title="Selecione a Fonte Padrão (.ALF)",
+            filetypes=FONT_FILETYPES
+        )
+        if default_path:
+            root.destroy()
+            return default_path
+        if not messagebox.askretrycancel("Erro de Configuração",
+                                         "O caminho da fonte padrão é obrigatório para iniciar o editor. Tentar novamente?"):
+            root.destroy()
+            sys.exit("Configuração inicial cancelada pelo usuário.")
 
 
+@timed()
 def set_config(key, value):
     """Salva ou atualiza um valor de configuração."""
-    conn = sqlite3.connect(CONFIG_DB)
-    cursor = conn.cursor()
-    cursor.execute('INSERT OR REPLACE INTO configuracao (opcao, valor) VALUES (?, ?)', (key, value))
-    conn.commit()
-    conn.close()
-
-
-# --- Classe de Manipulação de Arquivo .ALF (Graphos III) ---
-
-class MSXFont:
-    """Representa o alfabeto MSX e manipula a leitura/escrita do formato .ALF."""
-
-    HEADER_SIZE = 7
-    CHAR_SIZE = 8
-    NUM_CHARS = 256
-    DATA_SIZE = NUM_CHARS * CHAR_SIZE
-    FILE_SIZE = HEADER_SIZE + DATA_SIZE
-
-    # Cabeçalho padrão do Graphos III
-    DEFAULT_HEADER = struct.pack('<BHHH', 0xFE, 0x9200, 0x99FF, 0x9200)
-
-    def __init__(self, filepath):
-        self.filepath = filepath
-        self.chars = self._load_font()
-        self.modified_chars = set()
-
-    def _load_font(self):
-        """Carrega a fonte do arquivo .ALF, validando o cabeçalho e o tamanho."""
-        if not os.path.exists(self.filepath):
-            empty_data = bytearray(self.DATA_SIZE)
-            messagebox.showwarning("Aviso", f"Arquivo de fonte '{self.filepath}' não encontrado. Criando fonte vazia.")
-            return [empty_data[i:i + self.CHAR_SIZE] for i in range(0, self.DATA_SIZE, self.CHAR_SIZE)]
-
-        with open(self.filepath, 'rb') as f:
-            content = f.read()
-
-        if len(content) != self.FILE_SIZE:
-            messagebox.showerror("Erro",
-                                 f"Tamanho de arquivo inválido: {len(content)} bytes. Esperado: {self.FILE_SIZE} bytes.")
-            empty_data = bytearray(self.DATA_SIZE)
-            return [empty_data[i:i + self.CHAR_SIZE] for i in range(0, self.DATA_SIZE, self.CHAR_SIZE)]
-
-        header = content[:self.HEADER_SIZE]
-        if header != self.DEFAULT_HEADER:
-            messagebox.showwarning("Aviso",
-                                   "O cabeçalho do arquivo não corresponde ao padrão Graphos III ($9200-$99FF). O arquivo será lido, mas a gravação usará o cabeçalho padrão.")
-
-        data = bytearray(content[self.HEADER_SIZE:])
-        return [data[i:i + self.CHAR_SIZE] for i in range(0, self.DATA_SIZE, self.CHAR_SIZE)]
-
-    def get_char_pattern(self, ascii_code):
-        """Retorna os 8 bytes de um caractere."""
-        if 0 <= ascii_code < self.NUM_CHARS:
-            return self.chars[ascii_code]
-        return None
-
-    def update_char_pattern(self, ascii_code, new_pattern):
-        """Atualiza o padrão de 8 bytes de um caractere e marca como modificado."""
-        if 0 <= ascii_code < self.NUM_CHARS and len(new_pattern) == self.CHAR_SIZE:
-            self.chars[ascii_code] = bytearray(new_pattern)
-            self.modified_chars.add(ascii_code)
-
-    def save(self, filepath=None):
-        """Salva a fonte no formato Graphos III (.ALF)."""
-        if filepath is None:
-            filepath = self.filepath
+    config_store().set(key, value)
 
-        try:
-            with open(filepath, 'wb') as f:
-                f.write(self.DEFAULT_HEADER)
-                for char_pattern in self.chars:
-                    f.write(char_pattern)
-
-            self.filepath = filepath
-            self.modified_chars.clear()
-            messagebox.showinfo("Sucesso", f"Fonte salva em: {filepath}")
-            return True
-        except Exception as e:
-            messagebox.showerror("Erro de Gravação", f"Não foi possível salvar o arquivo: {e}")
-            return False
+
+@timed()
+def get_config(key, default=None):
+    """Lê um valor de configuração (ou `default`, se não existir), do cache em memória."""
+    return config_store().get(key, default)
 
 
 # --- Janela de Edição 8x8 (CTkTopLevel) ---
@@ -171,6 +128,10 @@ class EditorWindow(CTkToplevel):
     COLOR_PIXEL_OFF = '#303030'
     COLOR_CURSOR = '#1F6AA5'
 
+    # Níveis de ampliação (tamanho em tela de cada pixel) e intervalo de um quadro (ms)
+    ZOOM_LEVELS = (16, 24, 32, 40, 56, 72)
+    FRAME_MS = 16
+
     def __init__(self, master, char_code, pattern, callback):
         self.char_code = char_code
         self.callback = callback
@@ -194,41 +155,88 @@ class EditorWindow(CTkToplevel):
 
         self.cursor_row, self.cursor_col = 0, 0
 
+        # Itens persistentes do Canvas: os 64 pixels e o cursor são criados uma única vez
+        self.pixel_items = [[self.editor_canvas.create_rectangle(0, 0, 0, 0, outline=self.COLOR_PIXEL_OFF, width=1,
+                                                                 tags="pixels")
+                             for c in range(8)] for r in range(8)]
+        self.cursor_item = self.editor_canvas.create_rectangle(0, 0, 0, 0, outline=self.COLOR_CURSOR, width=3,
+                                                               tags="editor_cursor")
+        self.layout = GridLayout(self.pixel_size, cols=8, rows=8)
+        self.pixel_states = CellStates(64)
+
+        # Estado do traço (arrasto) e do redesenho agendado
+        self.paint_value = None
+        self.last_stroke_cell = None
+        self.redraw_pending = None
+
         # Bindings
         self.editor_canvas.bind('<Button-1>', self.on_click)
+        self.editor_canvas.bind('<B1-Motion>', self.on_drag)
+        self.editor_canvas.bind('<ButtonRelease-1>', self.on_release)
         self.editor_canvas.bind('<Button-3>', self.save_and_close)
+        self.editor_canvas.bind('<Control-MouseWheel>', self.on_zoom_wheel)
+        self.editor_canvas.bind('<Control-Button-4>', lambda event: self.set_zoom(1))
+        self.editor_canvas.bind('<Control-Button-5>', lambda event: self.set_zoom(-1))
         self.bind('<Return>', self.save_and_close)
         self.bind('<space>', self.toggle_current_pixel)
         self.bind('<Key>', self.on_key_press)
 
         self.protocol("WM_DELETE_WINDOW", self.cancel_and_close)
 
+        self.layout_editor()
         self.draw_editor()
+
+    def layout_editor(self):
+        """Posiciona os itens persistentes conforme o nível de ampliação atual."""
+        self.layout = GridLayout(self.pixel_size, cols=8, rows=8)
+        self.editor_canvas.configure(width=8 * self.pixel_size, height=8 * self.pixel_size)
+        for i in range(64):
+            self.editor_canvas.coords(self.pixel_items[i // 8][i % 8], *self.layout.cell_rect(i))
         self.draw_editor_cursor()
 
+    @timed()
     def draw_editor(self):
-        """Desenha a grade 8x8 e os pixels."""
-        self.editor_canvas.delete("pixels")
-
-        for r in range(8):
-            for c in range(8):
-                x1, y1 = c * self.pixel_size, r * self.pixel_size
-                x2, y2 = x1 + self.pixel_size, y1 + self.pixel_size
-
-                color = self.COLOR_PIXEL_ON if self.pixel_data[r][c] == 1 else self.COLOR_PIXEL_OFF
-
-                self.editor_canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline=self.COLOR_PIXEL_OFF, width=1,
-                                                    tags="pixels")
+        """Atualiza a cor apenas dos pixels cujo estado mudou desde o último desenho."""
+        self.cancel_pending_redraw()
+        if PERF.enabled:
+            PERF.gauge('EditorWindow.canvas_items', len(self.editor_canvas.find_all()))
+
+        for i, value in self.pixel_states.update([value for row in self.pixel_data for value in row]):
+            color = self.COLOR_PIXEL_ON if value == 1 else self.COLOR_PIXEL_OFF
+            self.editor_canvas.itemconfigure(self.pixel_items[i // 8][i % 8], fill=color)
+
+    def schedule_redraw(self):
+        """Agenda um único redesenho para o próximo quadro, agrupando os eventos de movimento."""
+        if self.redraw_pending is None:
+            self.redraw_pending = self.after(self.FRAME_MS, self.flush_redraw)
+
+    def cancel_pending_redraw(self):
+        """Cancela o redesenho agendado, se houver."""
+        if self.redraw_pending is not None:
+            self.after_cancel(self.redraw_pending)
+            self.redraw_pending = None
+
+    def flush_redraw(self):
+        """Aplica no Canvas as alterações acumuladas (pixels e cursor)."""
+        self.draw_editor()
+        self.draw_editor_cursor()
 
     def draw_editor_cursor(self):
-        """Desenha o cursor de navegação 8x8."""
-        self.editor_canvas.delete("editor_cursor")
-
-        r, c = self.cursor_row, self.cursor_col
-        x1, y1 = c * self.pixel_size, r * self.pixel_size
-        x2, y2 = x1 + self.pixel_size, y1 + self.pixel_size
-
-        self.editor_canvas.create_rectangle(x1, y1, x2, y2, outline=self.COLOR_CURSOR, width=3, tags="editor_cursor")
+        """Posiciona o cursor de navegação 8x8."""
+        self.editor_canvas.coords(self.cursor_item, *self.layout.cell_rect(self.cursor_row * 8 + self.cursor_col))
+
+    def set_zoom(self, step):
+        """Avança ou recua um nível de ampliação (custo constante: só reposiciona os 64 itens)."""
+        levels = self.ZOOM_LEVELS
+        index = min(range(len(levels)), key=lambda i: abs(levels[i] - self.pixel_size))
+        index = max(0, min(len(levels) - 1, index + step))
+        if levels[index] != self.pixel_size:
+            self.pixel_size = levels[index]
+            self.layout_editor()
+
+    def on_zoom_wheel(self, event):
+        """Ctrl + roda do mouse altera a ampliação."""
+        self.set_zoom(1 if event.delta > 0 else -1)
 
     def move_editor_cursor(self, dx, dy):
         """Move o cursor na grade 8x8."""
@@ -239,21 +247,54 @@ class EditorWindow(CTkToplevel):
     def toggle_pixel(self, r, c):
         """Inverte o estado do pixel e redesenha."""
         self.pixel_data[r][c] = 1 - self.pixel_data[r][c]
-        self.draw_editor()
-        self.draw_editor_cursor()
+        self.flush_redraw()
 
     def toggle_current_pixel(self, event=None):
         """Inverte o pixel sob o cursor."""
         self.toggle_pixel(self.cursor_row, self.cursor_col)
 
+    def cell_at(self, event):
+        """Converte a posição do mouse em (linha, coluna) da grade, ou None se estiver fora."""
+        index = self.layout.cell_at(event.x, event.y)
+        return None if index is None else divmod(index, 8)
+
     def on_click(self, event):
-        """Trata o clique do mouse na grade 8x8 (inverte o pixel)."""
-        r = event.y // self.pixel_size
-        c = event.x // self.pixel_size
+        """Trata o clique do mouse na grade 8x8 (inverte o pixel e inicia o traço)."""
+        cell = self.cell_at(event)
 
-        if 0 <= r < 8 and 0 <= c < 8:
+        if cell is not None:
+            r, c = cell
             self.cursor_row, self.cursor_col = r, c
             self.toggle_pixel(r, c)
+            # O traço pinta (ou apaga) com o novo valor do pixel clicado
+            self.paint_value = self.pixel_data[r][c]
+            self.last_stroke_cell = cell
+
+    def on_drag(self, event):
+        """Pinta/apaga ao arrastar; o Canvas é atualizado no máximo uma vez por quadro."""
+        if self.paint_value is None:
+            return
+        cell = self.cell_at(event)
+        if cell is None:
+            return
+
+        # Interpola entre o último e o atual para não deixar falhas em traços rápidos
+        (r0, c0), (r1, c1) = self.last_stroke_cell, cell
+        steps = max(abs(r1 - r0), abs(c1 - c0))
+        for i in range(1, steps + 1):
+            r = r0 + round((r1 - r0) * i / steps)
+            c = c0 + round((c1 - c0) * i / steps)
+            self.pixel_data[r][c] = self.paint_value
+
+        self.last_stroke_cell = cell
+        self.cursor_row, self.cursor_col = cell
+        self.schedule_redraw()
+
+    def on_release(self, event):
+        """Finaliza o traço e aplica imediatamente o que estiver pendente."""
+        self.paint_value = None
+        self.last_stroke_cell = None
+        self.flush_redraw()
 
     def on_key_press(self, event):
         """Trata as teclas de seta e outras teclas."""
@@ -265,6 +306,10 @@ class EditorWindow(CTkToplevel):
             self.move_editor_cursor(-1, 0)
         elif event.keysym == 'Right':
             self.move_editor_cursor(1, 0)
+        elif event.keysym in ('plus', 'equal', 'KP_Add'):
+            self.set_zoom(1)
+        elif event.keysym in ('minus', 'KP_Subtract'):
+            self.set_zoom(-1)
         elif event.keysym == 'Escape':
             self.cancel_and_close()
 
@@ -278,22 +323,374 @@ class EditorWindow(CTkToplevel):
                     byte_val |= (1 << (7 - c))
             new_pattern[r] = byte_val
 
+        self.cancel_pending_redraw()
         self.callback(self.char_code, new_pattern)
         self.grab_release()
         self.destroy()
 
     def cancel_and_close(self, event=None):
         """Fecha a janela sem salvar, passando None no callback."""
+        self.cancel_pending_redraw()
         self.callback(self.char_code, None)
         self.grab_release()
         self.destroy()
 
 
+# --- Grade Virtualizada de Miniaturas (CTkTopLevel) ---
+
+class ThumbnailGridWindow(CTkToplevel):
+    """Grade rolável de miniaturas, virtualizada.
+
+    Só existem itens no Canvas para as células visíveis; ao rolar, as miniaturas que
+    entram na área visível são rasterizadas, e as imagens prontas ficam em um cache
+    LRU. As subclasses informam a quantidade de células (count), o rótulo (label) e
+    o PNG de cada miniatura (render), e o que fazer no clique (activate).
+    """
+
+    COLOR_BG = '#1e1e1e'
+    COLOR_FG = 'white'
+    COLOR_PIXEL_ON = 'white'
+
+    THUMB_SIZE = 128    # Caixa da miniatura (pixels de tela)
+    MAX_ZOOM = 4        # Miniaturas pequenas são ampliadas até este fator
+    CELL_PAD = 12
+    LABEL_HEIGHT = 20
+    CACHE_SIZE = 192    # Miniaturas mantidas no cache LRU
+    FRAME_MS = 16
+
+    def __init__(self, master, title):
+        super().__init__(master)
+        self.title(title)
+        self.geometry("720x560")
+
+        self.cell_width = self.THUMB_SIZE + self.CELL_PAD
+        self.cell_height = self.THUMB_SIZE + self.LABEL_HEIGHT + self.CELL_PAD
+        self.columns = 0
+        self.thumbnails = OrderedDict()  # índice -> PhotoImage, do menos ao mais recente
+        self.visible = {}                # índice -> (item da imagem, item do rótulo)
+        self.redraw_pending = None
+
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.canvas = Canvas(self, bg=self.COLOR_BG, highlightthickness=0)
+        self.canvas.grid(row=0, column=0, sticky="nswe")
+        scrollbar = CTkScrollbar(self, command=self.on_scroll)
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+
+        self.canvas.bind('<Configure>', lambda event: self.schedule_redraw())
+        self.canvas.bind('<MouseWheel>', lambda event: self.on_scroll('scroll', -event.delta // 120, 'units'))
+        self.canvas.bind('<Button-4>', lambda event: self.on_scroll('scroll', -1, 'units'))
+        self.canvas.bind('<Button-5>', lambda event: self.on_scroll('scroll', 1, 'units'))
+        self.canvas.bind('<Button-1>', self.on_click)
+        self.bind('<Prior>', lambda event: self.on_scroll('scroll', -1, 'pages'))
+        self.bind('<Next>', lambda event: self.on_scroll('scroll', 1, 'pages'))
+        self.bind('<Escape>', lambda event: self.destroy())
+
+    # --- Pontos de extensão ---
+
+    def count(self):
+        raise NotImplementedError
+
+    def label(self, index):
+        raise NotImplementedError
+
+    def render(self, index):
+        """PNG da miniatura e seu maior lado em pixels, ou None se ela ainda não está pronta."""
+        raise NotImplementedError
+
+    def activate(self, index):
+        """Chamado no clique sobre uma célula."""
+
+    # --- Desenho ---
+
+    def on_scroll(self, *args):
+        """Repassa a rolagem ao Canvas e agenda o desenho das células que ficaram visíveis."""
+        self.canvas.yview(*args)
+        self.schedule_redraw()
+
+    def on_click(self, event):
+        if not self.columns:
+            return
+        col = int(event.x // self.cell_width)
+        index = int(self.canvas.canvasy(event.y) // self.cell_height) * self.columns + col
+        if col < self.columns and 0 <= index < self.count():
+            self.activate(index)
+
+    def schedule_redraw(self):
+        """Agenda um único redesenho para o próximo quadro, agrupando os eventos de rolagem."""
+        if self.redraw_pending is None:
+            self.redraw_pending = self.after(self.FRAME_MS, self.draw_visible)
+
+    def layout(self):
+        """Recalcula as colunas pela largura do Canvas; retorna True se o arranjo mudou."""
+        columns = max(1, self.canvas.winfo_width() // self.cell_width)
+        if columns == self.columns:
+            return False
+        self.columns = columns
+        rows = -(-self.count() // columns)
+        self.canvas.configure(scrollregion=(0, 0, columns * self.cell_width, rows * self.cell_height),
+                              yscrollincrement=self.cell_height // 4)
+        return True
+
+    def draw_visible(self):
+        """Cria os itens das células visíveis e remove os das que saíram da tela."""
+        self.redraw_pending = None
+        if self.layout():
+            for items in self.visible.values():
+                self.canvas.delete(*items)
+            self.visible.clear()
+
+        top = self.canvas.canvasy(0)
+        first_row = max(0, int(top // self.cell_height))
+        last_row = int((top + self.canvas.winfo_height()) // self.cell_height)
+        wanted = range(first_row * self.columns, min(self.count(), (last_row + 1) * self.columns))
+
+        for index in [index for index in self.visible if index not in wanted]:
+            self.canvas.delete(*self.visible.pop(index))
+
+        for index in wanted:
+            if index in self.visible:
+                if index in self.thumbnails:
+                    self.thumbnails.move_to_end(index)
+                continue
+            x = (index % self.columns) * self.cell_width + self.cell_width // 2
+            y = (index // self.columns) * self.cell_height + self.CELL_PAD // 2
+            self.visible[index] = (
+                self.canvas.create_image(x, y + self.THUMB_SIZE // 2, image=self.thumbnail(index) or ''),
+                self.canvas.create_text(x, y + self.THUMB_SIZE + self.LABEL_HEIGHT // 2, text=self.label(index),
+                                        fill=self.COLOR_FG, font=("Consolas", 10)))
+
+    def refresh(self, index):
+        """Atualiza uma célula visível cuja miniatura (ou rótulo) mudou."""
+        items = self.visible.get(index)
+        if items is not None:
+            self.canvas.itemconfigure(items[0], image=self.thumbnail(index) or '')
+            self.canvas.itemconfigure(items[1], text=self.label(index))
+
+    def thumbnail(self, index):
+        """Miniatura da célula (do cache LRU ou rasterizada agora), ou None se não está pronta."""
+        image = self.thumbnails.get(index)
+        if image is not None:
+            self.thumbnails.move_to_end(index)
+            return image
+
+        rendered = self.render(index)
+        if rendered is None:
+            return None
+        png, largest = rendered
+        image = PhotoImage(master=self, data=base64.b64encode(png).decode('ascii'), format='png')
+        if largest > self.THUMB_SIZE:
+            image = image.subsample(-(-largest // self.THUMB_SIZE))
+        elif largest * 2 <= self.THUMB_SIZE:
+            image = image.zoom(min(self.MAX_ZOOM, self.THUMB_SIZE // largest))
+
+        self.thumbnails[index] = image
+        # Descarta as menos usadas, mas nunca uma imagem ainda exibida no Canvas
+        for old in list(self.thumbnails):
+            if len(self.thumbnails) <= self.CACHE_SIZE:
+                break
+            if old not in self.visible and old != index:
+                del self.thumbnails[old]
+        return image
+
+
+class ShapeBrowserWindow(ThumbnailGridWindow):
+    """Miniaturas de um banco de shapes; cada shape só é decodificado quando fica visível."""
+
+    def __init__(self, master, bank):
+        self.bank = bank
+        super().__init__(master, f"Shapes: {os.path.basename(bank.filepath)} ({len(bank)} shapes)")
+
+    def count(self):
+        return len(self.bank)
+
+    def label(self, index):
+        # O rótulo vem do índice do banco: só a miniatura exige decodificar o shape
+        key, shape_type, height, width, _ = self.bank.entries[index]
+        return f"{shape_name(key)}  {width * 8}x{height}  T{shape_type}"
+
+    def render(self, index):
+        shape = self.bank.shape(index)
+        png = encode_shape_png(shape, color_on=tuple(v >> 8 for v in self.winfo_rgb(self.COLOR_PIXEL_ON)))
+        return png, max(shape.width * 8, shape.height)
+
+
+class FontBrowserWindow(ThumbnailGridWindow):
+    """Miniaturas de todos os alfabetos de uma pasta; um clique abre a fonte no editor.
+
+    As miniaturas são geradas por um ThumbnailLoader (pool de threads e cache em
+    disco) e chegam por uma fila lida a cada POLL_MS, sem bloquear a interface.
+    """
+
+    POLL_MS = 50
+
+    def __init__(self, master, folder, on_choose):
+        self.loader = ThumbnailLoader.for_folder(folder)
+        self.on_choose = on_choose
+        self.pngs = {}    # índice -> PNG da miniatura (poucos KB cada)
+        self.status = {}  # índice -> formato ou "erro"
+        super().__init__(master, f"Alfabetos: {folder} ({len(self.loader.paths)} arquivos)")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.bind('<Escape>', lambda event: self.close())
+        self.poll_id = self.after(self.POLL_MS, self.poll)
+
+    def count(self):
+        return len(self.loader.paths)
+
+    def label(self, index):
+        name = os.path.basename(self.loader.paths[index])
+        return f"{name}  {self.status[index]}" if index in self.status else name
+
+    def render(self, index):
+        png = self.pngs.get(index)
+        return None if png is None else (png, self.THUMB_SIZE)
+
+    def activate(self, index):
+        self.on_choose(self.loader.paths[index])
+
+    def poll(self):
+        """Recebe as miniaturas prontas e atualiza as células visíveis."""
+        while True:
+            try:
+                index, png, fmt, _ = self.loader.results.get_nowait()
+            except queue.Empty:
+                break
+            self.status[index] = fmt.upper() if fmt else "erro"
+            if png is not None:
+                self.pngs[index] = png
+            self.refresh(index)
+        self.poll_id = None if self.loader.done.is_set() and self.loader.results.empty() else \
+            self.after(self.POLL_MS, self.poll)
+
+    def close(self):
+        self.loader.cancel()
+        if self.poll_id is not None:
+            self.after_cancel(self.poll_id)
+        self.destroy()
+
+
+# --- Prévia da SCREEN 2 (CTkTopLevel) ---
+
+class ScreenPreviewWindow(CTkToplevel):
+    """Compõe um texto com a fonte atual na SCREEN 2 e exporta a tela (.SCR, .GRP ou .PNG)."""
+
+    COLOR_BG = '#1e1e1e'
+    ZOOM = 2
+    FRAME_MS = 16
+    COLOR_CHOICES = [str(color) for color in range(16)]
+
+    def __init__(self, master, font):
+        super().__init__(master)
+        self.font = font
+        self.title("Prévia SCREEN 2")
+        self.screen = Screen2()
+        self.redraw_pending = None
+
+        self.source = PhotoImage(master=self, width=SCREEN_WIDTH, height=SCREEN_HEIGHT)
+        self.image = PhotoImage(master=self, width=SCREEN_WIDTH * self.ZOOM, height=SCREEN_HEIGHT * self.ZOOM)
+        canvas = Canvas(self, width=SCREEN_WIDTH * self.ZOOM, height=SCREEN_HEIGHT * self.ZOOM,
+                        bg=self.COLOR_BG, highlightthickness=0)
+        canvas.create_image(0, 0, image=self.image, anchor=NW)
+        canvas.grid(row=0, column=0, columnspan=4, padx=10, pady=10)
+
+        self.text_box = CTkTextbox(self, height=80, font=("Consolas", 12))
+        self.text_box.insert('1.0', "MSX Graphos III")
+        self.text_box.grid(row=1, column=0, columnspan=4, padx=10, sticky="we")
+        self.text_box.bind('<KeyRelease>', lambda event: self.schedule_redraw())
+
+        self.variant_choice = CTkOptionMenu(self, values=list(PRINT_VARIANT_NAMES.values()),
+                                            command=lambda _: self.schedule_redraw())
+        self.variant_choice.grid(row=2, column=0, padx=10, pady=10)
+        self.ink_choice = CTkOptionMenu(self, values=self.COLOR_CHOICES, width=70,
+                                        command=lambda _: self.schedule_redraw())
+        self.ink_choice.set(str(DEFAULT_INK))
+        self.ink_choice.grid(row=2, column=1, pady=10)
+        self.paper_choice = CTkOptionMenu(self, values=self.COLOR_CHOICES, width=70,
+                                          command=lambda _: self.schedule_redraw())
+        self.paper_choice.set(str(DEFAULT_PAPER))
+        self.paper_choice.grid(row=2, column=2, pady=10)
+        CTkButton(self, text="Exportar...", command=self.export_dialog).grid(row=2, column=3, padx=10, pady=10)
+
+        self.draw_screen()
+
+    def schedule_redraw(self):
+        """Agenda uma única recomposição para o próximo quadro, agrupando as teclas digitadas."""
+        if self.redraw_pending is None:
+            self.redraw_pending = self.after(self.FRAME_MS, self.draw_screen)
+
+    def compose(self):
+        """Refaz a tela com o texto, a variação e as cores escolhidos."""
+        ink, paper = int(self.ink_choice.get()), int(self.paper_choice.get())
+        variant = next(key for key, name in PRINT_VARIANT_NAMES.items() if name == self.variant_choice.get())
+        self.screen.clear(ink, paper)
+        TextCompositor(self.screen, self.font).write(self.text_box.get('1.0', 'end-1c'), 0, 0, variant, ink, paper)
+
+    def draw_screen(self):
+        """Recompõe a tela e a exibe ampliada (um PNG de 256x192 copiado com zoom pelo Tk)."""
+        self.redraw_pending = None
+        self.compose()
+        self.source.configure(data=base64.b64encode(self.screen.to_png()).decode('ascii'), format='png')
+        self.tk.call(self.image, 'copy', self.source, '-zoom', self.ZOOM, '-compositingrule', 'set')
+
+    def export_dialog(self):
+        """Grava a tela composta no formato escolhido pela extensão."""
+        filepath = filedialog.asksaveasfilename(defaultextension=".SCR", filetypes=SCREEN_FILETYPES,
+                                                title="Exportar Tela", parent=self)
+        if filepath:
+            self.compose()
+            problems = self.screen.save(filepath)
+            if problems:
+                messagebox.showerror("Erro de Gravação", problems[0][1], parent=self)
+
+
+# --- Documentos (Abas) ---
+
+class FontDocument:
+    """Uma fonte aberta em uma aba do editor.
+
+    `font` é None quando a fonte foi descartada do cache (só acontece sem alterações
+    pendentes) e precisa ser relida de `path`; `atlas` e `raster` são a grade já
+    renderizada, mantida enquanto a aba estiver entre as usadas mais recentemente.
+    """
+
+    def __init__(self, font):
+        self.path = font.filepath
+        self.font = font
+        self.journal_path = font.filepath
+        self.atlas = None
+        self.raster = None
+
+
 # --- Aplicação Principal (CustomTkinter) ---
 
 class FontEditorApp(CTk):
     """Gerencia a janela principal e a visualização 16x16 (32x32) da fonte."""
 
+    # Abas recentes que mantêm a grade renderizada (~1 MB cada) e a fonte na memória
+    ATLAS_CACHE_SIZE = 6
+    FONT_CACHE_SIZE = 16
+
+    # Opções fixas do menu "Comparar com", além das abas abertas
+    NO_COMPARE = "(nenhuma)"
+    COMPARE_FILE = "Arquivo..."
+
+    # Transformações oferecidas no painel: nome exibido -> (operação, parâmetros)
+    TRANSFORM_ACTIONS = {
+        "Inverter": ('invert', {}),
+        "Espelhar (Horizontal)": ('mirror', {}),
+        "Espelhar (Vertical)": ('flip', {}),
+        "Girar 90° (Horário)": ('rotate', {}),
+        "Girar 90° (Anti-horário)": ('rotate', {'clockwise': False}),
+        "Deslocar ←": ('shift', {'dx': -1}),
+        "Deslocar →": ('shift', {'dx': 1}),
+        "Deslocar ↑": ('shift', {'dy': -1}),
+        "Deslocar ↓": ('shift', {'dy': 1}),
+        "Negrito": ('bold', {}),
+        "Sublinhado": ('underline', {}),
+        "Itálico": ('slant', {}),
+    }
+
     def __init__(self, default_font_path):
         super().__init__()
 
@@ -301,14 +698,31 @@ class FontEditorApp(CTk):
         set_appearance_mode("Dark")
         set_default_color_theme("blue")
 
-        self.font = MSXFont(default_font_path)
+        # Fontes abertas (abas), da mais para a menos usada em `recent`
+        self.documents = []
+        self.document = None
+        self.font = None
+        self.recent = OrderedDict()
+        self.clipboard = None  # (códigos, cópia dos 2048 bytes da fonte de origem)
         self.selected_char_code = 32
+        # Diário das edições no banco de configuração, para recuperar a sessão após uma falha
+        self.journal = EditJournal(CONFIG_DB)
+        # Gravações em uma thread; o salvamento automático espera uma pausa nas edições
+        self.saver = BackgroundSaver()
+        self.save_poll_id = None
+        self.autosave_id = None
+        # Leitura de fontes fora da thread da interface (a última pedida é a que vale)
+        self.load_pool = ThreadPoolExecutor(max_workers=1)
+        self.loading = None
 
         # Tamanhos
         # Escala 4x: Caractere 8x8 -> 32x32 pixels na tela
         self.char_display_scale = 4
         self.main_char_size = 8 * self.char_display_scale  # Tamanho do caractere: 32 pixels
         self.canvas_size = 16 * self.main_char_size + self.main_char_size  # 16 caracteres * 32px + margem (17 * 32px)
+        # Células da grade no Canvas (com a margem das coordenadas) e dentro do atlas ampliado
+        self.layout = GridLayout(self.main_char_size, margin=self.main_char_size)
+        self.atlas_layout = GridLayout(self.main_char_size)
 
         # Cores
         self.COLOR_BG = '#1e1e1e'
@@ -317,6 +731,7 @@ class FontEditorApp(CTk):
         self.COLOR_PIXEL_OFF = '#303030'
         self.COLOR_CURSOR = '#1F6AA5'
         self.COLOR_MODIFIED = '#581845'
+        self.COLOR_DIFF = '#E67E22'
 
         # --- Layout Principal (Grid) ---
         self.grid_rowconfigure(0, weight=1)
@@ -327,10 +742,55 @@ class FontEditorApp(CTk):
         font_frame = CTkFrame(self, fg_color="transparent")
         font_frame.grid(row=0, column=0, padx=10, pady=10, sticky="nswe")
 
+        self.tab_bar = CTkSegmentedButton(font_frame, values=[""], command=self.on_tab_selected)
+        self.tab_bar.pack(padx=5, anchor=W)
+        self.tab_documents = {}  # Rótulo da aba -> FontDocument
+
         self.font_canvas = Canvas(font_frame, width=self.canvas_size, height=self.canvas_size,
                                   bg=self.COLOR_BG, highlightthickness=2, highlightbackground=self.COLOR_CURSOR)
         self.font_canvas.pack(padx=5, pady=5)
 
+        # Painel de desempenho (visível com as medições ligadas)
+        self.hud_label = CTkLabel(font_frame, text="", text_color=self.COLOR_FG, font=("Consolas", 11),
+                                  justify=LEFT)
+        self.hud_id = None
+        self.hud_expected = None
+
+        # Atlas do alfabeto: uma única imagem no Canvas em vez de um retângulo por pixel
+        self.atlas_source = PhotoImage(master=self, width=16 * 8, height=16 * 8)
+        self.cell_source = PhotoImage(master=self, width=8, height=8)
+        # O atlas ampliado e o conteúdo desenhado em cada célula são da aba atual (FontDocument)
+        self.atlas_image = None
+        self.raster = None
+
+        # Fundo de "modificado" persistente por célula (oculto/visível), comum a todas as abas
+        self.modified_items = [self.font_canvas.create_rectangle(*self.layout.cell_rect(i), fill=self.COLOR_MODIFIED,
+                                                                 outline="", state=HIDDEN, tags="modified")
+                               for i in range(256)]
+        self.modified_states = CellStates(256)
+
+        self.atlas_item = self.font_canvas.create_image(self.main_char_size, self.main_char_size, anchor=NW,
+                                                        tags="atlas")
+
+        # Contorno das células diferentes da fonte de comparação (outra aba ou arquivo)
+        self.diff_items = [self.font_canvas.create_rectangle(*self.layout.cell_rect(i, inset=1), width=2,
+                                                             outline=self.COLOR_DIFF, state=HIDDEN, tags="diff")
+                           for i in range(256)]
+        self.diff_states = CellStates(256)
+        self.compare_source = None  # FontDocument ou (nome, dados) de um arquivo
+        self.compare_count = None
+
+        self.cursor_item = self.font_canvas.create_rectangle(0, 0, 0, 0, outline=self.COLOR_CURSOR, width=3,
+                                                             tags="cursor")
+        self.cursor_drawn = None
+        self.info_text = None
+
+        # Seleção retangular (do caractere âncora até o cursor)
+        self.selection_anchor = None
+        self.selection_item = self.font_canvas.create_rectangle(0, 0, 0, 0, outline=self.COLOR_FG, width=2,
+                                                                dash=(4, 2), state=HIDDEN, tags="selection")
+        self.selection_drawn = None
+
         # 2. Área de Informações (Frame direito)
         info_frame = CTkFrame(self, fg_color="transparent")
         info_frame.grid(row=0, column=1, padx=10, pady=10, sticky="n")
@@ -345,58 +805,567 @@ class FontEditorApp(CTk):
             ("ENTER / LMB", "Abrir Editor de Pixel"),
             ("Botão Direito / ENTER (Editor)", "Salvar Edição"),
             ("SPACE (Editor)", "Inverter Pixel"),
+            ("Shift+Setas / Shift+LMB", "Selecionar Bloco"),
+            ("Ctrl+A", "Selecionar Tudo"),
+            ("Ctrl+Z / Ctrl+Y", "Desfazer / Refazer"),
+            ("Ctrl+C / Ctrl+V", "Copiar / Colar (entre abas)"),
+            ("Ctrl+W", "Fechar Aba"),
             ("Ctrl+S", "Salvar Fonte")
         ]
         for key, action in controls:
             CTkLabel(info_frame, text=f"• {key}: {action}", text_color=self.COLOR_FG, font=("Arial", 12),
                      justify=LEFT).pack(anchor=W)
 
+        # Transformações em lote sobre a seleção
+        transform_frame = CTkFrame(info_frame, fg_color="transparent")
+        transform_frame.pack(pady=(20, 0), anchor=W)
+
+        CTkLabel(transform_frame, text="Transformar Seleção:", text_color=self.COLOR_FG,
+                 font=("Arial", 12, "bold")).pack(anchor=W)
+        self.transform_choice = CTkOptionMenu(transform_frame, values=list(self.TRANSFORM_ACTIONS))
+        self.transform_choice.pack(pady=5, fill='x')
+        self.wrap_var = BooleanVar(value=False)
+        CTkCheckBox(transform_frame, text="Deslocar circularmente", variable=self.wrap_var).pack(pady=5, anchor=W)
+        CTkButton(transform_frame, text="Aplicar", command=self.apply_transform).pack(pady=5, fill='x')
+        CTkButton(transform_frame, text="Desfazer", command=self.undo).pack(pady=5, fill='x')
+        CTkButton(transform_frame, text="Refazer", command=self.redo).pack(pady=5, fill='x')
+
+        CTkLabel(transform_frame, text="Comparar com:", text_color=self.COLOR_FG,
+                 font=("Arial", 12, "bold")).pack(pady=(10, 0), anchor=W)
+        self.compare_choice = CTkOptionMenu(transform_frame, values=[self.NO_COMPARE, self.COMPARE_FILE],
+                                            command=self.on_compare_selected)
+        self.compare_choice.pack(pady=5, fill='x')
+
         # 3. Botões de Ação (Abaixo do painel de info)
         button_frame = CTkFrame(info_frame, fg_color="transparent")
         button_frame.pack(pady=20, anchor=W)
 
         CTkButton(button_frame, text="Abrir Nova Fonte", command=self.load_font_dialog).pack(pady=5, fill='x')
-        CTkButton(button_frame, text="Salvar Fonte", command=lambda: self.font.save()).pack(pady=5, fill='x')
+        CTkButton(button_frame, text="Abrir de Pasta...", command=self.open_folder_dialog).pack(pady=5, fill='x')
+        CTkButton(button_frame, text="Fechar Aba", command=self.close_document).pack(pady=5, fill='x')
+        CTkButton(button_frame, text="Salvar Fonte", command=self.save_font).pack(pady=5, fill='x')
         CTkButton(button_frame, text="Salvar Como...", command=self.save_font_as_dialog).pack(pady=5, fill='x')
+        CTkButton(button_frame, text="Exportar...", command=self.export_font_dialog).pack(pady=5, fill='x')
+        self.autosave_var = BooleanVar(value=get_config(AUTOSAVE_KEY) == '1')
+        CTkCheckBox(button_frame, text="Salvar automaticamente", variable=self.autosave_var,
+                    command=self.on_autosave_toggle).pack(pady=5, anchor=W)
+        CTkButton(button_frame, text="Abrir Shapes...", command=self.open_shapes_dialog).pack(pady=5, fill='x')
+        CTkButton(button_frame, text="Prévia SCREEN 2", command=lambda: ScreenPreviewWindow(self, self.font)).pack(
+            pady=5, fill='x')
+
+        self.perf_var = BooleanVar(value=PERF.enabled)
+        CTkCheckBox(button_frame, text="Medir desempenho", variable=self.perf_var,
+                    command=self.on_perf_toggle).pack(pady=5, anchor=W)
+        CTkButton(button_frame, text="Exportar Medições...", command=self.dump_perf_dialog).pack(pady=5, fill='x')
 
         # Botão Encerrar
-        CTkButton(button_frame, text="Encerrar", command=self.destroy, fg_color="#C0392B", hover_color="#E74C3C").pack(
+        CTkButton(button_frame, text="Encerrar", command=self.on_close, fg_color="#C0392B", hover_color="#E74C3C").pack(
             pady=(20, 5), fill='x')
 
+        self.status_label = CTkLabel(info_frame, text="", text_color=self.COLOR_FG, font=("Arial", 12),
+                                     justify=LEFT)
+        self.status_label.pack(anchor=W)
+
         # --- Bindings e Inicialização ---
         self.font_canvas.bind('<Button-1>', self.on_char_click)
         self.bind('<Key>', self.on_key_press)
-        self.bind('<Control-s>', lambda event: self.font.save())
+        self.bind('<Control-s>', lambda event: self.save_font())
+        self.bind('<Control-a>', self.select_all)
+        self.bind('<Control-z>', self.undo)
+        self.bind('<Control-y>', self.redo)
+        self.bind('<Control-Z>', self.redo)  # Ctrl+Shift+Z
+        self.bind('<Control-c>', self.copy_selection)
+        self.bind('<Control-v>', self.paste_clipboard)
+        self.bind('<Control-w>', lambda event: self.close_document())
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.draw_grid()
+        self.draw_cursor()
+        self.add_document(MSXFont(default_font_path))
+        if PERF.enabled:
+            self.start_hud()
+        self.after_idle(self.record_startup)
+
+    def report_problems(self, problems):
+        """Exibe os problemas (nível, mensagem) devolvidos pela leitura/gravação da fonte."""
+        for level, message in problems:
+            if level == 'error':
+                messagebox.showerror("Erro", message)
+            else:
+                messagebox.showwarning("Aviso", message)
+
+    def attach_journal(self, document):
+        """Liga o histórico de uma aba ao diário, oferecendo reaplicar uma sessão interrompida."""
+        font = document.font
+        if font is None:
+            return
+        rows = self.journal.pending(font.filepath, font.data)
+        if rows and messagebox.askyesno(
+                "Recuperar Edições",
+                f"Há {len(rows)} passo(s) de edição não salvos de uma sessão interrompida em "
+                f"'{os.path.basename(font.filepath)}'. Deseja recuperá-los?"):
+            font.modified_chars.update(font.history.replay(rows, font.data))
+            if document is self.document:
+                self.draw_font()
+        else:
+            self.journal.begin(font.filepath, font.data)
+        document.journal_path = font.filepath
+        font.history.on_change = partial(self.on_history_change, document)
+
+    def restart_journal(self, document, saved):
+        """Recomeça o diário de uma aba a partir da cópia `saved`, que acabou de ser gravada.
+
+        As edições feitas enquanto a gravação rodava viram um passo sobre a nova base.
+        """
+        font = document.font
+        target = font.filepath
+        if os.path.abspath(document.journal_path) != os.path.abspath(target):
+            self.journal.clear(document.journal_path)
+        self.journal.begin(target, saved)
+        document.journal_path = target
+        size = font.CHAR_SIZE
+        codes = [code for code in range(font.NUM_CHARS)
+                 if font.data[code * size:(code + 1) * size] != saved[code * size:(code + 1) * size]]
+        if codes:
+            deltas = b''.join(bytes(a ^ b for a, b in zip(font.data[code * size:(code + 1) * size],
+                                                         saved[code * size:(code + 1) * size])) for code in codes)
+            self.journal.append(target, 'do', codes, deltas)
+
+    def on_history_change(self, document, kind, codes, deltas):
+        """Acrescenta cada passo do histórico ao diário (gravado em segundo plano)."""
+        self.journal.append(document.journal_path, kind, codes, deltas)
+        self.schedule_autosave()
+
+    # --- Abas ---
+
+    def add_document(self, font):
+        """Abre uma fonte já carregada em uma nova aba e a exibe."""
+        document = FontDocument(font)
+        self.documents.append(document)
+        self.update_tabs()
+        self.show_document(document)
+        set_config(DEFAULT_FONT_PATH_KEY, font.filepath)
+        # Avisos da leitura (e a oferta de recuperação) vêm depois que a janela é redesenhada
+        if font.problems:
+            self.after_idle(self.report_problems, font.problems)
+        self.after_idle(self.attach_journal, document)
+
+    def find_document(self, filepath):
+        path = os.path.abspath(filepath)
+        return next((document for document in self.documents if os.path.abspath(document.path) == path), None)
+
+    def tab_label(self, document):
+        """Rótulo da aba: o nome do arquivo, com a pasta quando há nomes repetidos."""
+        name = os.path.basename(document.path)
+        if sum(os.path.basename(other.path) == name for other in self.documents) > 1:
+            name = f"{name} ({os.path.basename(os.path.dirname(os.path.abspath(document.path)))})"
+        return name
+
+    def update_tabs(self):
+        self.tab_documents = {self.tab_label(document): document for document in self.documents}
+        self.tab_bar.configure(values=list(self.tab_documents))
+        if self.document is not None:
+            self.tab_bar.set(self.tab_label(self.document))
+        self.compare_choice.configure(values=[self.NO_COMPARE] + list(self.tab_documents) + [self.COMPARE_FILE])
+
+    def on_tab_selected(self, label):
+        document = self.tab_documents.get(label)
+        if document is not None and document is not self.document:
+            self.show_document(document)
+
+    def show_document(self, document):
+        """Exibe uma aba: imediato se a grade dela está no cache, senão uma repintura do atlas."""
+        if document.font is None:
+            # Descartada do cache: relida do disco em segundo plano
+            self.open_font(document.path, document)
+            return
+
+        self.document = document
+        self.font = document.font
+        cached_png = None
+        if document.atlas is None:
+            document.atlas = PhotoImage(master=self, width=16 * self.main_char_size,
+                                        height=16 * self.main_char_size)
+            document.raster = AtlasRaster()
+            cached_png = self.restore_atlas(document)
+        self.atlas_image, self.raster = document.atlas, document.raster
+        self.font_canvas.itemconfigure(self.atlas_item, image=document.atlas)
+        if cached_png is not None:
+            self.paint_atlas(cached_png)
+        self.recent[document] = True
+        self.recent.move_to_end(document, last=False)
+
+        self.tab_bar.set(self.tab_label(document))
         self.draw_font()
         self.update_info_label()
+        self.trim_caches()
+
+    def restore_atlas(self, document):
+        """PNG do atlas de uma fonte sem alterações, se está no cache de miniaturas (senão None).
+
+        As miniaturas são o mesmo atlas 128x128 do editor; se o arquivo não mudou desde
+        que a miniatura foi guardada, a grade aparece sem rasterizar os 256 glifos.
+        """
+        if document.font.modified_chars or self._rgb(self.COLOR_PIXEL_ON) != THUMB_COLOR:
+            return None
+        try:
+            row = cached_thumbnail(config_store().conn, document.path)
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        document.raster.prime(document.font.data)
+        return row[1]
+
+    def trim_caches(self):
+        """Libera as grades e as fontes (sem alterações) das abas menos usadas."""
+        for rank, document in enumerate(list(self.recent)):
+            if rank >= self.ATLAS_CACHE_SIZE:
+                document.atlas = document.raster = None
+            if rank >= self.FONT_CACHE_SIZE and document.font is not None and not document.font.modified_chars:
+                self.journal.clear(document.journal_path)
+                document.font = None
+                del self.recent[document]
+
+    def close_document(self):
+        """Fecha a aba atual (pedindo confirmação se houver alterações não salvas)."""
+        document = self.document
+        if len(self.documents) < 2:
+            return
+        if document.font.modified_chars and not messagebox.askyesno(
+                "Fechar Aba", f"'{os.path.basename(document.path)}' tem alterações não salvas. Fechar assim mesmo?"):
+            return
+        index = self.documents.index(document)
+        self.documents.remove(document)
+        self.recent.pop(document, None)
+        if self.compare_source is document:
+            self.set_comparison(None)
+        self.journal.clear(document.journal_path)
+        self.document = None
+        self.update_tabs()
+        self.show_document(self.documents[min(index, len(self.documents) - 1)])
+
+    # --- Comparação ---
+
+    def on_compare_selected(self, label):
+        """Escolha no menu "Comparar com": nenhuma, uma aba aberta ou um arquivo."""
+        if label == self.NO_COMPARE:
+            self.set_comparison(None)
+        elif label == self.COMPARE_FILE:
+            filepath = filedialog.askopenfilename(title="Comparar com Fonte", filetypes=FONT_FILETYPES)
+            data, _, _, problems = read_font_file(filepath) if filepath else (None, None, None, [])
+            self.report_problems([problem for problem in problems if problem[0] == 'error'])
+            if data is None:
+                self.compare_choice.set(self.NO_COMPARE)
+                self.set_comparison(None)
+                return
+            self.compare_choice.set(os.path.basename(filepath))
+            self.set_comparison((os.path.basename(filepath), bytes(data)))
+        else:
+            self.set_comparison(self.tab_documents.get(label))
+
+    def set_comparison(self, source):
+        self.compare_source = source
+        self.compare_count = None
+        if source is None:
+            self.compare_choice.set(self.NO_COMPARE)
+        self.draw_diff()
+
+    def draw_diff(self):
+        """Contorna as células diferentes da fonte de comparação (só as que mudaram de estado)."""
+        from msx_diff import diff_fonts  # Importa o NumPy: só quando há comparação
+
+        source = self.compare_source
+        if isinstance(source, FontDocument):
+            if source.font is None:
+                # A aba comparada saiu do cache: a comparação é desfeita
+                self.set_comparison(None)
+                return
+            name, other = os.path.basename(source.path), source.font.data
+        elif source is not None:
+            name, other = source
+        different = set() if source is None else {code for code, _, _ in diff_fonts(self.font.data, other)}
+
+        for i, flag in self.diff_states.update([i in different for i in range(self.font.NUM_CHARS)]):
+            self.font_canvas.itemconfigure(self.diff_items[i], state=NORMAL if flag else HIDDEN)
+
+        if source is not None and len(different) != self.compare_count:
+            self.compare_count = len(different)
+            self.status_label.configure(text=f"{len(different)} caractere(s) diferente(s) de '{name}'.")
+
+    def copy_selection(self, event=None):
+        """Copia os caracteres selecionados (para colar nesta ou em outra aba)."""
+        codes = self.selected_codes()
+        self.clipboard = (codes, bytes(self.font.data))
+        self.status_label.configure(text=f"{len(codes)} caractere(s) copiado(s).")
+
+    def paste_clipboard(self, event=None):
+        """Cola os caracteres copiados a partir do cursor, em um único lote (um passo de desfazer)."""
+        if self.clipboard is None:
+            return
+        codes, source = self.clipboard
+        if self.font.copy_glyphs(source, codes, target=self.selected_char_code):
+            self.draw_font()
+
+    def undo(self, event=None):
+        """Desfaz a última edição ou transformação."""
+        if self.font.undo():
+            self.draw_font()
+
+    def redo(self, event=None):
+        """Refaz a última edição desfeita."""
+        if self.font.redo():
+            self.draw_font()
+
+    def on_close(self):
+        """Encerra o editor; o diário da sessão só é apagado em um encerramento normal."""
+        self.cancel_autosave()
+        self.saver.close()  # Termina as gravações já pedidas
+        self.load_pool.shutdown(wait=False, cancel_futures=True)
+        for document in self.documents:
+            self.journal.clear(document.journal_path)
+        self.journal.close()
+        # A próxima abertura começa pela aba atual, com a grade já pronta no cache
+        if self.document is not None:
+            set_config(DEFAULT_FONT_PATH_KEY, self.document.path)
+            self.remember_atlas(self.document)
+        close_config()
+        if PERF.enabled and os.environ.get(PERF_DUMP_ENV):
+            PERF.dump(os.environ[PERF_DUMP_ENV])
+        self.destroy()
+
+    def remember_atlas(self, document):
+        """Guarda a grade da fonte (como lida do disco) no cache de miniaturas, se ainda não está lá."""
+        conn = config_store().conn
+        if cached_thumbnail(conn, document.path) is not None:
+            return
+        png, fmt, _ = render_thumbnail(document.path)
+        if png is not None:
+            try:
+                store_thumbnail(conn, document.path, fmt, png)
+            except (OSError, sqlite3.Error):
+                pass  # Só um cache: a próxima abertura rasteriza a grade
+
+    # --- Medições de Desempenho ---
+
+    def record_startup(self):
+        """Registra a partida a frio (da importação do módulo até o primeiro momento ocioso da janela)."""
+        startup_ms = (time.perf_counter() - IMPORT_STARTED) * 1000
+        PERF.gauge('startup_ms', round(startup_ms, 1))
+        if PERF.enabled and startup_ms > STARTUP_BUDGET_MS:
+            self.status_label.configure(text=f"Abertura lenta: {startup_ms:.0f} ms (meta: {STARTUP_BUDGET_MS} ms).")
+
+    def on_perf_toggle(self):
+        PERF.enabled = self.perf_var.get()
+        if PERF.enabled:
+            self.start_hud()
+        else:
+            self.stop_hud()
+
+    def start_hud(self):
+        self.hud_label.pack(padx=5, anchor=W)
+        if self.hud_id is None:
+            self.hud_expected = time.perf_counter() + HUD_INTERVAL_MS / 1000
+            self.hud_id = self.after(HUD_INTERVAL_MS, self.update_hud)
+
+    def stop_hud(self):
+        if self.hud_id is not None:
+            self.after_cancel(self.hud_id)
+            self.hud_id = None
+        self.hud_label.pack_forget()
+
+    def update_hud(self):
+        """Mostra o tempo do último quadro e o atraso do laço de eventos.
+
+        O atraso é quanto este próprio callback chegou depois do horário agendado: o
+        tempo que eventos e redesenhos anteriores ocuparam o laço do Tk.
+        """
+        now = time.perf_counter()
+        PERF.record('event_loop_lag', max(0.0, now - self.hud_expected))
+        PERF.gauge('FontEditorApp.canvas_items', len(self.font_canvas.find_all()))
+
+        frame = PERF.histogram('FontEditorApp.draw_font')
+        lag = PERF.histogram('event_loop_lag')
+        self.hud_label.configure(
+            text=f"quadro {frame.last * 1000:.2f} ms (p95 {frame.percentile(0.95) * 1000:.2f}) | "
+                 f"atraso {lag.last * 1000:.1f} ms (p95 {lag.percentile(0.95) * 1000:.1f}) | "
+                 f"itens {PERF.gauges['FontEditorApp.canvas_items']['value']} | "
+                 f"abertura {PERF.gauges.get('startup_ms', {}).get('value', 0):.0f} ms")
+
+        self.hud_expected = time.perf_counter() + HUD_INTERVAL_MS / 1000
+        self.hud_id = self.after(HUD_INTERVAL_MS, self.update_hud)
+
+    def dump_perf_dialog(self):
+        """Grava as medições atuais em JSON, para comparação posterior."""
+        filepath = filedialog.asksaveasfilename(defaultextension=".json", filetypes=PERF_FILETYPES,
+                                                title="Exportar Medições de Desempenho")
+        if filepath:
+            try:
+                PERF.dump(filepath)
+            except OSError as e:
+                messagebox.showerror("Erro", f"Não foi possível gravar as medições: {e}")
+                return
+            self.status_label.configure(text=f"Medições gravadas: {os.path.basename(filepath)}")
 
     def load_font_dialog(self):
         """Abre uma caixa de diálogo para carregar uma nova fonte."""
         filepath = filedialog.askopenfilename(
             title="Abrir Arquivo de Fonte (.ALF)",
-            filetypes=[("Arquivos de Alfabeto MSX", "*.ALF"), ("Todos os arquivos", "*.*")]
+            filetypes=FONT_FILETYPES
         )
         if filepath:
-            try:
-                self.font = MSXFont(filepath)
-                set_config(DEFAULT_FONT_PATH_KEY, filepath)
-                self.draw_font()
-                self.update_info_label()
-            except Exception as e:
-                messagebox.showerror("Erro ao Carregar", f"Não foi possível carregar a fonte: {e}")
+            self.open_font(filepath)
+
+    def open_folder_dialog(self):
+        """Escolhe uma pasta e mostra as miniaturas de todos os seus alfabetos."""
+        folder = filedialog.askdirectory(title="Abrir Pasta de Alfabetos")
+        if folder:
+            FontBrowserWindow(self, folder, self.open_font)
+
+    def open_font(self, filepath, document=None):
+        """Carrega uma fonte em segundo plano, em uma nova aba (ou relendo a aba `document`).
+
+        Se a fonte já está aberta, apenas troca para a aba dela.
+        """
+        if document is None:
+            document = self.find_document(filepath)
+            if document is not None:
+                self.show_document(document)
+                return
+        self.status_label.configure(text=f"Abrindo {os.path.basename(filepath)}...")
+        self.loading = self.load_pool.submit(MSXFont, filepath)
+        self.after(SAVE_POLL_MS, self.poll_font_load, self.loading, document)
+
+    def poll_font_load(self, future, document):
+        """Espera (sem bloquear) a leitura pedida por open_font()."""
+        if future is not self.loading:
+            return  # Outra fonte foi pedida depois desta
+        if not future.done():
+            self.after(SAVE_POLL_MS, self.poll_font_load, future, document)
+            return
+        self.loading = None
+        self.status_label.configure(text="")
+        try:
+            font = future.result()
+        except Exception as e:
+            messagebox.showerror("Erro ao Carregar", f"Não foi possível carregar a fonte: {e}")
+            return
+        if document is None:
+            self.add_document(font)
+        elif document in self.documents:
+            document.font = font
+            self.show_document(document)
+            self.after_idle(self.attach_journal, document)
+
+    def save_font(self, filepath=None, automatic=False, document=None):
+        """Salva a fonte da aba atual (ou de `document`) em segundo plano.
+
+        O resultado aparece na linha de estado.
+        """
+        document = document or self.document
+        font = document.font
+        saved = bytes(font.data)  # A mesma cópia que a gravação leva: a nova base do diário, se der certo
+        self.saver.submit(font, filepath, callback=partial(self.on_font_saved, document, automatic, saved))
+        self.status_label.configure(text="Salvando...")
+        if self.save_poll_id is None:
+            self.save_poll_id = self.after(SAVE_POLL_MS, self.poll_saves)
+
+    def poll_saves(self):
+        """Conclui as gravações terminadas e continua verificando enquanto houver pendentes."""
+        self.save_poll_id = None
+        self.saver.poll()
+        if self.saver.pending:
+            self.save_poll_id = self.after(SAVE_POLL_MS, self.poll_saves)
+
+    def on_font_saved(self, document, automatic, saved, problems):
+        """Informa o resultado de uma gravação em segundo plano.
+
+        Só uma gravação bem-sucedida muda a base do diário: com erro, o diário da
+        sessão continua valendo sobre o arquivo que ficou no disco.
+        """
+        errors = [message for level, message in problems if level == 'error']
+        if errors:
+            self.status_label.configure(text="Erro ao salvar.")
+            if not automatic:
+                messagebox.showerror("Erro de Gravação", errors[0])
+            return
+        if document in self.documents and document.font is not None:
+            self.restart_journal(document, saved)
+        if problems and not automatic:  # Avisos (ex.: dados que o formato não guarda) não impedem a gravação
+            self.report_problems(problems)
+        prefix = "Salvo automaticamente" if automatic else "Fonte salva"
+        self.status_label.configure(text=f"{prefix}: {os.path.basename(document.font.filepath)}")
+        if document.path != document.font.filepath:  # Salvar Como... renomeia a aba
+            document.path = document.font.filepath
+            self.update_tabs()
+        if document is self.document:
+            self.draw_font()
+            self.update_info_label()
+
+    def on_autosave_toggle(self):
+        """Guarda a opção de salvamento automático e aplica a mudança."""
+        set_config(AUTOSAVE_KEY, '1' if self.autosave_var.get() else '0')
+        if self.autosave_var.get():
+            self.schedule_autosave()
+        else:
+            self.cancel_autosave()
+
+    def schedule_autosave(self):
+        """(Re)inicia a espera do salvamento automático a cada edição."""
+        if not self.autosave_var.get():
+            return
+        self.cancel_autosave()
+        self.autosave_id = self.after(AUTOSAVE_DELAY_MS, self.autosave)
+
+    def cancel_autosave(self):
+        if self.autosave_id is not None:
+            self.after_cancel(self.autosave_id)
+            self.autosave_id = None
+
+    def autosave(self):
+        """Salva as fontes abertas que tiverem alterações, sem caixas de diálogo."""
+        self.autosave_id = None
+        for document in self.documents:
+            if document.font is not None and document.font.modified_chars:
+                self.save_font(automatic=True, document=document)
 
     def save_font_as_dialog(self):
         """Abre uma caixa de diálogo para salvar a fonte com um novo nome."""
         filepath = filedialog.asksaveasfilename(
             defaultextension=".ALF",
-            filetypes=[("Arquivos de Alfabeto MSX", "*.ALF"), ("Todos os arquivos", "*.*")],
+            filetypes=FONT_FILETYPES,
             title="Salvar Fonte Como"
         )
         if filepath:
-            self.font.save(filepath)
+            self.save_font(filepath)
+
+    def export_font_dialog(self):
+        """Exporta a fonte para BDF, PSF2, C, assembler Z80 ou PNG (pela extensão escolhida)."""
+        from msx_export import EXPORTERS, export_font  # Só quando usado: não pesa na abertura
 
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=".bdf",
+            filetypes=[(exporter.description, f"*{exporter.extension}") for exporter in EXPORTERS.values()],
+            title="Exportar Fonte"
+        )
+        if filepath:
+            problems = export_font(self.font.data, filepath)
+            self.report_problems(problems)
+            if not problems:
+                self.status_label.configure(text=f"Exportado: {os.path.basename(filepath)}")
+
+    def open_shapes_dialog(self):
+        """Abre um banco de shapes (.SHP) no navegador de miniaturas."""
+        filepath = filedialog.askopenfilename(title="Abrir Banco de Shapes (.SHP)", filetypes=SHAPE_FILETYPES)
+        if filepath:
+            bank = ShapeBank(filepath)
+            self.report_problems(bank.problems)
+            if len(bank):
+                ShapeBrowserWindow(self, bank)
+            elif not bank.problems:
+                messagebox.showinfo("Shapes", "O banco de shapes está vazio.")
+
+    @timed()
     def draw_grid(self):
         """Desenha a grade 16x16 e as coordenadas hexadecimais (0-F)."""
         start_offset = self.main_char_size
@@ -422,59 +1391,44 @@ class FontEditorApp(CTk):
                 self.font_canvas.create_text(start_offset / 2, text_y, text=f'{i:X}', fill=self.COLOR_CURSOR,
                                              font=("Consolas", 10), tags="coords")
 
-    def draw_font(self):
-        """Desenha todos os 256 caracteres no Canvas principal."""
-        self.font_canvas.delete("char_pixels")
-
-        start_offset = self.main_char_size
-
-        for i in range(self.font.NUM_CHARS):
-            row = i // 16
-            col = i % 16
-
-            x_start = start_offset + col * self.main_char_size
-            y_start = start_offset + row * self.main_char_size
-
-            # Desenha o fundo de "modificado"
-            if i in self.font.modified_chars:
-                self.font_canvas.create_rectangle(x_start, y_start, x_start + self.main_char_size,
-                                                  y_start + self.main_char_size,
-                                                  fill=self.COLOR_MODIFIED, outline="", tags="char_pixels")
-
-            # Desenha os pixels do caractere
-            pattern = self.font.get_char_pattern(i)
-            if pattern:
-                for y in range(8):
-                    byte_data = pattern[y]
-                    for x in range(8):
-                        if (byte_data >> (7 - x)) & 1:
-                            # Desenha o pixel ampliado (agora 4x4)
-                            px = x_start + x * self.char_display_scale
-                            py = y_start + y * self.char_display_scale
-                            self.font_canvas.create_rectangle(
-                                px, py,
-                                px + self.char_display_scale, py + self.char_display_scale,
-                                fill=self.COLOR_PIXEL_ON, outline="", tags="char_pixels"
-                            )
-
-        self.draw_cursor()
+        # A grade fica abaixo das camadas de "modificado", do atlas e do cursor
+        self.font_canvas.tag_lower("grid")
+
+    @timed()
+    def draw_font(self, force=False):
+        """Redesenha apenas as células cujo conteúdo ou marcação de "modificado" mudou."""
+        modified = self.font.modified_chars
+        for i, flag in self.modified_states.update([i in modified for i in range(self.font.NUM_CHARS)]):
+            self.font_canvas.itemconfigure(self.modified_items[i], state=NORMAL if flag else HIDDEN)
+
+        if self.compare_source is not None:
+            self.draw_diff()
+
+        atlas_png, cells = self.raster.render(self.font.data, self._rgb(self.COLOR_PIXEL_ON), force)
+        if atlas_png is not None:
+            self.paint_atlas(atlas_png)
+        for i, png in cells:
+            self.cell_source.configure(data=base64.b64encode(png).decode('ascii'), format='png')
+            self.tk.call(self.atlas_image, 'copy', self.cell_source, '-to', *self.atlas_layout.cell_origin(i),
+                         '-zoom', self.char_display_scale, '-compositingrule', 'set')
+
+    def paint_atlas(self, png):
+        """Repintura em lote: atlas 128x128 em escala 1:1, ampliado pelo Tk."""
+        self.atlas_source.configure(data=base64.b64encode(png).decode('ascii'), format='png')
+        self.tk.call(self.atlas_image, 'copy', self.atlas_source,
+                     '-zoom', self.char_display_scale, '-compositingrule', 'set')
+
+    def _rgb(self, color):
+        """Converte um nome/código de cor do Tk para uma tupla RGB de 8 bits."""
+        return tuple(v >> 8 for v in self.winfo_rgb(color))
 
     def draw_cursor(self):
-        """Desenha o retângulo de seleção (cursor) no caractere atual."""
-        self.font_canvas.delete("cursor")
-
-        row = self.selected_char_code // 16
-        col = self.selected_char_code % 16
-
-        start_offset = self.main_char_size
-        x_start = start_offset + col * self.main_char_size
-        y_start = start_offset + row * self.main_char_size
+        """Posiciona o retângulo de seleção (cursor) no caractere atual."""
+        if self.cursor_drawn == self.selected_char_code:
+            return
 
-        self.font_canvas.create_rectangle(
-            x_start, y_start,
-            x_start + self.main_char_size, y_start + self.main_char_size,
-            outline=self.COLOR_CURSOR, width=3, tags="cursor"
-        )
+        self.font_canvas.coords(self.cursor_item, *self.layout.cell_rect(self.selected_char_code))
+        self.cursor_drawn = self.selected_char_code
 
     def update_info_label(self):
         """Atualiza o label com as informações do caractere selecionado."""
@@ -484,17 +1438,65 @@ class FontEditorApp(CTk):
 
         char_repr = chr(code) if 32 <= code <= 126 else f'<{code}>'
 
-        self.info_label.configure(text=
-                                  f"Arquivo: {os.path.basename(self.font.filepath)}\n"
-                                  f"Caractere (Dec): {code}\n"
-                                  f"Caractere (Hex): 0x{code:02X}\n"
-                                  f"Representação: '{char_repr}'\n\n"
-                                  f"Coordenadas (Hex):\n"
-                                  f"Linha: {row:X} (0x{row:02X})\n"
-                                  f"Coluna: {col:X} (0x{col:02X})"
-                                  )
-
-    def move_cursor(self, dx, dy):
+        text = (f"Arquivo: {os.path.basename(self.font.filepath)}\n"
+                f"Formato: {self.font.format.name.upper()}\n"
+                f"Caractere (Dec): {code}\n"
+                f"Caractere (Hex): 0x{code:02X}\n"
+                f"Representação: '{char_repr}'\n\n"
+                f"Coordenadas (Hex):\n"
+                f"Linha: {row:X} (0x{row:02X})\n"
+                f"Coluna: {col:X} (0x{col:02X})")
+        if text != self.info_text:
+            self.info_label.configure(text=text)
+            self.info_text = text
+
+    def draw_selection(self):
+        """Mostra o retângulo da seleção (oculto quando só o caractere do cursor está selecionado)."""
+        anchor = self.selection_anchor
+        current = None if anchor is None or anchor == self.selected_char_code else (anchor, self.selected_char_code)
+        if current == self.selection_drawn:
+            return
+
+        if current is None:
+            self.font_canvas.itemconfigure(self.selection_item, state=HIDDEN)
+        else:
+            self.font_canvas.coords(self.selection_item, *self.layout.span_rect(*current))
+            self.font_canvas.itemconfigure(self.selection_item, state=NORMAL)
+        self.selection_drawn = current
+
+    def selected_codes(self):
+        """Códigos da seleção atual (o retângulo âncora-cursor, ou apenas o caractere do cursor)."""
+        anchor = self.selected_char_code if self.selection_anchor is None else self.selection_anchor
+        return grid_selection(anchor, self.selected_char_code)
+
+    def set_selection(self, new_code, extend=False):
+        """Move o cursor; com extend=True a seleção vai da âncora até o novo caractere."""
+        if extend:
+            if self.selection_anchor is None:
+                self.selection_anchor = self.selected_char_code
+        else:
+            self.selection_anchor = None
+
+        self.selected_char_code = new_code
+        self.draw_cursor()
+        self.draw_selection()
+        self.update_info_label()
+
+    def select_all(self, event=None):
+        """Seleciona os 256 caracteres."""
+        self.selection_anchor = 0
+        self.set_selection(255, extend=True)
+
+    def apply_transform(self):
+        """Aplica a transformação escolhida a todos os caracteres selecionados, em um único lote."""
+        operation, params = self.TRANSFORM_ACTIONS[self.transform_choice.get()]
+        if operation == 'shift':
+            params = dict(params, wrap=self.wrap_var.get())
+
+        if self.font.transform(operation, self.selected_codes(), **params):
+            self.draw_font()
+
+    def move_cursor(self, dx, dy, extend=False):
         """Move o cursor de seleção com wrap-around 16x16."""
         current_row = self.selected_char_code // 16
         current_col = self.selected_char_code % 16
@@ -502,44 +1504,37 @@ class FontEditorApp(CTk):
         new_row = (current_row + dy) % 16
         new_col = (current_col + dx) % 16
 
-        self.selected_char_code = new_row * 16 + new_col
-        self.draw_cursor()
-        self.update_info_label()
+        self.set_selection(new_row * 16 + new_col, extend)
 
+    @timed()
     def on_key_press(self, event):
         """Trata eventos de teclado para navegação e edição."""
         # Se o Canvas estiver focado (ou o mouse sobre ele)
         if self.winfo_containing(self.winfo_pointerx(), self.winfo_pointery()) is self.font_canvas:
+            extend = bool(event.state & 0x0001)  # Shift pressionado
             if event.keysym == 'Up':
-                self.move_cursor(0, -1)
+                self.move_cursor(0, -1, extend)
             elif event.keysym == 'Down':
-                self.move_cursor(0, 1)
+                self.move_cursor(0, 1, extend)
             elif event.keysym == 'Left':
-                self.move_cursor(-1, 0)
+                self.move_cursor(-1, 0, extend)
             elif event.keysym == 'Right':
-                self.move_cursor(1, 0)
+                self.move_cursor(1, 0, extend)
             elif event.keysym == 'Return':
                 self.open_editor_window()
 
+    @timed()
     def on_char_click(self, event):
         """Trata o clique do mouse no Canvas principal."""
-        start_offset = self.main_char_size
+        new_code = self.layout.cell_at(event.x, event.y)
 
-        if event.x < start_offset or event.y < start_offset:
-            return
-
-        col = (event.x - start_offset) // self.main_char_size
-        row = (event.y - start_offset) // self.main_char_size
-
-        if 0 <= row < 16 and 0 <= col < 16:
-            new_code = row * 16 + col
-
-            if new_code == self.selected_char_code:
+        if new_code is not None:
+            if event.state & 0x0001:  # Shift+clique estende a seleção
+                self.set_selection(new_code, extend=True)
+            elif new_code == self.selected_char_code and self.selection_anchor is None:
                 self.open_editor_window()
             else:
-                self.selected_char_code = new_code
-                self.draw_cursor()
-                self.update_info_label()
+                self.set_selection(new_code)
 
     def open_editor_window(self):
         """Abre a janela de edição 8x8 para o caractere selecionado."""
@@ -551,8 +1546,8 @@ class FontEditorApp(CTk):
     def on_editor_close(self, char_code, new_pattern):
         """Callback chamado quando a janela de edição é fechada."""
         if new_pattern is not None:
-            old_pattern = list(self.font.get_char_pattern(char_code))
-            if old_pattern != new_pattern:
+            old_pattern = bytes(self.font.get_char_pattern(char_code))
+            if old_pattern != bytes(new_pattern):
                 self.font.update_char_pattern(char_code, new_pattern)
                 self.draw_font()
 
@@ -560,6 +1555,11 @@ class FontEditorApp(CTk):
 # --- Execução Principal ---
 
 if __name__ == '__main__':
+    # Com argumentos, executa os comandos em lote (sem interface gráfica)
+    if len(sys.argv) > 1:
+        import msx_batch
+        sys.exit(msx_batch.main(sys.argv[1:]))
+
     # 1. Configuração e obtenção do caminho da fonte padrão
     default_font_path = setup_config()
 
@@ -0,0 +1,496 @@
+import os
+import struct
+import tempfile
+from functools import lru_cache
+
+from msx_compress import CompressionError, lz_decode, lz_encode, rle_decode, rle_encode
+
+# --- Constantes dos Formatos de Alfabeto ---
+CHAR_SIZE = 8
+NUM_CHARS = 256
+DATA_SIZE = NUM_CHARS * CHAR_SIZE
+
+BSAVE_ID = 0xFE
+BSAVE_HEADER_SIZE = 7
+GRAPHOS_ADDRESS = 0x9200
+DEFAULT_HEADER = struct.pack('<BHHH', BSAVE_ID, GRAPHOS_ADDRESS, GRAPHOS_ADDRESS + DATA_SIZE - 1, GRAPHOS_ADDRESS)
+
+FONT_EXTENSIONS = ('.alf', '.fnt', '.alr', '.alz')
+
+SECTOR_SIZE = 512  # Setor de disco: a menor escrita que o dispositivo faz por inteiro ou não faz
+RECORD_SIZE = 128  # Registro de disco: arquivos EDITOR ocupam 17 registros (2176 bytes)
+EDITOR_FILE_SIZE = -(-(BSAVE_HEADER_SIZE + DATA_SIZE) // RECORD_SIZE) * RECORD_SIZE
+
+FNT_HEADER_SIZE = 256  # 8 bytes de cabeçalho + larguras dos códigos 8..255
+FNT_FIRST_CHAR = 32
+FNT_DEFAULT_HEADER = bytes((0x02, 0x08, 0x00, 0x01, 0x08, 0x01, 0x00, 0x00))
+FNT_SPACE_WIDTH = 3
+
+# Alfabetos comprimidos: BSAVE do fluxo, carregado em uma área livre e descomprimido para &H9200
+PACKED_ADDRESS = 0xC000
+
+MSG_BAD_HEADER = ("O cabeçalho do arquivo não corresponde ao padrão Graphos III ($9200-$99FF). "
+                  "O arquivo será lido, mas a gravação usará o cabeçalho padrão.")
+
+
+# --- Registro de Formatos ---
+
+FORMATS = {}
+
+
+def register_format(cls):
+    """Registra um formato (decorador de classe); a instância fica em FORMATS pelo nome."""
+    FORMATS[cls.name] = cls()
+    return cls
+
+
+class FontFormat:
+    """Leitor/gravador de um formato de alfabeto.
+
+    sniff() devolve uma pontuação (0 = não reconhece) a partir do conteúdo e da extensão;
+    read() devolve (dados, info, problemas) sem copiar o conteúdo, onde os dados são um
+    memoryview de 2048 bytes, info guarda o que precisa ser preservado na gravação e
+    problemas é uma lista de (nível, mensagem), com nível 'error' ou 'warning'.
+    """
+
+    name = ''
+    description = ''
+    extensions = ()
+
+    def sniff(self, content, ext):
+        return 0
+
+    def read(self, content):
+        raise NotImplementedError
+
+    def write(self, data, info=None):
+        """Retorna o conteúdo completo do arquivo para os 2048 bytes de dados."""
+        raise NotImplementedError
+
+    def write_problems(self, data, info=None):
+        """Avisos sobre o que write() não consegue guardar dos dados (lista de (nível, mensagem))."""
+        return []
+
+    def glyph_offset(self, code, info=None):
+        """Posição no arquivo dos 8 bytes do caractere `code`, ou None se o arquivo não
+        puder ser atualizado glifo a glifo (nesse caso a gravação reescreve tudo)."""
+        return None
+
+    def patches(self, data, info, codes):
+        """Trechos (posição, bytes) que atualizam os caracteres `codes` no arquivo gravado com
+        `info`, ou None se algum deles não puder ser atualizado no lugar."""
+        chunks = []
+        for code in codes:
+            offset = self.glyph_offset(code, info)
+            if offset is None:
+                return None
+            chunks.append((offset, bytes(data[code * CHAR_SIZE:(code + 1) * CHAR_SIZE])))
+        return chunks
+
+    def saved_info(self, data, info):
+        """O info que descreve o arquivo depois de gravados os dados `data` com `info`."""
+        return info
+
+
+def _bsave_header(content):
+    """Decodifica o cabeçalho BSAVE (início, fim, execução) ou retorna None."""
+    if len(content) < BSAVE_HEADER_SIZE or content[0] != BSAVE_ID:
+        return None
+    return struct.unpack_from('<HHH', content, 1)
+
+
+@register_format
+class ComumFormat(FontFormat):
+    """COMUM: arquivo BSAVE com os 2048 bytes do alfabeto (2055 bytes, em &H9200)."""
+
+    name = 'comum'
+    description = "Graphos III COMUM (BSAVE, 2055 bytes)"
+    extensions = ('.alf',)
+
+    def sniff(self, content, ext):
+        header = _bsave_header(content)
+        if header is None or len(content) < BSAVE_HEADER_SIZE + DATA_SIZE:
+            return 0
+        start, end, _ = header
+        if len(content) == BSAVE_HEADER_SIZE + DATA_SIZE:
+            return 100
+        # O alfabeto em &H9200-&H99FF seguido de sobra de disco
+        if (start, end) == (GRAPHOS_ADDRESS, GRAPHOS_ADDRESS + DATA_SIZE - 1):
+            return 60
+        # Outro endereço só com o tamanho exato de uma tabela de padrões: cópia da VRAM
+        # (ex.: BSAVE de &H0000 a &H0800, que inclui o byte final); programas e telas ficam de fora
+        if end - start in (DATA_SIZE - 1, DATA_SIZE) and len(content) == BSAVE_HEADER_SIZE + end - start + 1:
+            return 60
+        return 0
+
+    def read(self, content):
+        problems = []
+        if bytes(content[:BSAVE_HEADER_SIZE]) != DEFAULT_HEADER:
+            problems.append(('warning', MSG_BAD_HEADER))
+        return content[BSAVE_HEADER_SIZE:BSAVE_HEADER_SIZE + DATA_SIZE], {}, problems
+
+    def write(self, data, info=None):
+        return DEFAULT_HEADER + bytes(data)
+
+    def glyph_offset(self, code, info=None):
+        return BSAVE_HEADER_SIZE + code * CHAR_SIZE
+
+
+@register_format
+class EditorFormat(ComumFormat):
+    """EDITOR: o mesmo BSAVE completado até o fim do último registro de 128 bytes (2176 bytes).
+
+    O manual (III/GRAPHOS.TXT) só diz que o formato segue o padrão do Sistema Editor de
+    Adventures; nos arquivos existentes ele é o BSAVE do alfabeto seguido de lixo de
+    disco até completar 17 registros. O preenchimento é ignorado na leitura e gravado
+    com zeros.
+    """
+
+    name = 'editor'
+    description = "Graphos III EDITOR (BSAVE em registros de 128 bytes, 2176 bytes)"
+
+    def sniff(self, content, ext):
+        if len(content) != EDITOR_FILE_SIZE:
+            return 0
+        return 90 if _bsave_header(content) is not None else 40
+
+    def read(self, content):
+        data, info, problems = super().read(content)
+        if _bsave_header(content) is None:
+            problems = [('warning', "Cabeçalho BSAVE ausente ou corrompido: os primeiros caracteres "
+                                    "podem estar danificados.")]
+        return data, info, problems
+
+    def write(self, data, info=None):
+        content = super().write(data, info)
+        return content + bytes(EDITOR_FILE_SIZE - len(content))
+
+
+@register_format
+class RawFormat(FontFormat):
+    """Cópia direta dos 2048 bytes da tabela de padrões, sem cabeçalho."""
+
+    name = 'raw'
+    description = "Padrões sem cabeçalho (2048 bytes)"
+    extensions = ('.bin', '.raw')
+
+    def sniff(self, content, ext):
+        return 50 if len(content) == DATA_SIZE else 0
+
+    def read(self, content):
+        return content[:DATA_SIZE], {}, []
+
+    def write(self, data, info=None):
+        return bytes(data)
+
+    def glyph_offset(self, code, info=None):
+        return code * CHAR_SIZE
+
+
+def glyph_width(glyph):
+    """Largura proporcional de um glifo: posição da última coluna acesa + 1 (bit 7 é a coluna 0)."""
+    columns = 0
+    for byte in glyph:
+        columns |= byte
+    return CHAR_SIZE - ((columns & -columns).bit_length() - 1) if columns else FNT_SPACE_WIDTH
+
+
+@register_format
+class FntFormat(FontFormat):
+    """FNT: tabela de larguras (proporcional) de 256 bytes seguida dos caracteres 32 a 255."""
+
+    name = 'fnt'
+    description = "Alfabeto proporcional .FNT (2048 bytes, caracteres 32-255)"
+    extensions = ('.fnt',)
+
+    def sniff(self, content, ext):
+        if len(content) != DATA_SIZE:
+            return 0
+        widths = bytes(content[CHAR_SIZE:FNT_HEADER_SIZE])
+        if any(width > CHAR_SIZE for width in widths):
+            return 0
+        # Os caracteres imprimíveis (exceto o espaço) precisam ter largura definida
+        if not all(widths[FNT_FIRST_CHAR + 1 - CHAR_SIZE:127 - CHAR_SIZE]):
+            return 0
+        return 80 if ext == '.fnt' else 55
+
+    def read(self, content):
+        data = bytearray(DATA_SIZE)
+        data[FNT_FIRST_CHAR * CHAR_SIZE:] = content[FNT_HEADER_SIZE:]
+        # Os glifos lidos servem de referência para saber quais larguras recalcular
+        info = {'fnt_header': bytes(content[:FNT_HEADER_SIZE]), 'fnt_glyphs': bytes(data)}
+        return memoryview(data), info, []
+
+    def write(self, data, info=None):
+        return bytes(self.header(data, info)) + bytes(data[FNT_FIRST_CHAR * CHAR_SIZE:])
+
+    def write_problems(self, data, info=None):
+        lost = [code for code in range(FNT_FIRST_CHAR) if any(data[code * CHAR_SIZE:(code + 1) * CHAR_SIZE])]
+        if not lost:
+            return []
+        codes = ', '.join(str(code) for code in lost)
+        return [('warning', f"O formato .FNT não guarda os caracteres 0 a 31; os desenhos do(s) código(s) "
+                            f"{codes} não foram salvos.")]
+
+    def glyph_offset(self, code, info=None):
+        # Sem a tabela de larguras original, ela é recalculada a partir dos desenhos
+        if not (info or {}).get('fnt_header') or code < FNT_FIRST_CHAR:
+            return None
+        return FNT_HEADER_SIZE + (code - FNT_FIRST_CHAR) * CHAR_SIZE
+
+    def patches(self, data, info, codes):
+        chunks = super().patches(data, info, codes)
+        if chunks is None:
+            return None
+        # A largura de cada caractere alterado fica no byte de posição `code` do cabeçalho
+        header = self.header(data, info)
+        stored = info['fnt_header']
+        return chunks + [(code, bytes((header[code],))) for code in codes if header[code] != stored[code]]
+
+    def saved_info(self, data, info):
+        return {'fnt_header': bytes(self.header(data, info)), 'fnt_glyphs': bytes(data)}
+
+    def header(self, data, info=None):
+        """Tabela de larguras a gravar: a original, com a largura dos caracteres redesenhados
+        (os que diferem de info['fnt_glyphs']) recalculada; sem original, default_header()."""
+        info = info or {}
+        if not info.get('fnt_header'):
+            return self.default_header(data)
+        header = bytearray(info['fnt_header'])
+        glyphs = info.get('fnt_glyphs')
+        if glyphs is not None:
+            for code in range(len(FNT_DEFAULT_HEADER), NUM_CHARS):
+                glyph = data[code * CHAR_SIZE:(code + 1) * CHAR_SIZE]
+                if glyph != glyphs[code * CHAR_SIZE:(code + 1) * CHAR_SIZE]:
+                    header[code] = glyph_width(glyph)
+        return header
+
+    @staticmethod
+    def default_header(data):
+        """Calcula a tabela de larguras a partir da coluna mais à direita usada por cada caractere."""
+        header = bytearray(FNT_HEADER_SIZE)
+        header[:len(FNT_DEFAULT_HEADER)] = FNT_DEFAULT_HEADER
+        for code in range(len(FNT_DEFAULT_HEADER), NUM_CHARS):
+            header[code] = glyph_width(data[code * CHAR_SIZE:(code + 1) * CHAR_SIZE])
+        return header
+
+
+class PackedFormat(FontFormat):
+    """Base dos alfabetos comprimidos (msx_compress.py): BSAVE do fluxo comprimido."""
+
+    encode = None
+    decode = None
+
+    def _unpack(self, content):
+        """Descomprime o fluxo após o cabeçalho; retorna (dados, bytes que sobram) ou None."""
+        header = _bsave_header(content)
+        if header is None or header[1] - header[0] + 1 != len(content) - BSAVE_HEADER_SIZE:
+            return None
+        stream = content[BSAVE_HEADER_SIZE:]
+        try:
+            data, used = type(self).decode(stream)
+        except CompressionError:
+            return None
+        return (data, len(stream) - used) if len(data) == DATA_SIZE else None
+
+    def sniff(self, content, ext):
+        if self._unpack(content) is None:
+            return 0
+        return 95 if ext in self.extensions else 30
+
+    def read(self, content):
+        data, extra = self._unpack(content)
+        problems = []
+        if extra:
+            problems.append(('warning', f"{extra} byte(s) após o fim do fluxo comprimido foram ignorados."))
+        return memoryview(bytearray(data)), {}, problems
+
+    def write(self, data, info=None):
+        stream = type(self).encode(data)
+        return struct.pack('<BHHH', BSAVE_ID, PACKED_ADDRESS, PACKED_ADDRESS + len(stream) - 1,
+                           PACKED_ADDRESS) + stream
+
+
+@register_format
+class RleFormat(PackedFormat):
+    """Alfabeto comprimido com RLE (sequências de bytes iguais)."""
+
+    name = 'rle'
+    description = "Alfabeto comprimido RLE (.ALR)"
+    extensions = ('.alr',)
+    encode = rle_encode
+    decode = rle_decode
+
+
+@register_format
+class LzFormat(PackedFormat):
+    """Alfabeto comprimido com LZ (repetições em uma janela de 256 bytes)."""
+
+    name = 'lz'
+    description = "Alfabeto comprimido LZ (.ALZ)"
+    extensions = ('.alz',)
+    encode = lz_encode
+    decode = lz_decode
+
+
+# --- Detecção, Leitura e Gravação ---
+
+def sniff_format(content, path=''):
+    """Escolhe o formato com maior pontuação para o conteúdo; None se nenhum reconhecer."""
+    ext = os.path.splitext(path)[1].lower()
+    best, best_score = None, 0
+    for fmt in FORMATS.values():
+        score = fmt.sniff(content, ext)
+        if score > best_score:
+            best, best_score = fmt, score
+    return best
+
+
+def parse_font(content, path=''):
+    """Interpreta o conteúdo de um arquivo de alfabeto.
+
+    Retorna (dados, formato, info, problemas); em caso de erro, dados e formato são None.
+    """
+    fmt = sniff_format(content, path)
+    if fmt is None:
+        sizes = ', '.join(str(size) for size in (BSAVE_HEADER_SIZE + DATA_SIZE, EDITOR_FILE_SIZE, DATA_SIZE))
+        return None, None, {}, [('error', f"Formato não reconhecido: {len(content)} bytes. "
+                                          f"Tamanhos aceitos: {sizes} bytes.")]
+    data, info, problems = fmt.read(content)
+    return data, fmt, info, problems
+
+
+def read_font_file(path):
+    """Lê um arquivo de alfabeto com uma única leitura; erros são devolvidos, nunca exibidos.
+
+    Retorna (dados, formato, info, problemas), como parse_font().
+    """
+    try:
+        with open(path, 'rb') as f:
+            content = memoryview(f.read())
+    except OSError as e:
+        return None, None, {}, [('error', f"Não foi possível ler o arquivo: {e}")]
+    return parse_font(content, path)
+
+
+def format_for_path(path, current=None):
+    """Formato de gravação para um caminho: o atual se a extensão combinar, senão o da extensão."""
+    ext = os.path.splitext(path)[1].lower()
+    if current is not None and (ext in current.extensions or not ext):
+        return current
+    for fmt in FORMATS.values():
+        if ext in fmt.extensions:
+            return fmt
+    return current or FORMATS['comum']
+
+
+# --- Gravação Segura ---
+
+def write_atomic(path, content):
+    """Grava o arquivo inteiro sem risco de deixá-lo pela metade.
+
+    O conteúdo vai para um arquivo temporário na mesma pasta, é forçado ao disco
+    (fsync) e só então substitui o original com os.replace, que é atômico: depois
+    de uma falha, o arquivo é o antigo ou o novo, nunca uma mistura. `content` pode
+    ser um bloco de bytes ou um iterável de blocos, gravados à medida que são gerados.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if isinstance(content, (bytes, bytearray, memoryview)):
+                f.write(content)
+            else:
+                for chunk in content:
+                    f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    # A troca de nomes também precisa chegar ao disco (só possível em sistemas POSIX)
+    if hasattr(os, 'O_DIRECTORY'):
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+
+
+def patch_fits_sector(chunks):
+    """Se os trechos (posição, bytes) são um só bloco dentro de um único setor de disco."""
+    if len(chunks) != 1:
+        return False
+    offset, chunk = chunks[0]
+    return offset // SECTOR_SIZE == (offset + len(chunk) - 1) // SECTOR_SIZE
+
+
+def patch_file(path, chunks):
+    """Regrava trechos de um arquivo existente no lugar: `chunks` é uma lista de (posição, bytes).
+
+    Cada trecho é escrito na sua posição e o arquivo é forçado ao disco no final.
+    Não há arquivo temporário: só um trecho dentro de um único setor (patch_fits_sector)
+    é gravado pelo disco por inteiro ou não é gravado; com mais de um setor, uma queda
+    de energia ou disco cheio no meio pode deixar o arquivo misturado. Por isso
+    write_font() só o usa nesse caso e grava o resto com write_atomic().
+    """
+    with open(path, 'r+b') as f:
+        for offset, chunk in chunks:
+            f.seek(offset)
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# --- Varredura de Diretórios ---
+
+def scan_fonts(roots, extensions=FONT_EXTENSIONS):
+    """Percorre as árvores de diretórios e gera (raiz, caminho) de cada arquivo de alfabeto.
+
+    A ordem é estável (entradas ordenadas por nome), para que relatórios de execuções
+    diferentes possam ser comparados linha a linha.
+    """
+    for root in roots:
+        if os.path.isfile(root):
+            yield os.path.dirname(root), root
+            continue
+
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+            except OSError:
+                continue
+            subdirs = []
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.name.lower().endswith(extensions):
+                    yield root, entry.path
+            stack.extend(reversed(subdirs))
+
+
+# --- Dependências Opcionais ---
+
+@lru_cache(maxsize=None)
+def numpy_module():
+    """O NumPy, se instalado, ou None.
+
+    A importação (~100 ms) é feita no primeiro uso, e não ao abrir o editor: só as
+    operações em lote precisam dele.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
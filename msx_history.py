@@ -0,0 +1,288 @@
+import os
+import queue
+import sqlite3
+import threading
+from array import array
+from contextlib import contextmanager
+
+from msx_catalog import font_hash
+from msx_formats import CHAR_SIZE, numpy_module
+
+# --- Constantes ---
+JOURNAL_DB = 'msx_font_editor.db'  # O mesmo banco da configuração do editor
+HISTORY_LIMIT = 100_000  # Passos guardados; os mais antigos são descartados em blocos
+TRIM_CHUNK = 1024
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS historico_sessoes
+(
+    caminho   TEXT PRIMARY KEY,
+    hash_base INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS historico_edicoes
+(
+    id      INTEGER PRIMARY KEY,
+    caminho TEXT NOT NULL,
+    tipo    TEXT NOT NULL,
+    codigos BLOB NOT NULL,
+    deltas  BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_historico_edicoes_caminho ON historico_edicoes (caminho, id);
+'''
+
+
+# --- Deltas XOR ---
+# Cada edição é guardada como o XOR entre o glifo antes e depois (8 bytes por glifo
+# alterado). Aplicar o mesmo delta de novo desfaz a edição, então desfazer e refazer
+# são a mesma operação.
+
+def apply_deltas(data, codes, deltas):
+    """Aplica (XOR) os deltas de 8 bytes aos glifos `codes` do buffer de 2048 bytes."""
+    # NumPy é opcional: sem ele (ou com um só glifo) os deltas são aplicados glifo a glifo
+    np = numpy_module() if len(codes) > 1 else None
+    if np is not None:
+        glyphs = np.frombuffer(data, dtype='>u8')
+        glyphs[np.frombuffer(codes, dtype=np.uint8)] ^= np.frombuffer(deltas, dtype='>u8')
+        return
+    for k, code in enumerate(codes):
+        offset = code * CHAR_SIZE
+        value = (int.from_bytes(data[offset:offset + CHAR_SIZE], 'big')
+                 ^ int.from_bytes(deltas[k * CHAR_SIZE:(k + 1) * CHAR_SIZE], 'big'))
+        data[offset:offset + CHAR_SIZE] = value.to_bytes(CHAR_SIZE, 'big')
+
+
+# --- Histórico de Desfazer/Refazer ---
+
+class EditHistory:
+    """Pilha de desfazer/refazer com deltas XOR por glifo.
+
+    As entradas ficam em três buffers planos: os códigos (1 byte por glifo), os
+    deltas (8 bytes por glifo) e o fim de cada entrada, sem um objeto Python por
+    passo; 100.000 edições de um caractere ocupam pouco mais de 1 MB. `on_change`,
+    se definido, recebe (tipo, códigos, deltas) de cada passo aplicado ('do', 'undo'
+    ou 'redo'), para o diário em disco.
+    """
+
+    def __init__(self, limit=HISTORY_LIMIT):
+        self.limit = limit
+        self.on_change = None
+        self.position = 0  # Entradas aplicadas; as seguintes podem ser refeitas
+        self._codes = bytearray()
+        self._deltas = bytearray()
+        self._ends = array('I')  # Fim (em glifos) de cada entrada
+        self._group_depth = 0
+        self._pending = {}  # Código -> delta acumulado no grupo aberto
+
+    def __len__(self):
+        return len(self._ends)
+
+    @property
+    def can_undo(self):
+        return self.position > 0
+
+    @property
+    def can_redo(self):
+        return self.position < len(self._ends)
+
+    def _entry(self, index):
+        start = self._ends[index - 1] if index else 0
+        end = self._ends[index]
+        return bytes(self._codes[start:end]), bytes(self._deltas[start * CHAR_SIZE:end * CHAR_SIZE])
+
+    def _push(self, codes, deltas):
+        # Uma nova edição descarta o que podia ser refeito
+        if self.can_redo:
+            end = self._ends[self.position - 1] if self.position else 0
+            del self._codes[end:]
+            del self._deltas[end * CHAR_SIZE:]
+            del self._ends[self.position:]
+        self._codes += codes
+        self._deltas += deltas
+        self._ends.append(len(self._codes))
+        if len(self._ends) > self.limit:
+            cut = self._ends[TRIM_CHUNK - 1]
+            del self._codes[:cut]
+            del self._deltas[:cut * CHAR_SIZE]
+            self._ends = array('I', (end - cut for end in self._ends[TRIM_CHUNK:]))
+        self.position = len(self._ends)
+
+    def _notify(self, kind, codes, deltas):
+        if self.on_change is not None:
+            self.on_change(kind, codes, deltas)
+
+    def record(self, codes, deltas):
+        """Registra uma edição: os códigos alterados e seus deltas XOR (8 bytes cada).
+
+        Dentro de group(), as edições são acumuladas e viram uma única entrada.
+        """
+        if not codes:
+            return
+        if self._group_depth:
+            pending = self._pending
+            for k, code in enumerate(codes):
+                pending[code] = pending.get(code, 0) ^ int.from_bytes(
+                    deltas[k * CHAR_SIZE:(k + 1) * CHAR_SIZE], 'big')
+            return
+        codes, deltas = bytes(codes), bytes(deltas)
+        self._push(codes, deltas)
+        self._notify('do', codes, deltas)
+
+    @contextmanager
+    def group(self):
+        """Agrupa todas as edições do bloco `with` em um único passo de desfazer."""
+        self._group_depth += 1
+        try:
+            yield self
+        finally:
+            self._group_depth -= 1
+            if not self._group_depth and self._pending:
+                changed = sorted(code for code, delta in self._pending.items() if delta)
+                deltas = b''.join(self._pending[code].to_bytes(CHAR_SIZE, 'big') for code in changed)
+                self._pending.clear()
+                if changed:
+                    self._push(bytes(changed), deltas)
+                    self._notify('do', bytes(changed), deltas)
+
+    def undo(self, data):
+        """Desfaz o último passo sobre o buffer `data`; retorna os códigos alterados."""
+        if not self.can_undo:
+            return []
+        self.position -= 1
+        codes, deltas = self._entry(self.position)
+        apply_deltas(data, codes, deltas)
+        self._notify('undo', codes, deltas)
+        return list(codes)
+
+    def redo(self, data):
+        """Refaz o próximo passo sobre o buffer `data`; retorna os códigos alterados."""
+        if not self.can_redo:
+            return []
+        codes, deltas = self._entry(self.position)
+        self.position += 1
+        apply_deltas(data, codes, deltas)
+        self._notify('redo', codes, deltas)
+        return list(codes)
+
+    def replay(self, rows, data):
+        """Reaplica as linhas (tipo, códigos, deltas) de um diário sobre `data`.
+
+        Os dados sempre recebem o delta gravado; a pilha é reconstruída até onde o
+        diário permite (um 'undo' de um passo anterior ao diário não tem entrada).
+        Retorna o conjunto de códigos alterados.
+        """
+        touched = set()
+        for kind, codes, deltas in rows:
+            apply_deltas(data, codes, deltas)
+            touched.update(codes)
+            if kind == 'do':
+                self._push(codes, deltas)
+            elif kind == 'undo' and self.can_undo:
+                self.position -= 1
+            elif kind == 'redo' and self.can_redo:
+                self.position += 1
+        return touched
+
+
+# --- Diário em Disco (recuperação após falha) ---
+
+class EditJournal:
+    """Diário das edições no banco do editor, gravado por uma thread em segundo plano.
+
+    Cada passo vira uma linha pequena (códigos e deltas) acrescentada à tabela
+    historico_edicoes; a fonte nunca é regravada inteira. A sessão guarda o hash
+    do arquivo de partida, para só reaplicar o diário sobre o mesmo conteúdo.
+    """
+
+    BATCH_SIZE = 512  # Linhas gravadas por transação, no máximo
+
+    def __init__(self, db_path=JOURNAL_DB):
+        self.db_path = db_path
+        self.problems = []
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='diario-de-edicoes', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.executescript(SCHEMA)
+        except sqlite3.Error as e:
+            conn = None
+            self.problems.append(('warning', f"Não foi possível abrir o diário de edições: {e}"))
+        running = True
+        while running:
+            items = [self._queue.get()]
+            while len(items) < self.BATCH_SIZE:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Decidido antes de gravar: um erro do banco nunca impede o encerramento
+            running = None not in items
+            if conn is not None:
+                try:
+                    with conn:
+                        for item in items:
+                            if item is not None and not isinstance(item, threading.Event):
+                                self._write(conn, *item)
+                except sqlite3.Error as e:
+                    self.problems.append(('warning', f"Não foi possível gravar o diário de edições: {e}"))
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+        if conn is not None:
+            conn.close()
+
+    @staticmethod
+    def _write(conn, operation, path, *args):
+        if operation == 'append':
+            conn.execute('INSERT INTO historico_edicoes (caminho, tipo, codigos, deltas) VALUES (?, ?, ?, ?)',
+                         (path,) + args)
+            return
+        conn.execute('DELETE FROM historico_edicoes WHERE caminho = ?', (path,))
+        if operation == 'begin':
+            conn.execute('INSERT OR REPLACE INTO historico_sessoes (caminho, hash_base) VALUES (?, ?)',
+                         (path, args[0]))
+        else:
+            conn.execute('DELETE FROM historico_sessoes WHERE caminho = ?', (path,))
+
+    def begin(self, path, data):
+        """Inicia o diário de uma fonte a partir do conteúdo `data` (descarta o anterior)."""
+        self._queue.put(('begin', os.path.abspath(path), font_hash(data)))
+
+    def append(self, path, kind, codes, deltas):
+        """Acrescenta um passo do histórico (sem esperar a gravação)."""
+        self._queue.put(('append', os.path.abspath(path), kind, bytes(codes), bytes(deltas)))
+
+    def clear(self, path):
+        """Apaga o diário de uma fonte (depois de fechá-la sem falha)."""
+        self._queue.put(('clear', os.path.abspath(path)))
+
+    def flush(self, timeout=None):
+        """Espera a gravação de tudo o que já foi enfileirado."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Grava o que falta e encerra a thread do diário."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def pending(self, path, data):
+        """Passos deixados por uma sessão interrompida sobre este mesmo conteúdo.
+
+        Retorna a lista de (tipo, códigos, deltas), vazia se não houver diário ou se
+        o arquivo mudou desde o início dele.
+        """
+        self.flush()
+        path = os.path.abspath(path)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute('SELECT hash_base FROM historico_sessoes WHERE caminho = ?', (path,)).fetchone()
+            if row is None or row[0] != font_hash(data):
+                return []
+            return conn.execute('SELECT tipo, codigos, deltas FROM historico_edicoes WHERE caminho = ? ORDER BY id',
+                                (path,)).fetchall()
+        finally:
+            conn.close()
@@ -0,0 +1,162 @@
+import json
+import os
+import platform
+import threading
+import time
+from functools import wraps
+
+from msx_formats import write_atomic
+
+# --- Constantes ---
+PERF_ENV = 'MSX_PERF'            # MSX_PERF=1 liga as medições desde a abertura do editor
+PERF_DUMP_ENV = 'MSX_PERF_DUMP'  # Arquivo JSON gravado ao encerrar o editor (se definido)
+BUCKETS = 27                     # Faixas de potências de 2 em microssegundos (até ~67 s)
+STARTUP_BUDGET_MS = 800          # Meta da partida a frio: processo novo até a janela pronta
+IMPORT_BUDGET_MS = 400           # Meta só da importação do editor (sem tela)
+
+
+# --- Histogramas de Latência ---
+
+class Histogram:
+    """Latências em faixas de potências de 2 microssegundos, com contagem, total, mínimo e máximo.
+
+    Acrescentar uma medida custa uma conversão e um bit_length; os percentis são
+    aproximados pelo limite superior da faixa.
+    """
+
+    __slots__ = ('count', 'total', 'minimum', 'maximum', 'last', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float('inf')
+        self.maximum = 0.0
+        self.last = 0.0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds < self.minimum:
+            self.minimum = seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+        self.buckets[min(BUCKETS - 1, int(seconds * 1e6).bit_length())] += 1
+
+    def percentile(self, q):
+        """Limite superior (em segundos) da faixa que contém o percentil q (0 a 1)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return min(self.maximum, (1 << index) / 1e6)
+        return self.maximum
+
+    def as_dict(self):
+        ms = 1000.0
+        return {'count': self.count,
+                'total_ms': round(self.total * ms, 3),
+                'mean_ms': round(self.total / self.count * ms, 4) if self.count else 0.0,
+                'min_ms': round(self.minimum * ms, 4) if self.count else 0.0,
+                'max_ms': round(self.maximum * ms, 4),
+                'p50_ms': round(self.percentile(0.5) * ms, 4),
+                'p95_ms': round(self.percentile(0.95) * ms, 4),
+                'p99_ms': round(self.percentile(0.99) * ms, 4),
+                # Faixa i: até 2**i microssegundos
+                'buckets_us': {str(1 << index): count for index, count in enumerate(self.buckets) if count}}
+
+
+# --- Registro de Medições ---
+
+class PerfRecorder:
+    """Histogramas por nome de função e medidores (ex.: itens do Canvas).
+
+    Desligado, cada função decorada com timed() paga só o teste de `enabled`. As
+    gravações em segundo plano registram de outra thread, daí a trava.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self.gauges = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    def gauge(self, name, value):
+        """Registra o valor atual de um medidor (o máximo visto também é guardado)."""
+        with self._lock:
+            current = self.gauges.get(name)
+            self.gauges[name] = {'value': value, 'max': value if current is None else max(current['max'], value)}
+
+    def histogram(self, name):
+        return self.histograms.get(name) or Histogram()
+
+    def timed(self, name=None):
+        """Decorador: mede cada chamada da função no histograma `name` (padrão: Classe.método)."""
+        def decorate(func):
+            label = name or func.__qualname__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(label, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.gauges.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        """As medições atuais como um dicionário serializável em JSON."""
+        with self._lock:
+            return {'started': self.started,
+                    'captured': time.time(),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'histograms': {name: histogram.as_dict() for name, histogram in sorted(self.histograms.items())},
+                    'gauges': dict(sorted(self.gauges.items()))}
+
+    def dump(self, path):
+        """Grava as medições em JSON (atomicamente), para comparar execuções diferentes."""
+        write_atomic(path, json.dumps(self.snapshot(), indent=2, ensure_ascii=False).encode('utf-8'))
+
+
+# --- Comparação de Medições ---
+
+def compare_snapshots(old, new, threshold=1.25, metric='p95_ms'):
+    """Compara duas medições gravadas por dump(); retorna as linhas de cada histograma em comum.
+
+    Cada linha é (nome, valor antigo, valor novo, razão, piorou), onde piorou indica
+    razão acima de `threshold`.
+    """
+    rows = []
+    for name, before in sorted(old.get('histograms', {}).items()):
+        after = new.get('histograms', {}).get(name)
+        if after is None:
+            continue
+        ratio = after[metric] / before[metric] if before[metric] else None
+        rows.append((name, before[metric], after[metric], ratio, ratio is not None and ratio > threshold))
+    return rows
+
+
+PERF = PerfRecorder(os.environ.get(PERF_ENV, '') not in ('', '0'))
+timed = PERF.timed
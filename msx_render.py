@@ -0,0 +1,202 @@
+import struct
+import zlib
+
+
+# --- PNG Indexado ---
+
+def _png_chunk(tag, payload):
+    """Monta um bloco PNG (tamanho, tipo, dados e CRC)."""
+    return struct.pack('>I', len(payload)) + tag + payload + struct.pack('>I', zlib.crc32(tag + payload))
+
+
+def _png_header(width, height, bit_depth, palette, transparent):
+    ihdr = struct.pack('>IIBBBBB', width, height, bit_depth, 3, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n'
+            + _png_chunk(b'IHDR', ihdr)
+            + _png_chunk(b'PLTE', b''.join(bytes(color) for color in palette))
+            + (_png_chunk(b'tRNS', b'\x00') if transparent else b''))
+
+
+def encode_indexed_png(width, height, bit_depth, palette, raw, transparent=True):
+    """Monta um PNG indexado a partir das linhas já filtradas; o índice 0 pode ser transparente."""
+    return (_png_header(width, height, bit_depth, palette, transparent)
+            + _png_chunk(b'IDAT', zlib.compress(bytes(raw), 1))
+            + _png_chunk(b'IEND', b''))
+
+
+def iter_indexed_png(width, height, bit_depth, palette, bands, transparent=True):
+    """Versão em fluxo de encode_indexed_png: gera o PNG em blocos.
+
+    `bands` é um iterável de faixas de linhas já filtradas; cada faixa é comprimida
+    assim que chega e vira um bloco IDAT, sem montar a imagem inteira na memória.
+    """
+    yield _png_header(width, height, bit_depth, palette, transparent)
+    compressor = zlib.compressobj(6)
+    for band in bands:
+        compressed = compressor.compress(bytes(band))
+        if compressed:
+            yield _png_chunk(b'IDAT', compressed)
+    yield _png_chunk(b'IDAT', compressor.flush())
+    yield _png_chunk(b'IEND', b'')
+
+
+def encode_atlas_png(data, cols=16, rows=16, color_on=(255, 255, 255)):
+    """Codifica os glifos (8 bytes cada) como um único PNG indexado de 1 bit.
+
+    Cada linha do PNG é a cópia direta do mesmo byte de 16 glifos vizinhos (sem
+    trabalho por pixel). O índice 0 (pixel apagado) é transparente.
+    """
+    stride = cols * 8
+    raw = bytearray()
+    for row in range(rows):
+        base = row * stride
+        for line in range(8):
+            raw.append(0)  # Filtro "None" da linha
+            raw += data[base + line:base + stride:8]
+    return encode_indexed_png(cols * 8, rows * 8, 1, ((0, 0, 0), color_on), raw)
+
+
+# Paleta fixa do TMS9918 (SCREEN 2); a cor 0 é a transparente
+MSX_PALETTE = (
+    (0, 0, 0), (0, 0, 0), (33, 200, 66), (94, 220, 120), (84, 85, 237), (125, 118, 252), (212, 82, 77),
+    (66, 235, 245), (252, 85, 84), (255, 121, 120), (212, 193, 84), (230, 206, 128), (33, 176, 59),
+    (201, 91, 186), (204, 204, 204), (255, 255, 255),
+)
+
+
+def encode_shape_png(shape, color_on=(255, 255, 255)):
+    """Codifica um shape (msx_shapes.Shape) como PNG indexado.
+
+    Shapes do tipo 1 viram um PNG de 1 bit cujas linhas são as próprias linhas de
+    padrões. Com cores ou máscara, cada pixel recebe a cor da paleta do MSX: frente
+    se aceso; transparente se apagado sob a máscara; fundo (ou preto) nos demais.
+    """
+    width = shape.width * 8
+    if shape.mask is None and shape.colors is None:
+        raw = bytearray()
+        for y in range(shape.height):
+            raw.append(0)
+            raw += shape.row(y)
+        return encode_indexed_png(width, shape.height, 1, ((0, 0, 0), color_on), raw)
+
+    raw = bytearray()
+    for y in range(shape.height):
+        raw.append(0)
+        for i in range(y * shape.width, (y + 1) * shape.width):
+            pixels = shape.pixels[i]
+            mask = shape.mask[i] if shape.mask is not None else 0
+            colors = shape.colors[i] if shape.colors is not None else 0xF1
+            fg, bg = colors >> 4, colors & 0x0F
+            for bit in range(7, 0, -2):
+                pair = 0
+                for b in (bit, bit - 1):
+                    if (pixels >> b) & 1:
+                        index = fg
+                    else:
+                        index = 0 if (mask >> b) & 1 else bg
+                    pair = (pair << 4) | index
+                raw.append(pair)
+    return encode_indexed_png(width, shape.height, 4, MSX_PALETTE, raw)
+
+
+# --- Rasterização sem Tk ---
+# A grade do editor é desenhada em camadas: um atlas PNG com os glifos e marcações
+# por célula (modificado, diferente, pixel aceso). As classes abaixo calculam a
+# geometria e decidem o que precisa ser redesenhado, gerando os PNGs; a interface só
+# aplica o resultado no Canvas. Assim o mesmo código roda sem janela (msx_bench.py).
+
+GLYPH_SIZE = 8
+FULL_REPAINT_THRESHOLD = 24  # Acima deste número de células alteradas, o atlas inteiro é refeito
+
+
+class GridLayout:
+    """Geometria de uma grade de células quadradas, com margem à esquerda e acima."""
+
+    def __init__(self, cell_size, cols=16, rows=16, margin=0):
+        self.cell_size = cell_size
+        self.cols = cols
+        self.rows = rows
+        self.margin = margin
+
+    @property
+    def size(self):
+        """Largura e altura totais (margem + células)."""
+        return self.margin + self.cols * self.cell_size, self.margin + self.rows * self.cell_size
+
+    def cell_origin(self, index):
+        """Canto superior esquerdo da célula `index` (em ordem de linhas)."""
+        row, col = divmod(index, self.cols)
+        return self.margin + col * self.cell_size, self.margin + row * self.cell_size
+
+    def cell_rect(self, index, inset=0):
+        """Retângulo (x1, y1, x2, y2) da célula, recuado `inset` pixels de cada lado."""
+        x, y = self.cell_origin(index)
+        return x + inset, y + inset, x + self.cell_size - inset, y + self.cell_size - inset
+
+    def span_rect(self, index_a, index_b):
+        """Retângulo que cobre as células entre dois cantos opostos."""
+        (row_a, col_a), (row_b, col_b) = divmod(index_a, self.cols), divmod(index_b, self.cols)
+        size = self.cell_size
+        return (self.margin + min(col_a, col_b) * size, self.margin + min(row_a, row_b) * size,
+                self.margin + (max(col_a, col_b) + 1) * size, self.margin + (max(row_a, row_b) + 1) * size)
+
+    def cell_at(self, x, y):
+        """Índice da célula na posição (x, y), ou None se estiver fora da grade."""
+        if x < self.margin or y < self.margin:
+            return None
+        col = (x - self.margin) // self.cell_size
+        row = (y - self.margin) // self.cell_size
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return int(row * self.cols + col)
+        return None
+
+
+class CellStates:
+    """O último valor desenhado de cada célula; update() retorna só as que mudaram."""
+
+    def __init__(self, count):
+        self.values = [None] * count
+
+    def update(self, values, force=False):
+        """Registra os valores atuais; retorna a lista de (índice, valor) a redesenhar."""
+        drawn = self.values
+        changed = [(i, value) for i, value in enumerate(values) if force or drawn[i] != value]
+        for i, value in changed:
+            drawn[i] = value
+        return changed
+
+    def reset(self):
+        self.values = [None] * len(self.values)
+
+
+class AtlasRaster:
+    """Estado de desenho do atlas de glifos (8 bytes cada) de uma fonte.
+
+    render() compara os glifos com os do último desenho e retorna (PNG do atlas
+    inteiro ou None, lista de (código, PNG da célula)): o atlas em lote quando há
+    muitas células alteradas, senão só as células que mudaram.
+    """
+
+    def __init__(self, cols=16, rows=16, threshold=FULL_REPAINT_THRESHOLD):
+        self.cols = cols
+        self.rows = rows
+        self.threshold = threshold
+        self.states = CellStates(cols * rows)
+        self._unpack = struct.Struct(f'>{cols * rows}Q').unpack
+
+    def dirty(self, data, force=False):
+        """Códigos dos glifos alterados desde o último desenho (todos com force=True)."""
+        return [code for code, _ in self.states.update(self._unpack(bytes(data)), force)]
+
+    def prime(self, data):
+        """Marca os glifos como já desenhados (o atlas veio pronto, ex.: do cache de miniaturas)."""
+        self.dirty(data, force=True)
+
+    def render(self, data, color_on=(255, 255, 255), force=False):
+        dirty = self.dirty(data, force)
+        if not dirty:
+            return None, []
+        if force or len(dirty) > self.threshold:
+            return encode_atlas_png(data, self.cols, self.rows, color_on), []
+        return None, [(code, encode_atlas_png(data[code * GLYPH_SIZE:(code + 1) * GLYPH_SIZE], 1, 1, color_on))
+                      for code in dirty]
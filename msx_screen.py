@@ -0,0 +1,325 @@
+import os
+import struct
+
+from msx_font import glyph_bold, glyph_slant
+from msx_formats import BSAVE_ID, BSAVE_HEADER_SIZE, CHAR_SIZE
+from msx_render import MSX_PALETTE, encode_indexed_png
+
+# --- Constantes da SCREEN 2 (TMS9918) ---
+SCREEN_COLS = 32
+SCREEN_ROWS = 24
+SCREEN_WIDTH = SCREEN_COLS * 8
+SCREEN_HEIGHT = SCREEN_ROWS * 8
+CELLS = SCREEN_COLS * SCREEN_ROWS
+TABLE_SIZE = CELLS * CHAR_SIZE  # Tabelas de padrões e de cores: 6 KB cada
+
+PATTERN_TABLE = 0x0000
+NAME_TABLE = 0x1800
+SPRITE_ATTRIBUTES = 0x1B00
+COLOR_TABLE = 0x2000
+GRP_SIZE = COLOR_TABLE + TABLE_SIZE  # BSAVE da VRAM de &H0000 a &H37FF
+SPRITES_OFF = 0xD0                   # Y = 208 encerra a lista de sprites
+
+DEFAULT_INK = 15
+DEFAULT_PAPER = 4
+
+# .SCR (formato DISPLAY do Graphos III): BSAVE em &H9200 com uma rotina de apresentação
+# seguida das tabelas de padrões e de cores, sempre a partir de &H9279. A rotina
+# gravada aqui copia as duas tabelas para a VRAM pela BIOS (BLOAD "nome.SCR",R).
+SCR_ADDRESS = 0x9200
+SCR_DATA_OFFSET = 0x79
+BIOS_DISSCR, BIOS_ENASCR, BIOS_LDIRVM = 0x0041, 0x0044, 0x005C
+SCR_LOADER = (struct.pack('<BH', 0xCD, BIOS_DISSCR)
+              + struct.pack('<BHBHBHBH', 0x21, SCR_ADDRESS + SCR_DATA_OFFSET, 0x11, PATTERN_TABLE,
+                            0x01, TABLE_SIZE, 0xCD, BIOS_LDIRVM)
+              + struct.pack('<BHBHBHBH', 0x21, SCR_ADDRESS + SCR_DATA_OFFSET + TABLE_SIZE, 0x11, COLOR_TABLE,
+                            0x01, TABLE_SIZE, 0xCD, BIOS_LDIRVM)
+              + struct.pack('<BH', 0xC3, BIOS_ENASCR)).ljust(SCR_DATA_OFFSET, b'\x00')
+
+# .CPT (Screen Cruncher do MSX Graphic Tools): BSAVE autoexecutável. A rotina em
+# &H(execução) liga a SCREEN 2 e envia &H3800 bytes à VRAM a partir do início dos
+# dados; uma tabela de entradas (repetições, endereço) indica onde cada byte deve
+# ser repetido, e os demais bytes são copiados como estão.
+CPT_SIGNATURE = bytes.fromhex('cd7200f3fd21')  # CALL INIGRP / DI / LD IY,tabela
+CPT_TABLE_OPERAND = 6
+CPT_DATA_OPERAND = 9
+CPT_SIZE_OPERAND = 19
+
+SCREEN_EXTENSIONS = ('.scr', '.grp', '.cpt')
+
+
+# --- Tela ---
+
+class Screen2:
+    """Imagem da SCREEN 2: tabelas de padrões e de cores com a tabela de nomes sequencial.
+
+    Cada uma das 768 células tem seus próprios 8 bytes de padrão e 8 de cor (frente no
+    nibble alto, fundo no baixo), na posição (linha * 32 + coluna) * 8 das tabelas.
+    """
+
+    def __init__(self, patterns=None, colors=None, ink=DEFAULT_INK, paper=DEFAULT_PAPER):
+        self.patterns = bytearray(patterns) if patterns is not None else bytearray(TABLE_SIZE)
+        self.colors = (bytearray(colors) if colors is not None
+                       else bytearray(bytes(((ink & 0x0F) << 4) | (paper & 0x0F),)) * TABLE_SIZE)
+
+    def clear(self, ink=DEFAULT_INK, paper=DEFAULT_PAPER):
+        """Apaga todos os pixels e pinta a tela com as cores indicadas."""
+        self.patterns[:] = bytes(TABLE_SIZE)
+        self.colors[:] = bytes((((ink & 0x0F) << 4) | (paper & 0x0F),)) * TABLE_SIZE
+
+    def put_cell(self, col, row, pattern, color=None):
+        """Copia 8 bytes de padrão (e, opcionalmente, o byte de cor) para uma célula."""
+        if 0 <= col < SCREEN_COLS and 0 <= row < SCREEN_ROWS:
+            offset = (row * SCREEN_COLS + col) * CHAR_SIZE
+            self.patterns[offset:offset + CHAR_SIZE] = pattern
+            if color is not None:
+                self.colors[offset:offset + CHAR_SIZE] = bytes((color,)) * CHAR_SIZE
+
+    @classmethod
+    def from_vram(cls, vram):
+        """Monta a tela a partir de uma cópia da VRAM, resolvendo a tabela de nomes.
+
+        A tela é dividida em três faixas de 8 linhas, cada uma com seus 256 padrões;
+        células que repetem um nome recebem cópias independentes do padrão e das cores.
+        """
+        screen = cls(vram[PATTERN_TABLE:PATTERN_TABLE + TABLE_SIZE], vram[COLOR_TABLE:COLOR_TABLE + TABLE_SIZE])
+        names = vram[NAME_TABLE:NAME_TABLE + CELLS]
+        if bytes(names) != bytes(range(256)) * 3:
+            patterns, colors = screen.patterns, screen.colors
+            screen.patterns, screen.colors = bytearray(TABLE_SIZE), bytearray(TABLE_SIZE)
+            for cell, name in enumerate(names):
+                source = ((cell // 256) * 256 + name) * CHAR_SIZE
+                target = cell * CHAR_SIZE
+                screen.patterns[target:target + CHAR_SIZE] = patterns[source:source + CHAR_SIZE]
+                screen.colors[target:target + CHAR_SIZE] = colors[source:source + CHAR_SIZE]
+        return screen
+
+    # --- Exportação ---
+
+    def to_scr(self):
+        """Conteúdo de um arquivo .SCR (DISPLAY): rotina de apresentação + padrões + cores."""
+        payload = SCR_LOADER + bytes(self.patterns) + bytes(self.colors)
+        header = struct.pack('<BHHH', BSAVE_ID, SCR_ADDRESS, SCR_ADDRESS + len(payload) - 1, SCR_ADDRESS)
+        return header + payload
+
+    def to_grp(self):
+        """Conteúdo de um arquivo .GRP: BSAVE da VRAM de &H0000 a &H37FF."""
+        vram = bytearray(GRP_SIZE)
+        vram[PATTERN_TABLE:PATTERN_TABLE + TABLE_SIZE] = self.patterns
+        vram[NAME_TABLE:NAME_TABLE + CELLS] = bytes(range(256)) * 3
+        vram[SPRITE_ATTRIBUTES] = SPRITES_OFF
+        vram[COLOR_TABLE:COLOR_TABLE + TABLE_SIZE] = self.colors
+        return struct.pack('<BHHH', BSAVE_ID, 0, GRP_SIZE - 1, 0) + bytes(vram)
+
+    def to_png(self):
+        """PNG de 256x192 (4 bits, paleta do MSX; a cor 0 aparece como o fundo preto).
+
+        Cada linha de pixels é montada com inteiros de 1024 bits: a máscara dos pixels
+        acesos (tabela por byte) escolhe entre as cores de frente e de fundo.
+        """
+        raw = bytearray()
+        stride = SCREEN_COLS * CHAR_SIZE
+        for y in range(SCREEN_HEIGHT):
+            base = (y // 8) * stride + y % 8
+            patterns = self.patterns[base:base + stride:CHAR_SIZE]
+            colors = self.colors[base:base + stride:CHAR_SIZE]
+            mask = int.from_bytes(b''.join(map(_NIBBLE_MASK.__getitem__, patterns)), 'big')
+            ink = int.from_bytes(b''.join(map(_INK_FILL.__getitem__, colors)), 'big')
+            paper = int.from_bytes(b''.join(map(_PAPER_FILL.__getitem__, colors)), 'big')
+            raw.append(0)
+            raw += ((mask & ink) | (~mask & paper)).to_bytes(SCREEN_WIDTH // 2, 'big')
+        return encode_indexed_png(SCREEN_WIDTH, SCREEN_HEIGHT, 4, MSX_PALETTE, raw, transparent=False)
+
+    def save(self, filepath):
+        """Grava a tela no formato da extensão (.SCR, .GRP ou .PNG); retorna a lista de problemas."""
+        ext = os.path.splitext(filepath)[1].lower()
+        writers = {'.scr': self.to_scr, '.grp': self.to_grp, '.png': self.to_png}
+        if ext not in writers:
+            return [('error', f"Extensão não suportada: '{ext}'. Use .SCR, .GRP ou .PNG.")]
+        try:
+            with open(filepath, 'wb') as f:
+                f.write(writers[ext]())
+        except OSError as e:
+            return [('error', f"Não foi possível salvar a tela: {e}")]
+        return []
+
+
+# Tabelas por byte para a conversão em PNG de 4 bits (2 pixels por byte)
+_NIBBLE_MASK = [b''.join(bytes((((byte >> bit) & 1) * 0xF0 | ((byte >> (bit - 1)) & 1) * 0x0F,))
+                         for bit in (7, 5, 3, 1)) for byte in range(256)]
+_INK_FILL = [bytes(((color >> 4) * 0x11,)) * 4 for color in range(256)]
+_PAPER_FILL = [bytes(((color & 0x0F) * 0x11,)) * 4 for color in range(256)]
+
+
+def decode_cpt(content):
+    """Descompacta um .CPT e retorna a cópia da VRAM, ou None se a rotina não for a esperada.
+
+    Reproduz a rotina do próprio arquivo com fatias: o trecho até o próximo endereço
+    da tabela é copiado direto, e o byte nesse endereço é repetido n vezes.
+    """
+    start, _, execute = struct.unpack_from('<HHH', content, 1)
+
+    def offset(address):
+        return BSAVE_HEADER_SIZE + address - start
+
+    routine = offset(execute)
+    if bytes(content[routine:routine + len(CPT_SIGNATURE)]) != CPT_SIGNATURE:
+        return None
+    table = offset(struct.unpack_from('<H', content, routine + CPT_TABLE_OPERAND)[0])
+    source = offset(struct.unpack_from('<H', content, routine + CPT_DATA_OPERAND)[0])
+    size = struct.unpack_from('<H', content, routine + CPT_SIZE_OPERAND)[0]
+
+    vram = bytearray()
+    while len(vram) < size and table + 4 <= len(content):
+        count, address = struct.unpack_from('<HH', content, table)
+        run = offset(address)
+        if run < source or run >= len(content):
+            break
+        vram += content[source:run]
+        vram += content[run:run + 1] * (count or 0x10000)
+        source, table = run + 1, table + 4
+    if len(vram) < size:
+        vram += content[source:source + size - len(vram)]
+    return bytes(vram[:size]) if len(vram) >= size else None
+
+
+def read_screen(path):
+    """Lê uma tela .SCR (DISPLAY do Graphos III), .GRP (BSAVE da VRAM) ou .CPT (compactada).
+
+    Retorna (tela, problemas); em caso de erro, a tela é None.
+    """
+    try:
+        with open(path, 'rb') as f:
+            content = f.read()
+    except OSError as e:
+        return None, [('error', f"Não foi possível ler o arquivo: {e}")]
+
+    if len(content) < BSAVE_HEADER_SIZE or content[0] != BSAVE_ID:
+        return None, [('error', "O arquivo não é um BSAVE (falta o byte &HFE).")]
+    start, end, execute = struct.unpack_from('<HHH', content, 1)
+    body = content[BSAVE_HEADER_SIZE:]
+
+    if start == SCR_ADDRESS and len(body) >= SCR_DATA_OFFSET + 2 * TABLE_SIZE:
+        data = body[SCR_DATA_OFFSET:SCR_DATA_OFFSET + 2 * TABLE_SIZE]
+        return Screen2(data[:TABLE_SIZE], data[TABLE_SIZE:]), []
+    if start == 0 and len(body) >= GRP_SIZE:
+        return Screen2.from_vram(body[:GRP_SIZE]), []
+    routine = BSAVE_HEADER_SIZE + execute - start
+    if content[routine:routine + len(CPT_SIGNATURE)] == CPT_SIGNATURE:
+        vram = decode_cpt(content)
+        if vram is not None and len(vram) >= GRP_SIZE:
+            return Screen2.from_vram(vram), []
+        return None, [('error', "Tela compactada (.CPT) corrompida ou incompleta.")]
+    return None, [('error', f"Tela não reconhecida: BSAVE de &H{start:04X} a &H{end:04X} "
+                            f"com {len(content)} bytes.")]
+
+
+# --- Composição de Texto ---
+# As variações de impressão do menu TEXTO do Graphos III (GRAPHOS.TXT, 3.2.2). Cada
+# variação transforma os 8 bytes de um glifo em um bloco de células (dy, dx, 8 bytes)
+# usando só operações sobre bytes inteiros: tabelas de tradução e fatias.
+
+def _widen(byte, half):
+    """Metade (0 = esquerda, 1 = direita) de um byte com cada pixel duplicado na horizontal."""
+    nibble = (byte >> 4) if half == 0 else (byte & 0x0F)
+    wide = 0
+    for bit in range(4):
+        if nibble & (1 << bit):
+            wide |= 0b11 << (bit * 2)
+    return wide
+
+
+_WIDE_LEFT = bytes(_widen(byte, 0) for byte in range(256))
+_WIDE_RIGHT = bytes(_widen(byte, 1) for byte in range(256))
+_DOUBLE_TOP = bytes(row // 2 for row in range(8))
+_DOUBLE_BOTTOM = bytes(4 + row // 2 for row in range(8))
+
+
+def _as_bytes(glyph):
+    return glyph.to_bytes(CHAR_SIZE, 'big')
+
+
+def _as_int(pattern):
+    return int.from_bytes(pattern, 'big')
+
+
+def _double_height(pattern):
+    return [(0, 0, bytes(map(pattern.__getitem__, _DOUBLE_TOP))),
+            (1, 0, bytes(map(pattern.__getitem__, _DOUBLE_BOTTOM)))]
+
+
+def _double_width(cells):
+    return [cell for dy, dx, pattern in cells
+            for cell in ((dy, 2 * dx, pattern.translate(_WIDE_LEFT)), (dy, 2 * dx + 1, pattern.translate(_WIDE_RIGHT)))]
+
+
+PRINT_VARIANTS = {
+    'normal': lambda pattern: [(0, 0, pattern)],
+    'italic': lambda pattern: [(0, 0, _as_bytes(glyph_slant(_as_int(pattern))))],
+    'bold': lambda pattern: [(0, 0, _as_bytes(glyph_bold(_as_int(pattern))))],
+    'duplo': _double_height,
+    'largo': lambda pattern: _double_width([(0, 0, pattern)]),
+    'duplo_bold': lambda pattern: _double_width(_double_height(pattern)),
+}
+PRINT_VARIANT_NAMES = {
+    'normal': "Normal",
+    'italic': "Itálico",
+    'bold': "Negrito",
+    'duplo': "Duplo (altura)",
+    'largo': "Largo (largura)",
+    'duplo_bold': "Duplo Bold (altura e largura)",
+}
+
+
+class TextCompositor:
+    """Escreve texto com um MSXFont diretamente nas tabelas de uma Screen2.
+
+    O texto é alinhado às células 8x8; cada caractere é a cópia de blocos de 8 bytes
+    para a tabela de padrões (e do byte de cor para a tabela de cores). Os blocos de
+    cada (código, variação) são calculados uma vez e reaproveitados.
+    """
+
+    def __init__(self, screen, font):
+        self.screen = screen
+        self.font = font
+        self._cells = {}
+
+    def glyph_cells(self, code, variant='normal'):
+        """Blocos (dy, dx, 8 bytes) do caractere na variação de impressão indicada."""
+        key = (code, variant)
+        cells = self._cells.get(key)
+        if cells is None:
+            cells = self._cells[key] = PRINT_VARIANTS[variant](bytes(self.font.get_char_pattern(code)))
+        return cells
+
+    def write(self, text, col=0, row=0, variant='normal', ink=DEFAULT_INK, paper=DEFAULT_PAPER, wrap=True):
+        """Escreve o texto a partir da célula (col, row); retorna a posição seguinte.
+
+        '\\n' avança uma linha (da altura da variação); com wrap, o texto que passa da
+        coluna 31 continua na linha seguinte, senão é cortado.
+        """
+        color = ((ink & 0x0F) << 4) | (paper & 0x0F)
+        sample = self.glyph_cells(ord(' '), variant)
+        advance = max(dx for _, dx, _ in sample) + 1
+        line_height = max(dy for dy, _, _ in sample) + 1
+        start_col = col
+        patterns, colors = self.screen.patterns, self.screen.colors
+        fill = bytes((color,)) * CHAR_SIZE
+
+        for char in text:
+            if char == '\n':
+                col, row = start_col, row + line_height
+                continue
+            if col + advance > SCREEN_COLS:
+                if not wrap:
+                    continue
+                col, row = start_col, row + line_height
+            code = ord(char) if ord(char) < 256 else ord('?')
+            for dy, dx, pattern in self.glyph_cells(code, variant):
+                y, x = row + dy, col + dx
+                if 0 <= y < SCREEN_ROWS and 0 <= x < SCREEN_COLS:
+                    offset = (y * SCREEN_COLS + x) * CHAR_SIZE
+                    patterns[offset:offset + CHAR_SIZE] = pattern
+                    colors[offset:offset + CHAR_SIZE] = fill
+            col += advance
+        return col, row
@@ -0,0 +1,132 @@
+from functools import lru_cache
+
+# --- Constantes do Formato SHP (Graphos III) ---
+# O manual (III/GRAPHOS.TXT, 3.8 a 3.10) só diz que o banco de shapes é gravado "num
+# formato específico do GRAPHOS III". Nos arquivos existentes, cada shape é:
+#
+#   tecla (1 byte) | tipo (1 byte) | altura em pixels (1 byte) | largura em bytes (1 byte)
+#
+# seguido dos padrões na ordem da VRAM da SCREEN 2: blocos de 8 linhas x 8 pixels
+# (8 bytes cada), da esquerda para a direita e de cima para baixo. Um byte $FF no
+# lugar da tecla encerra o banco; o que vem depois é lixo de disco.
+# Os tipos 2 a 4 não aparecem nos bancos distribuídos: supõe-se que as cores (um byte
+# frente/fundo por byte de padrão) e a máscara ocupam um bloco do mesmo tamanho cada,
+# depois dos padrões, na ordem padrões, máscara, cores.
+
+SHP_HEADER_SIZE = 4
+SHP_END = 0xFF
+SHP_EXTENSIONS = ('.shp',)
+
+SHAPE_TYPES = {
+    1: "Pixels (sem atributos)",
+    2: "Colorido",
+    3: "Pixels com máscara",
+    4: "Colorido com máscara",
+}
+SHAPE_PLANES = {1: 1, 2: 2, 3: 2, 4: 3}  # Blocos de altura x largura bytes por tipo
+
+
+# --- Shapes ---
+
+def shape_name(key):
+    """Nome exibido de um shape: a tecla como caractere, se imprimível, senão o número."""
+    return chr(key) if 33 <= key <= 126 else str(key)
+
+
+def cells_to_rows(block, height, width):
+    """Reordena um bloco na ordem da VRAM (células 8x8) em linhas de `width` bytes.
+
+    Cada linha do resultado é uma única fatia com passo: os bytes da mesma linha de
+    células vizinhas estão a 8 bytes (ou menos, na última faixa incompleta) de distância.
+    """
+    rows = bytearray()
+    for top in range(0, height, 8):
+        lines = min(8, height - top)
+        base = top * width
+        for line in range(lines):
+            rows += block[base + line:base + lines * width:lines]
+    return bytes(rows)
+
+
+class Shape:
+    """Um shape decodificado: padrões (e máscara/cores) em linhas de `width` bytes."""
+
+    def __init__(self, key, shape_type, height, width, pixels, mask=None, colors=None):
+        self.key = key
+        self.type = shape_type
+        self.height = height
+        self.width = width  # Em bytes (8 pixels cada)
+        self.pixels = pixels
+        self.mask = mask
+        self.colors = colors
+
+    @property
+    def name(self):
+        return shape_name(self.key)
+
+    def row(self, y, plane=None):
+        """Os `width` bytes da linha y dos padrões (ou de outro plano, como self.mask)."""
+        plane = self.pixels if plane is None else plane
+        return plane[y * self.width:(y + 1) * self.width]
+
+
+class ShapeBank:
+    """Banco de shapes (.SHP) com decodificação preguiçosa.
+
+    A abertura só percorre os cabeçalhos (4 bytes por shape) para montar o índice de
+    deslocamentos; cada shape é decodificado apenas quando pedido por shape(i), e os
+    últimos decodificados ficam em cache.
+    """
+
+    DECODE_CACHE_SIZE = 64
+
+    def __init__(self, filepath, content=None):
+        self.filepath = filepath
+        self.problems = []  # Lista de (nível, mensagem), como em MSXFont
+        self.entries = []   # (tecla, tipo, altura, largura em bytes, deslocamento dos dados)
+        if content is None:
+            try:
+                with open(filepath, 'rb') as f:
+                    content = f.read()
+            except OSError as e:
+                content = b''
+                self.problems.append(('error', f"Não foi possível ler o arquivo: {e}"))
+        self.content = memoryview(content)
+        self._index()
+        self.shape = lru_cache(maxsize=self.DECODE_CACHE_SIZE)(self._decode)
+
+    def _index(self):
+        """Percorre a cadeia de cabeçalhos e registra onde cada shape começa."""
+        content, pos = self.content, 0
+        while pos < len(content):
+            if content[pos] == SHP_END:
+                return
+            if pos + SHP_HEADER_SIZE > len(content):
+                break
+            key, shape_type, height, width = content[pos:pos + SHP_HEADER_SIZE]
+            if shape_type not in SHAPE_PLANES or not height or not width:
+                self.problems.append(('warning', f"Cabeçalho inválido no byte {pos}: o banco foi lido "
+                                                 f"até o shape {len(self.entries)}."))
+                return
+            size = height * width * SHAPE_PLANES[shape_type]
+            if pos + SHP_HEADER_SIZE + size > len(content):
+                self.problems.append(('warning', f"O shape {len(self.entries) + 1} está truncado "
+                                                 f"e foi ignorado."))
+                return
+            self.entries.append((key, shape_type, height, width, pos + SHP_HEADER_SIZE))
+            pos += SHP_HEADER_SIZE + size
+        if self.entries and not self.problems:
+            self.problems.append(('warning', "O banco não termina com o marcador $FF."))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _decode(self, index):
+        """Decodifica o shape `index` (use shape(index), que guarda o resultado em cache)."""
+        key, shape_type, height, width, offset = self.entries[index]
+        size = height * width
+        planes = [cells_to_rows(bytes(self.content[offset + n * size:offset + (n + 1) * size]), height, width)
+                  for n in range(SHAPE_PLANES[shape_type])]
+        mask = planes[1] if shape_type in (3, 4) else None
+        colors = planes[-1] if shape_type in (2, 4) else None
+        return Shape(key, shape_type, height, width, planes[0], mask, colors)
@@ -0,0 +1,247 @@
+import struct
+from functools import lru_cache
+from itertools import combinations
+
+from msx_formats import CHAR_SIZE, NUM_CHARS, numpy_module
+
+
+# --- Distância de Hamming (XOR + popcount) ---
+# Um glifo 8x8 é um inteiro de 64 bits, e uma fonte inteira (2048 bytes) é um único
+# inteiro de 16384 bits: a distância entre dois glifos ou duas fontes é o número de
+# pixels diferentes, ou seja, a contagem de bits do XOR entre eles.
+
+def hamming(a, b):
+    """Número de pixels diferentes entre dois glifos (ou fontes) dados como int ou bytes."""
+    if not isinstance(a, int):
+        a = int.from_bytes(bytes(a), 'big')
+    if not isinstance(b, int):
+        b = int.from_bytes(bytes(b), 'big')
+    return (a ^ b).bit_count()
+
+
+@lru_cache(maxsize=None)
+def _popcount_table():
+    """Contagem de bits de cada byte (para NumPy anterior ao 2.0, sem bitwise_count)."""
+    np = numpy_module()
+    return np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount64(values):
+    """Contagem de bits de cada elemento de um array uint64 (requer NumPy)."""
+    np = numpy_module()
+    if hasattr(np, 'bitwise_count'):  # NumPy 2.0+
+        return np.bitwise_count(values)
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    return _popcount_table()[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+def _as_glyph(pattern):
+    """Converte um glifo (8 bytes ou int de 64 bits) em int."""
+    return pattern if isinstance(pattern, int) else int.from_bytes(bytes(pattern), 'big')
+
+
+# --- BK-tree (índice métrico, usado quando o NumPy não está disponível) ---
+
+class BKTree:
+    """Árvore BK sobre valores inteiros com a distância de Hamming.
+
+    Cada nó guarda filhos indexados pela distância até ele; pela desigualdade
+    triangular, só os filhos com distância em [d - r, d + r] podem conter resultados.
+    """
+
+    def __init__(self, values=()):
+        self.root = None
+        for value in values:
+            self.add(value)
+
+    def add(self, value):
+        if self.root is None:
+            self.root = (value, {})
+            return
+        node = self.root
+        while True:
+            distance = (node[0] ^ value).bit_count()
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (value, {})
+                return
+            node = child
+
+    def nearest(self, value, k, max_distance=64):
+        """Os k valores mais próximos, como lista de (distância, valor) em ordem crescente."""
+        best = []  # Ordenada; o raio de busca encolhe quando já há k candidatos
+        radius = max_distance
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node_value, children = stack.pop()
+            distance = (node_value ^ value).bit_count()
+            if distance <= radius:
+                best.append((distance, node_value))
+                best.sort()
+                del best[k:]
+                if len(best) == k:
+                    radius = best[-1][0]
+            for edge, child in children.items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return best
+
+
+# --- Índice de Glifos ---
+
+class GlyphIndex:
+    """Busca dos k glifos mais parecidos com um desenho em toda a biblioteca.
+
+    `fonts` é uma lista de (rótulo, 2048 bytes), como FontCatalog.font_data(). Os
+    desenhos repetidos são agrupados: a busca percorre só os glifos distintos, e cada
+    resultado traz todas as ocorrências (rótulo, código) daquele desenho.
+    """
+
+    def __init__(self, fonts):
+        self.labels = [label for label, _ in fonts]
+        blob = b''.join(bytes(data) for _, data in fonts)
+        np = numpy_module()
+        if np is not None:
+            values = np.frombuffer(blob, dtype='>u8').astype(np.uint64)
+            self.values, inverse = np.unique(values, return_inverse=True)
+            # Ocorrências de cada desenho: posições agrupadas por desenho distinto
+            self._order = np.argsort(inverse, kind='stable')
+            self._starts = np.searchsorted(inverse[self._order], np.arange(len(self.values) + 1))
+        else:
+            self._occurrences = {}
+            for position in range(len(blob) // CHAR_SIZE):
+                value = int.from_bytes(blob[position * CHAR_SIZE:(position + 1) * CHAR_SIZE], 'big')
+                self._occurrences.setdefault(value, []).append(position)
+            self.values = list(self._occurrences)
+            self._tree = BKTree(self.values)
+
+    def __len__(self):
+        """Quantidade de desenhos distintos."""
+        return len(self.values)
+
+    def _where(self, positions):
+        return [(self.labels[position // NUM_CHARS], position % NUM_CHARS) for position in positions]
+
+    def nearest(self, pattern, k=10, max_distance=64):
+        """Os k desenhos distintos mais próximos de `pattern` (8 bytes ou int).
+
+        Retorna uma lista de (distância, 8 bytes do glifo, [(rótulo, código), ...]),
+        em ordem crescente de (distância, glifo), com ou sem NumPy; o próprio desenho,
+        se existir, vem com distância 0.
+        """
+        value = _as_glyph(pattern)
+        results = []
+        np = numpy_module()
+        if np is not None:
+            distances = popcount64(self.values ^ np.uint64(value))
+            if k < len(distances):
+                # Todos os empatados com o k-ésimo entram no desempate, como na árvore BK
+                kth = distances[np.argpartition(distances, k - 1)[k - 1]]
+                candidates = np.flatnonzero(distances <= kth)
+            else:
+                candidates = np.arange(len(distances))
+            candidates = candidates[np.lexsort((self.values[candidates], distances[candidates]))][:k]
+            for u in candidates:
+                if distances[u] > max_distance:
+                    break
+                positions = self._order[self._starts[u]:self._starts[u + 1]]
+                results.append((int(distances[u]), int(self.values[u]), self._where(positions.tolist())))
+        else:
+            for distance, found in self._tree.nearest(value, k, max_distance):
+                results.append((distance, found, self._where(self._occurrences[found])))
+        return [(distance, found.to_bytes(CHAR_SIZE, 'big'), where) for distance, found, where in results]
+
+
+# --- Índice de Fontes ---
+
+class FontIndex:
+    """Similaridade entre fontes inteiras: soma das distâncias de Hamming dos 256 glifos.
+
+    `fonts` é uma lista de (rótulo, 2048 bytes), como FontCatalog.font_data().
+    """
+
+    def __init__(self, fonts):
+        self.labels = [label for label, _ in fonts]
+        self.datas = [bytes(data) for _, data in fonts]
+        np = numpy_module()
+        if np is not None:
+            self.matrix = (np.frombuffer(b''.join(self.datas), dtype='>u8')
+                           .astype(np.uint64).reshape(len(self.datas), NUM_CHARS))
+        else:
+            self.ints = [int.from_bytes(data, 'big') for data in self.datas]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def distances(self, data):
+        """Distância de uma fonte (2048 bytes) até cada fonte do índice, na ordem do índice."""
+        np = numpy_module()
+        if np is not None:
+            query = np.frombuffer(bytes(data), dtype='>u8').astype(np.uint64)
+            return popcount64(self.matrix ^ query).sum(axis=1, dtype=np.int64).tolist()
+        query = int.from_bytes(bytes(data), 'big')
+        return [(value ^ query).bit_count() for value in self.ints]
+
+    def rank(self, data, k=10):
+        """As k fontes mais parecidas com `data`, como lista de (distância, rótulo)."""
+        ranked = sorted(zip(self.distances(data), self.labels))
+        return ranked[:k]
+
+    def near_duplicates(self, max_distance=16):
+        """Pares de fontes com no máximo `max_distance` pixels diferentes.
+
+        Usa hashing multi-índice: os 256 glifos são divididos em max_distance + 1 blocos
+        intercalados (códigos j, j + B, j + 2B...). Se duas fontes diferem em até
+        max_distance pixels, pelo menos um bloco é idêntico nas duas (princípio da casa
+        dos pombos), então só os pares que compartilham algum bloco são comparados.
+        Com max_distance >= 256 não há blocos suficientes para essa garantia, e todos
+        os pares são comparados (custo quadrático no número de fontes).
+        Retorna uma lista de (distância, rótulo_a, rótulo_b) em ordem crescente.
+        """
+        blocks = max(1, max_distance + 1)
+        if blocks > NUM_CHARS:
+            candidates = set(combinations(range(len(self.datas)), 2))
+        else:
+            unpack = struct.Struct(f'>{NUM_CHARS}Q').unpack
+            glyphs = [unpack(data) for data in self.datas]
+            candidates = set()
+            for block in range(blocks):
+                buckets = {}
+                for i, values in enumerate(glyphs):
+                    buckets.setdefault(values[block::blocks], []).append(i)
+                for members in buckets.values():
+                    if len(members) > 1:
+                        candidates.update(combinations(members, 2))
+
+        if not candidates:
+            return []
+        pairs = sorted(candidates)
+        np = numpy_module()
+        if np is not None:
+            first, second = np.array(pairs, dtype=np.intp).T
+            distances = popcount64(self.matrix[first] ^ self.matrix[second]).sum(axis=1, dtype=np.int64).tolist()
+        else:
+            distances = [(self.ints[a] ^ self.ints[b]).bit_count() for a, b in pairs]
+        return sorted((distance, self.labels[a], self.labels[b])
+                      for (a, b), distance in zip(pairs, distances) if distance <= max_distance)
+
+
+def group_pairs(pairs):
+    """Agrupa pares (distância, a, b) em conjuntos de fontes quase idênticas (união-busca)."""
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for _, a, b in pairs:
+        parent[find(a)] = find(b)
+    groups = {}
+    for label in parent:
+        groups.setdefault(find(label), []).append(label)
+    return sorted(sorted(group) for group in groups.values())
@@ -0,0 +1,138 @@
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from msx_formats import read_font_file, scan_fonts
+from msx_render import encode_atlas_png
+
+# --- Constantes ---
+THUMBS_DB = 'msx_font_editor.db'  # O mesmo banco da configuração do editor
+THUMB_COLOR = (255, 255, 255)     # Cor dos pixels acesos nas miniaturas guardadas
+WRITE_BATCH = 64                  # Miniaturas novas gravadas no cache por transação
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS miniaturas
+(
+    caminho  TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    tamanho  INTEGER NOT NULL,
+    formato  TEXT,
+    png      BLOB
+);
+'''
+
+
+# --- Miniaturas de Alfabetos ---
+
+def render_thumbnail(path):
+    """Lê um alfabeto e o rasteriza como um atlas PNG 128x128 de 1 bit.
+
+    Retorna (png, nome do formato, problemas); png é None se o arquivo não pôde ser lido.
+    """
+    data, fmt, _, problems = read_font_file(path)
+    if data is None:
+        return None, None, problems
+    return encode_atlas_png(bytes(data), color_on=THUMB_COLOR), fmt.name, problems
+
+
+def cached_thumbnail(conn, path, st=None):
+    """A miniatura guardada de um arquivo, se ainda corresponde a ele (mtime e tamanho): (formato, png) ou None."""
+    if st is None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+    try:
+        return conn.execute('SELECT formato, png FROM miniaturas WHERE caminho = ? AND mtime_ns = ? AND tamanho = ?',
+                            (os.path.abspath(path), st.st_mtime_ns, st.st_size)).fetchone()
+    except sqlite3.OperationalError:  # Banco ainda sem a tabela de miniaturas
+        return None
+
+
+def store_thumbnail(conn, path, fmt, png):
+    """Guarda a miniatura de um arquivo com o seu mtime e tamanho atuais."""
+    st = os.stat(path)
+    conn.executescript(SCHEMA)
+    with conn:
+        conn.execute('INSERT OR REPLACE INTO miniaturas (caminho, mtime_ns, tamanho, formato, png) '
+                     'VALUES (?, ?, ?, ?, ?)', (os.path.abspath(path), st.st_mtime_ns, st.st_size, fmt, png))
+
+
+class ThumbnailLoader:
+    """Gera as miniaturas de uma lista de alfabetos sem bloquear a interface.
+
+    Uma thread coordenadora consulta o cache em disco (tabela miniaturas, chaveada
+    por caminho, mtime e tamanho), entrega na hora as miniaturas válidas e manda as
+    demais para um pool de threads. Cada resultado vai para a fila `results` como
+    (índice, png, formato, mensagens), para ser lido pelo laço da interface.
+    """
+
+    def __init__(self, paths, db_path=THUMBS_DB, workers=None):
+        self.paths = list(paths)
+        self.db_path = db_path
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.results = queue.Queue()
+        self.done = threading.Event()
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='miniaturas', daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def for_folder(cls, folder, **kwargs):
+        """Carregador para todos os alfabetos de uma pasta (e subpastas), em ordem de nome."""
+        return cls([path for _, path in scan_fonts([folder])], **kwargs)
+
+    def cancel(self):
+        """Interrompe a geração (as miniaturas já prontas continuam no cache)."""
+        self._cancelled.set()
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executescript(SCHEMA)
+            missing = []
+            for index, path in enumerate(self.paths):
+                if self._cancelled.is_set():
+                    return
+                try:
+                    st = os.stat(path)
+                except OSError as e:
+                    self.results.put((index, None, None, [str(e)]))
+                    continue
+                row = cached_thumbnail(conn, path, st)
+                if row is not None:
+                    self.results.put((index, row[1], row[0], []))
+                else:
+                    missing.append((index, path, st))
+
+            if missing:
+                self._render(conn, missing)
+        finally:
+            conn.close()
+            self.done.set()
+
+    def _render(self, conn, missing):
+        """Rasteriza as miniaturas que faltam no pool e as acrescenta ao cache."""
+        rows = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(render_thumbnail, path): (index, path, st) for index, path, st in missing}
+            for future in as_completed(futures):
+                if self._cancelled.is_set():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+                index, path, st = futures[future]
+                png, fmt, problems = future.result()
+                self.results.put((index, png, fmt, [message for _, message in problems]))
+                rows.append((os.path.abspath(path), st.st_mtime_ns, st.st_size, fmt, png))
+                if len(rows) >= WRITE_BATCH:
+                    self._store(conn, rows)
+        self._store(conn, rows)
+
+    @staticmethod
+    def _store(conn, rows):
+        with conn:
+            conn.executemany('INSERT OR REPLACE INTO miniaturas (caminho, mtime_ns, tamanho, formato, png) '
+                             'VALUES (?, ?, ?, ?, ?)', rows)
+        rows.clear()
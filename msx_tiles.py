@@ -0,0 +1,165 @@
+import json
+import os
+
+from msx_font import MSXFont
+from msx_formats import CHAR_SIZE, NUM_CHARS, DATA_SIZE, numpy_module
+from msx_screen import CELLS, SCREEN_COLS, SCREEN_ROWS, read_screen
+import msx_similarity
+
+# --- Extração de Ladrilhos (células 8x8 da SCREEN 2) ---
+
+INVERT_TABLE = bytes(0xFF - byte for byte in range(256))
+
+
+class TileSet:
+    """Ladrilhos distintos de uma ou mais telas e o mapa célula -> ladrilho.
+
+    `tiles` guarda os padrões únicos (8 bytes) na ordem da primeira ocorrência;
+    `cells` tem, para cada célula, (índice do ladrilho, invertido). Uma célula
+    invertida é exibida igual trocando as cores de frente e de fundo.
+    """
+
+    def __init__(self, invert=False, max_distance=0):
+        self.invert = invert
+        self.max_distance = max_distance
+        self.tiles = []
+        self.cells = []
+        self._index = {}  # padrão (ou seu inverso) -> (índice, invertido)
+
+    def add_screen(self, screen):
+        """Recorta as 768 células da tela e as acrescenta ao conjunto; retorna o mapa da tela."""
+        patterns = bytes(screen.patterns)
+        index, tiles = self._index, self.tiles
+        first_new = len(tiles)
+        cells = []
+        for offset in range(0, CELLS * CHAR_SIZE, CHAR_SIZE):
+            pattern = patterns[offset:offset + CHAR_SIZE]
+            found = index.get(pattern)
+            if found is None:
+                found = (len(tiles), False)
+                tiles.append(pattern)
+                index[pattern] = found
+                if self.invert:
+                    index.setdefault(pattern.translate(INVERT_TABLE), (found[0], True))
+            cells.append(found)
+        if self.max_distance and len(tiles) > first_new:
+            cells = self._merge_near(cells, first_new)
+        self.cells.extend(cells)
+        return cells
+
+    def _merge_near(self, cells, first_new):
+        """Funde cada ladrilho novo ao primeiro anterior a até max_distance pixels dele.
+
+        As distâncias dos ladrilhos novos até todos os anteriores são calculadas de uma
+        vez (XOR + popcount sobre uint64 com NumPy; sem ele, com int.bit_count).
+        """
+        values = [int.from_bytes(tile, 'big') for tile in self.tiles]
+        limit = self.max_distance
+        np = numpy_module()
+        if np is not None:
+            array = np.array(values, dtype=np.uint64)
+            distances = msx_similarity.popcount64(array[first_new:, None] ^ array[None, :])
+            if self.invert:
+                distances = np.minimum(distances, 64 - distances)
+            # Só conta quem vem antes: a linha k pode ser fundida às colunas < first_new + k
+            earlier = np.arange(len(values))[None, :] < np.arange(first_new, len(values))[:, None]
+            rows, columns = np.nonzero((distances <= limit) & earlier)
+            near = [[] for _ in range(len(values) - first_new)]
+            for k, j in zip(rows.tolist(), columns.tolist()):
+                near[k].append(j)
+        else:
+            near = []
+            for i in range(first_new, len(values)):
+                candidates = []
+                for j in range(i):
+                    distance = (values[i] ^ values[j]).bit_count()
+                    if distance <= limit or (self.invert and 64 - distance <= limit):
+                        candidates.append(j)
+                near.append(candidates)
+
+        # Um ladrilho novo só pode ser fundido a um que continue no conjunto
+        target = list(range(len(values)))
+        for k, candidates in enumerate(near):
+            i = first_new + k
+            target[i] = next((j for j in candidates if target[j] == j), i)
+
+        renumber, kept = {}, []
+        for i, tile in enumerate(self.tiles):
+            if target[i] == i:
+                renumber[i] = len(kept)
+                kept.append(tile)
+        remap = {}
+        for i in range(first_new, len(values)):
+            # Fundido pelo inverso quando está mais perto do inverso do representante
+            inverted = self.invert and (values[i] ^ values[target[i]]).bit_count() > 32
+            remap[i] = (renumber[target[i]], inverted)
+
+        # Renumerar muda o índice de todos os ladrilhos novos: o índice é refeito a partir
+        # dos que ficaram (e seus inversos), mais os fundidos nesta tela
+        index = {}
+        for n, tile in enumerate(kept):
+            index[tile] = (n, False)
+            if self.invert:
+                index.setdefault(tile.translate(INVERT_TABLE), (n, True))
+        for i in range(first_new, len(values)):
+            if target[i] != i:
+                n, inverted = remap[i]
+                index.setdefault(self.tiles[i], (n, inverted))
+                if self.invert:
+                    index.setdefault(self.tiles[i].translate(INVERT_TABLE), (n, not inverted))
+        self._index = index
+        self.tiles = kept
+        return [(remap[t][0], flag ^ remap[t][1]) if t in remap else (t, flag) for t, flag in cells]
+
+    def alphabets(self, first_code=0):
+        """Distribui os ladrilhos em alfabetos de 256 caracteres, a partir de first_code.
+
+        Retorna a lista de buffers de 2048 bytes.
+        """
+        per_font = NUM_CHARS - first_code
+        fonts = []
+        for start in range(0, max(1, len(self.tiles)), per_font):
+            data = bytearray(DATA_SIZE)
+            chunk = b''.join(self.tiles[start:start + per_font])
+            data[first_code * CHAR_SIZE:first_code * CHAR_SIZE + len(chunk)] = chunk
+            fonts.append(data)
+        return fonts
+
+    def name_map(self, cells=None, first_code=0):
+        """Mapa de nomes (24 x 32) de uma tela: código e alfabeto de cada célula."""
+        cells = self.cells[:CELLS] if cells is None else cells
+        per_font = NUM_CHARS - first_code
+        names = [[first_code + cells[row * SCREEN_COLS + col][0] % per_font for col in range(SCREEN_COLS)]
+                 for row in range(SCREEN_ROWS)]
+        fonts = [[cells[row * SCREEN_COLS + col][0] // per_font for col in range(SCREEN_COLS)]
+                 for row in range(SCREEN_ROWS)]
+        result = {'names': names, 'fonts': fonts}
+        if self.invert:
+            result['inverted'] = [[cells[row * SCREEN_COLS + col][1] for col in range(SCREEN_COLS)]
+                                  for row in range(SCREEN_ROWS)]
+        return result
+
+
+def extract_screen(path, output_base, invert=False, max_distance=0, first_code=0):
+    """Extrai os ladrilhos de uma tela e grava <base>-N.ALF e <base>.map.json.
+
+    Retorna (relatório, problemas), onde o relatório resume o que foi gravado.
+    """
+    screen, problems = read_screen(path)
+    if screen is None:
+        return None, problems
+
+    tiles = TileSet(invert, max_distance)
+    cells = tiles.add_screen(screen)
+    outputs = []
+    try:
+        os.makedirs(os.path.dirname(output_base) or '.', exist_ok=True)
+        for n, data in enumerate(tiles.alphabets(first_code)):
+            font_path = f'{output_base}-{n}.ALF'
+            problems += MSXFont(font_path, data=data).save(font_path)
+            outputs.append(font_path)
+        with open(f'{output_base}.map.json', 'w', encoding='utf-8') as f:
+            json.dump(dict(tiles.name_map(cells, first_code), alphabets=[os.path.basename(p) for p in outputs]), f)
+    except OSError as e:
+        return None, problems + [('error', f"Não foi possível gravar os ladrilhos: {e}")]
+    return {'tiles': len(tiles.tiles), 'alphabets': outputs, 'map': f'{output_base}.map.json'}, problems